@@ -9,21 +9,111 @@
 #
 # Transcription with speaker diarization is handled by transcribe.py (OpenAI)
 
+import asyncio
+import hashlib
 import json
 import os
+import random
 import re
 import sys
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Optional, TypeVar
 
+import httpx
 from dotenv import load_dotenv
 from google import genai
+from google.genai import errors
+
+import llm_cache
+from audio_utils import compress_for_upload
+from upload_cache import UploadCache, is_upload_cache_enabled
+from utils import dumps_json, loads_json, open_for_streaming
 
 # Constants
 DEFAULT_MODEL = "gemini-3-flash-preview"
 DEFAULT_AUDIO_MIME_TYPE = "audio/webm"
 
+MAX_API_ATTEMPTS = 3
+MAX_RETRY_DELAY_SECONDS = 30.0  # Upper bound on a single backoff, even if Gemini asks for more
+SUMMARY_BATCH_SIZE = 20  # Story beats summarized per Gemini request
+
+# HTTP status for rate limiting / quota exhaustion (retried like a 5xx)
+_RESOURCE_EXHAUSTED_CODE = 429
+
+# Network failures below the Gemini API (dropped connections, timeouts), which
+# the SDK raises as-is; always retried
+_TRANSPORT_ERRORS = (httpx.TransportError, httpx.TimeoutException)
+
+T = TypeVar("T")
+
+# Gemini clients by API key, reused so connection pools survive across calls
+_CLIENT_CACHE: dict[str, genai.Client] = {}
+
+# Clients for async calls, per event loop and then by API key; an async
+# client's connection pool can't outlive the loop it was first used on
+_ASYNC_CLIENT_CACHE: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, genai.Client]
+] = weakref.WeakKeyDictionary()
+
+# Expected shape of a single clip's analysis in Gemini's JSON response
+_ANALYSIS_JSON_FORMAT = """{
+  "audioType": "speech|ambient|mixed|music|silent",
+  "audioEvents": [
+    {
+      "timestamp": "00:01",
+      "event": "rushing water from waterfall"
+    }
+  ],
+  "sceneDescription": "Brief description of the overall scene",
+  "emotionalTone": "excited|happy|calm|curious|frustrated|etc."
+}"""
+
+_ANALYSIS_FIELD_RULES = """IMPORTANT:
+- audioType: Choose one of: speech, ambient, mixed, music, silent
+- audioEvents: Non-speech sounds (background noise, ambient sounds, etc.) with timestamps
+- sceneDescription: 1-2 sentences describing what's happening in the scene
+- emotionalTone: Overall mood/feeling of the clip"""
+
+_ANALYSIS_RESPONSE_RULES = f"""{_ANALYSIS_FIELD_RULES}
+
+Note: Do NOT include a transcript - speech transcription is handled separately.
+
+Respond ONLY with valid JSON, no additional text."""
+
+# Fixed prompt tails, built once at import time
+_ANALYSIS_INSTRUCTIONS = f"""Analyze the audio and respond with JSON in this exact format:
+
+{_ANALYSIS_JSON_FORMAT}
+
+{_ANALYSIS_RESPONSE_RULES}"""
+
+_ANALYSIS_PROMPT_HEADER = "Analyze this audio clip recorded during a family trip.\n\n"
+
+# Full prompt for clips without context (the common case in bulk runs)
+_DEFAULT_ANALYSIS_PROMPT = _ANALYSIS_PROMPT_HEADER + _ANALYSIS_INSTRUCTIONS
+
+_BATCH_ANALYSIS_INSTRUCTIONS = f"""Analyze each clip separately and respond with JSON in this exact format:
+
+{{
+  "results": [
+    <one object per clip, in clip order>
+  ]
+}}
+
+where each object has this format:
+
+{_ANALYSIS_JSON_FORMAT}
+
+{_ANALYSIS_RESPONSE_RULES}"""
+
+# How recordedAt timestamps are shown in prompts, e.g. "December 22, 2025, 10:30 AM"
+_RECORDED_AT_FORMAT = "%B %d, %Y, %I:%M %p"
+
 # Regex pattern to extract JSON from markdown code blocks
 # Matches ```json ... ``` or ``` ... ``` with optional language specifier
 _JSON_CODE_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*([\s\S]*?)```", re.MULTILINE)
@@ -49,6 +139,10 @@ def extract_json_from_text(text: str) -> str:
 
     text = text.strip()
 
+    # Fast path: plain JSON (the common case) or no code fence at all
+    if text[:1] in ("{", "[") or "`" not in text:
+        return text
+
     # Try to find a code block with JSON
     match = _JSON_CODE_BLOCK_PATTERN.search(text)
     if match:
@@ -58,6 +152,140 @@ def extract_json_from_text(text: str) -> str:
     return text
 
 
+def _is_transient_error(error: Exception) -> bool:
+    """Return True for errors worth retrying (5xx, rate limits and network failures)."""
+    if isinstance(error, (errors.ServerError, *_TRANSPORT_ERRORS)):
+        return True
+    return isinstance(error, errors.ClientError) and error.code == _RESOURCE_EXHAUSTED_CODE
+
+
+def _retry_delay_hint(error: errors.APIError) -> Optional[float]:
+    """
+    Get the wait Gemini suggests in a rate-limit error (RetryInfo retryDelay), if any.
+
+    Args:
+        error: The Gemini API error
+
+    Returns:
+        Delay in seconds, or None if the error carries no usable hint
+    """
+    body = error.details.get("error") if isinstance(error.details, dict) else None
+    details = body.get("details") if isinstance(body, dict) else None
+    if not isinstance(details, list):
+        return None
+    for detail in details:
+        retry_delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(retry_delay, str) and retry_delay.endswith("s"):
+            try:
+                return max(0.0, float(retry_delay[:-1]))
+            except ValueError:
+                return None
+    return None
+
+
+def _with_retry(
+    fn: Callable[..., T], *args: Any, attempts: int = MAX_API_ATTEMPTS, **kwargs: Any
+) -> T:
+    """
+    Call fn, retrying transient Gemini and network errors with exponential backoff.
+
+    Waits 2^attempt seconds (plus jitter) between attempts so a brief
+    outage doesn't throw away an upload or the whole clip. Rate-limit errors
+    that say how long to wait are retried after that delay instead, capped
+    at MAX_RETRY_DELAY_SECONDS.
+
+    Args:
+        fn: Function to call
+        *args: Positional arguments for fn
+        attempts: Maximum number of attempts
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        Whatever fn returns
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except (errors.APIError, *_TRANSPORT_ERRORS) as e:
+            attempt += 1
+            if attempt >= attempts or not _is_transient_error(e):
+                raise
+            time.sleep(_retry_delay(e, attempt))
+
+
+async def _with_retry_async(
+    fn: Callable[..., Awaitable[T]], *args: Any, attempts: int = MAX_API_ATTEMPTS, **kwargs: Any
+) -> T:
+    """
+    Async version of _with_retry for coroutine functions.
+
+    Backs off with asyncio.sleep, so other requests on the event loop keep
+    running while this one waits.
+
+    Args:
+        fn: Coroutine function to call
+        *args: Positional arguments for fn
+        attempts: Maximum number of attempts
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        Whatever fn's coroutine returns
+    """
+    attempt = 0
+    while True:
+        try:
+            return await fn(*args, **kwargs)
+        except (errors.APIError, *_TRANSPORT_ERRORS) as e:
+            attempt += 1
+            if attempt >= attempts or not _is_transient_error(e):
+                raise
+            await asyncio.sleep(_retry_delay(e, attempt))
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Work out how long to wait before retrying a failed Gemini request.
+
+    Args:
+        error: The transient Gemini API or network error
+        attempt: Number of attempts made so far
+
+    Returns:
+        Delay in seconds
+    """
+    hint = _retry_delay_hint(error) if isinstance(error, errors.APIError) else None
+    delay = min(MAX_RETRY_DELAY_SECONDS, hint if hint is not None else 2 ** (attempt - 1))
+    delay += random.random() * 0.25  # nosec B311 - jitter only
+    return delay
+
+
+def _get_client(api_key: str) -> genai.Client:
+    """
+    Get the shared Gemini client for an API key, creating it on first use.
+
+    Only used for synchronous calls; async calls use _get_async_client().
+    """
+    client = _CLIENT_CACHE.get(api_key)
+    if client is None:
+        client = _CLIENT_CACHE[api_key] = genai.Client(api_key=api_key)
+    return client
+
+
+def _get_async_client(api_key: str) -> genai.Client:
+    """
+    Get the Gemini client for async calls on the running event loop.
+
+    Calls on the same loop share a client (and its connections); a new loop,
+    e.g. from another asyncio.run(), gets a fresh one.
+    """
+    clients = _ASYNC_CLIENT_CACHE.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(api_key)
+    if client is None:
+        client = clients[api_key] = genai.Client(api_key=api_key)
+    return client
+
+
 def format_traveler(traveler: dict[str, Any]) -> str:
     """
     Format a traveler dict as a display string.
@@ -76,6 +304,29 @@ def format_traveler(traveler: dict[str, Any]) -> str:
     return name
 
 
+def _build_summary_prompt(story_text: str) -> str:
+    """Build the Gemini prompt for summarizing a story beat."""
+    return f"""Summarize this story in ONE sentence (max 30 words).
+Capture the main historical fact or interesting point being shared.
+
+Story:
+{story_text}
+
+Summary:"""
+
+
+def _finish_summary(response_text: Optional[str], story_text: str, cache_key: str) -> str:
+    """Clean up a summary response and cache it."""
+    summary = response_text.strip() if response_text else story_text
+    # Remove any quotes that might wrap the summary
+    summary = summary.strip("\"'")
+
+    # Only cache real model output, not the fallback to the original text
+    if response_text:
+        llm_cache.put(cache_key, summary)
+    return summary
+
+
 def summarize_story_beat(story_text: str, api_key: str) -> str:
     """
     Summarize a story beat text into a concise 1-2 sentence summary.
@@ -91,28 +342,315 @@ def summarize_story_beat(story_text: str, api_key: str) -> str:
     if len(story_text) < 200:
         return story_text
 
-    client = genai.Client(api_key=api_key)
+    prompt = _build_summary_prompt(story_text)
+
+    # Story beats repeat across re-runs of the same trip - reuse earlier summaries
+    cache_key = llm_cache.make_key(DEFAULT_MODEL, prompt)
+    cached_summary = llm_cache.get(cache_key)
+    if cached_summary is not None:
+        return str(cached_summary)
+
+    client = _get_client(api_key)
+    response = _with_retry(client.models.generate_content, model=DEFAULT_MODEL, contents=[prompt])
+
+    return _finish_summary(response.text, story_text, cache_key)
+
+
+async def summarize_story_beat_async(story_text: str, api_key: str) -> str:
+    """
+    Async version of summarize_story_beat using the Gemini async client.
+
+    Args:
+        story_text: The full story beat text to summarize
+        api_key: Gemini API key
 
-    prompt = f"""Summarize this story in ONE sentence (max 30 words).
+    Returns:
+        A brief summary capturing the main point of the story
+    """
+    if len(story_text) < 200:
+        return story_text
+
+    prompt = _build_summary_prompt(story_text)
+
+    cache_key = llm_cache.make_key(DEFAULT_MODEL, prompt)
+    cached_summary = llm_cache.get(cache_key)
+    if cached_summary is not None:
+        return str(cached_summary)
+
+    client = _get_async_client(api_key)
+    response = await _with_retry_async(
+        client.aio.models.generate_content, model=DEFAULT_MODEL, contents=[prompt]
+    )
+
+    return _finish_summary(response.text, story_text, cache_key)
+
+
+def build_batch_summary_prompt(stories: list[tuple[str, str]]) -> str:
+    """
+    Build a single Gemini prompt for summarizing several story beats.
+
+    Args:
+        stories: (story beat ID, full text) pairs
+
+    Returns:
+        Prompt text
+    """
+    stories_json = dumps_json([{"id": beat_id, "text": text} for beat_id, text in stories])
+    return f"""Summarize each of these stories in ONE sentence (max 30 words).
 Capture the main historical fact or interesting point being shared.
 
-Story:
-{story_text}
+Respond with a JSON object mapping each story's id to its summary, like {{"<id>": "<summary>"}}.
 
-Summary:"""
+Stories:
+{stories_json}"""
 
-    response = client.models.generate_content(model=DEFAULT_MODEL, contents=[prompt])
 
-    summary = response.text.strip() if response.text else story_text
-    # Remove any quotes that might wrap the summary
-    summary = summary.strip("\"'")
-    return summary
+def _parse_batch_summaries(response_text: Optional[str]) -> dict[str, str]:
+    """Parse a batched summary response into {story beat ID: summary}."""
+    try:
+        parsed = loads_json(extract_json_from_text(response_text or ""))
+        if not isinstance(parsed, dict):
+            raise ValueError("Response is not a JSON object")
+    except ValueError as e:
+        print(f"Warning: Failed to parse batch summary response: {e}")
+        return {}
+    return {
+        str(beat_id): summary.strip()
+        for beat_id, summary in parsed.items()
+        if isinstance(summary, str) and summary.strip()
+    }
+
+
+def summarize_story_beats_batch(stories: dict[str, str], api_key: str) -> dict[str, str]:
+    """
+    Summarize several story beats with one Gemini request per SUMMARY_BATCH_SIZE beats.
+
+    Short texts and cached summaries are handled as in summarize_story_beat()
+    and share its cache. Any beat a batched response leaves out is summarized
+    on its own.
+
+    Args:
+        stories: Dictionary mapping story beat IDs to their full text
+        api_key: Gemini API key
+
+    Returns:
+        Dictionary mapping each story beat ID to its summary, in input order
+    """
+    summaries: dict[str, str] = {}
+    pending: list[tuple[str, str, str]] = []  # (beat ID, text, cache key)
+    for beat_id, story_text in stories.items():
+        if len(story_text) < 200:
+            summaries[beat_id] = story_text
+            continue
+
+        cache_key = llm_cache.make_key(DEFAULT_MODEL, _build_summary_prompt(story_text))
+        cached_summary = llm_cache.get(cache_key)
+        if cached_summary is not None:
+            summaries[beat_id] = str(cached_summary)
+        else:
+            pending.append((beat_id, story_text, cache_key))
+
+    for start in range(0, len(pending), SUMMARY_BATCH_SIZE):
+        batch = pending[start : start + SUMMARY_BATCH_SIZE]
+        batch_summaries: dict[str, str] = {}
+        if len(batch) > 1:
+            prompt = build_batch_summary_prompt([(beat_id, text) for beat_id, text, _ in batch])
+            response = _with_retry(
+                _get_client(api_key).models.generate_content,
+                model=DEFAULT_MODEL,
+                contents=[prompt],
+            )
+            batch_summaries = _parse_batch_summaries(response.text)
+
+        for beat_id, story_text, cache_key in batch:
+            summary = batch_summaries.get(beat_id)
+            if summary:
+                summaries[beat_id] = _finish_summary(summary, story_text, cache_key)
+            else:
+                summaries[beat_id] = summarize_story_beat(story_text, api_key)
+
+    return {beat_id: summaries[beat_id] for beat_id in stories}
+
+
+def _upload_file(client: Any, path: Path) -> Any:
+    """
+    Upload a file to Gemini, retrying transient failures of the upload request.
+
+    Each attempt reopens the file, so a retry streams it from the start.
+    """
+
+    def upload() -> Any:
+        # The SDK streams the file in chunks, so it is never read into memory whole
+        with open_for_streaming(path) as f:
+            return client.files.upload(file=f, config={"mime_type": DEFAULT_AUDIO_MIME_TYPE})
+
+    return _with_retry(upload)
+
+
+def _compress_and_upload(client: Any, audio_file: Path) -> Any:
+    """Upload an audio file, compressed first when AUDIO_COMPRESS=1 and it is large."""
+    compressed_file = compress_for_upload(audio_file)
+    try:
+        return _upload_file(client, compressed_file or audio_file)
+    finally:
+        if compressed_file:
+            compressed_file.unlink(missing_ok=True)
+
+
+def _upload_audio(client: Any, audio_file: Path, reuse_uploads: Optional[bool] = None) -> Any:
+    """
+    Upload an audio file to Gemini, compressing it and reusing cached uploads when enabled.
+
+    The upload cache is keyed on the original file's bytes, so a cache hit
+    skips compression, and the key doesn't depend on ffmpeg's output. Only the
+    upload request itself is retried.
+
+    Args:
+        client: Gemini client
+        audio_file: Path to the audio file
+        reuse_uploads: Reuse a previous upload of identical bytes (defaults to
+            GEMINI_FILE_CACHE=1)
+
+    Returns:
+        The uploaded Gemini file
+    """
+    if reuse_uploads is None:
+        reuse_uploads = is_upload_cache_enabled()
+
+    if reuse_uploads:
+        with UploadCache() as cache:
+            return cache.get_or_upload(
+                client,
+                audio_file,
+                DEFAULT_AUDIO_MIME_TYPE,
+                upload=lambda: _compress_and_upload(client, audio_file),
+            )
+
+    return _compress_and_upload(client, audio_file)
+
+
+def _parse_iso_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp, accepting a trailing "Z" for UTC."""
+    if sys.version_info >= (3, 11):
+        # fromisoformat understands "Z" natively from Python 3.11
+        return datetime.fromisoformat(value)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_context_lines(context: dict[str, Any]) -> str:
+    """Format clip context as "- Key: value" prompt lines."""
+    lines: list[str] = []
+
+    # Add location
+    if context.get("location"):
+        lines.append(f"- Location: {context['location']}\n")
+
+    # Add story beat context
+    if context.get("storyBeatContext"):
+        lines.append(
+            f'- This was recorded as a reaction to a story about: "{context["storyBeatContext"]}"\n'
+        )
+        if context.get("storyBeatStarred"):
+            lines.append("- This story beat was starred as a favorite by the family.\n")
+
+    # Add timestamp
+    if context.get("recordedAt"):
+        # Parse ISO timestamp and format it nicely
+        dt = _parse_iso_timestamp(context["recordedAt"])
+        formatted_time = dt.strftime(_RECORDED_AT_FORMAT)
+        lines.append(f"- Recorded at: {formatted_time}\n")
+
+    return "".join(lines)
+
+
+def build_analysis_prompt(context: Optional[dict[str, Any]] = None) -> str:
+    """
+    Build the Gemini prompt for analyzing an audio clip.
+
+    Args:
+        context: Optional clip context (location, storyBeatContext, recordedAt)
+
+    Returns:
+        Prompt text
+    """
+    # Without context the prompt is always the same
+    if not context:
+        return _DEFAULT_ANALYSIS_PROMPT
+
+    parts = [
+        _ANALYSIS_PROMPT_HEADER,
+        "CONTEXT:\n",
+        _format_context_lines(context),
+        "\nGiven this context, analyze the audio.\n\n",
+        # Add analysis instructions (no transcript - handled by OpenAI)
+        _ANALYSIS_INSTRUCTIONS,
+    ]
+
+    return "".join(parts)
+
+
+def _prompt_sha256(prompt: str) -> str:
+    """Hash a prompt for result metadata (the full text is only kept on errors)."""
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def is_current_analysis(result: dict[str, Any], context: Optional[dict[str, Any]]) -> bool:
+    """
+    Check that an earlier analysis came from the current model, prompt and context.
+
+    Results from a batched request never match, since their prompt also
+    covered other clips.
+
+    Args:
+        result: Analysis result from an earlier run, including its "_meta"
+        context: The clip's context now
+
+    Returns:
+        True if analyzing the clip again would send the same request
+    """
+    meta = result.get("_meta")
+    if not isinstance(meta, dict) or "batch_index" in meta:
+        return False
+    return bool(
+        meta.get("model") == DEFAULT_MODEL
+        and meta.get("context") == context
+        and meta.get("prompt_sha256") == _prompt_sha256(build_analysis_prompt(context))
+    )
+
+
+def _parse_analysis_response(
+    response: Any, prompt: str, context: Optional[dict[str, Any]]
+) -> dict[str, Any]:
+    """Parse a Gemini analysis response into a result dict."""
+    # Parse the JSON response
+    try:
+        response_text = response.text if response.text else ""
+        json_text = extract_json_from_text(response_text)
+        result: dict[str, Any] = loads_json(json_text)
+
+        # Add metadata (the raw response is only kept when parsing fails)
+        result["_meta"] = {
+            "model": DEFAULT_MODEL,
+            "prompt_sha256": _prompt_sha256(prompt),
+            "context": context,
+        }
+
+        return result
+
+    except json.JSONDecodeError as e:
+        return {
+            "error": "Failed to parse JSON response",
+            "error_details": str(e),
+            "raw_response": response.text,
+            "_meta": {"prompt": prompt, "context": context},
+        }
 
 
 def analyze_audio(
     audio_path: str,
     api_key: str,
     context: Optional[dict[str, Any]] = None,
+    reuse_uploads: Optional[bool] = None,
 ) -> dict[str, Any]:
     """
     Analyze an audio clip using Gemini for non-transcript analysis.
@@ -132,100 +670,213 @@ def analyze_audio(
             - location: "La Mina Falls, El Yunque"
             - storyBeatContext: "Story about Princess Louise-Hippolyte..."
             - recordedAt: "2024-12-28T14:34:22Z"
+        reuse_uploads: Reuse a previous Gemini upload of identical audio bytes
+            (defaults to GEMINI_FILE_CACHE=1)
 
     Returns:
         dict with: audioType, audioEvents, sceneDescription, emotionalTone
     """
     # Create Gemini client
-    client = genai.Client(api_key=api_key)
+    client = _get_client(api_key)
 
     # Check if file exists
     audio_file = Path(audio_path)
     if not audio_file.exists():
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-    print(f"Uploading audio file for analysis: {audio_file.name}")
+    prompt = build_analysis_prompt(context)
+    uploaded_file = _upload_audio(client, audio_file, reuse_uploads)
 
-    # Upload the audio file with explicit mime type
-    with open(audio_file, "rb") as f:
-        uploaded_file = client.files.upload(file=f, config={"mime_type": DEFAULT_AUDIO_MIME_TYPE})
-    print(f"Upload complete. File name: {uploaded_file.name}")
+    # Send prompt with the audio file
+    contents: list[Any] = [uploaded_file, prompt]
+    response = _with_retry(client.models.generate_content, model=DEFAULT_MODEL, contents=contents)
 
-    # Build prompt
-    prompt = "Analyze this audio clip recorded during a family trip.\n\n"
+    return _parse_analysis_response(response, prompt, context)
 
-    if context:
-        prompt += "CONTEXT:\n"
 
-        # Add location
-        if context.get("location"):
-            prompt += f"- Location: {context['location']}\n"
+def build_batch_analysis_prompt(contexts: list[Optional[dict[str, Any]]]) -> str:
+    """
+    Build a single Gemini prompt for analyzing several clips at once.
 
-        # Add story beat context
-        if context.get("storyBeatContext"):
-            prompt += f'- This was recorded as a reaction to a story about: "{context["storyBeatContext"]}"\n'
-            if context.get("storyBeatStarred"):
-                prompt += "- This story beat was starred as a favorite by the family.\n"
+    Args:
+        contexts: Per-clip context dicts (or None), in the same order as the
+            audio files attached to the request
 
-        # Add timestamp
-        if context.get("recordedAt"):
-            # Parse ISO timestamp and format it nicely
-            dt = datetime.fromisoformat(context["recordedAt"].replace("Z", "+00:00"))
-            formatted_time = dt.strftime("%B %d, %Y, %I:%M %p")
-            prompt += f"- Recorded at: {formatted_time}\n"
+    Returns:
+        Prompt text
+    """
+    parts = [
+        f"Analyze the following {len(contexts)} audio clips recorded during a family trip.\n"
+        "The audio files are attached in order: the first file is Clip 1, "
+        "the second is Clip 2, and so on.\n\n"
+    ]
 
-        prompt += "\nGiven this context, analyze the audio.\n\n"
+    for idx, context in enumerate(contexts, 1):
+        parts.append(f"Clip {idx}:\n")
+        context_lines = _format_context_lines(context) if context else ""
+        parts.append(context_lines or "- No additional context\n")
+        parts.append("\n")
 
-    # Add analysis instructions (no transcript - handled by OpenAI)
-    prompt += """Analyze the audio and respond with JSON in this exact format:
+    parts.append(_BATCH_ANALYSIS_INSTRUCTIONS)
 
-{
-  "audioType": "speech|ambient|mixed|music|silent",
-  "audioEvents": [
-    {
-      "timestamp": "00:01",
-      "event": "rushing water from waterfall"
-    }
-  ],
-  "sceneDescription": "Brief description of the overall scene",
-  "emotionalTone": "excited|happy|calm|curious|frustrated|etc."
-}
+    return "".join(parts)
 
-IMPORTANT:
-- audioType: Choose one of: speech, ambient, mixed, music, silent
-- audioEvents: Non-speech sounds (background noise, ambient sounds, etc.) with timestamps
-- sceneDescription: 1-2 sentences describing what's happening in the scene
-- emotionalTone: Overall mood/feeling of the clip
 
-Note: Do NOT include a transcript - speech transcription is handled separately.
+def analyze_audio_batch(
+    audio_paths: list[str],
+    api_key: str,
+    contexts: Optional[list[Optional[dict[str, Any]]]] = None,
+    max_upload_workers: int = 8,
+    reuse_uploads: Optional[bool] = None,
+) -> list[dict[str, Any]]:
+    """
+    Analyze several audio clips with a single Gemini request.
 
-Respond ONLY with valid JSON, no additional text."""
+    All files are uploaded concurrently, then sent together with one prompt
+    that asks for a JSON array of per-clip results. This saves one request
+    round-trip per clip compared to calling analyze_audio in a loop.
 
-    # Send prompt with the audio file
-    print("Analyzing audio with Gemini...")
+    Args:
+        audio_paths: Paths to the audio files
+        api_key: Gemini API key
+        contexts: Optional per-clip context dicts (same order as audio_paths)
+        max_upload_workers: Maximum number of concurrent uploads
+        reuse_uploads: Reuse a previous upload of identical bytes (defaults to
+            GEMINI_FILE_CACHE=1)
 
-    contents: list[Any] = [uploaded_file, prompt]
-    response = client.models.generate_content(model=DEFAULT_MODEL, contents=contents)
+    Returns:
+        One result dict per clip, in input order, each shaped like the return
+        value of analyze_audio (including the error form)
+    """
+    if not audio_paths:
+        return []
 
-    # Parse the JSON response
+    clip_contexts: list[Optional[dict[str, Any]]] = (
+        list(contexts) if contexts is not None else [None] * len(audio_paths)
+    )
+    if len(clip_contexts) != len(audio_paths):
+        raise ValueError("contexts must have one entry per audio file")
+
+    audio_files = [Path(audio_path) for audio_path in audio_paths]
+    for audio_file in audio_files:
+        if not audio_file.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_file}")
+
+    client = _get_client(api_key)
+
+    workers = min(max_upload_workers, len(audio_files))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        upload_futures = [
+            pool.submit(_upload_audio, client, audio_file, reuse_uploads)
+            for audio_file in audio_files
+        ]
+        prompt = build_batch_analysis_prompt(clip_contexts)
+        uploaded_files = [future.result() for future in upload_futures]
+
+    contents: list[Any] = [*uploaded_files, prompt]
+    response = _with_retry(client.models.generate_content, model=DEFAULT_MODEL, contents=contents)
+
+    return _split_batch_response(response, prompt, clip_contexts)
+
+
+def _split_batch_response(
+    response: Any, prompt: str, contexts: list[Optional[dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    """Split a batched Gemini response into one result dict per clip."""
     try:
         response_text = response.text if response.text else ""
-        json_text = extract_json_from_text(response_text)
-        result: dict[str, Any] = json.loads(json_text)
+        parsed = loads_json(extract_json_from_text(response_text))
+        results = parsed.get("results") if isinstance(parsed, dict) else parsed
+        if not isinstance(results, list) or not all(isinstance(r, dict) for r in results):
+            raise ValueError("Response has no list of result objects")
+        if len(results) != len(contexts):
+            raise ValueError(f"Expected {len(contexts)} results, got {len(results)}")
+    except ValueError as e:
+        return [
+            {
+                "error": "Failed to parse JSON response",
+                "error_details": str(e),
+                "raw_response": response.text,
+                "_meta": {"prompt": prompt, "context": context},
+            }
+            for context in contexts
+        ]
+
+    prompt_sha256 = _prompt_sha256(prompt)
+    for idx, (result, context) in enumerate(zip(results, contexts)):
+        result["_meta"] = {
+            "model": DEFAULT_MODEL,
+            "prompt_sha256": prompt_sha256,
+            "context": context,
+            "batch_index": idx,
+        }
+    return results
 
-        # Add metadata
-        result["_meta"] = {"prompt": prompt, "context": context, "raw_response": response.text}
 
-        return result
+async def analyze_audio_async(
+    audio_path: str,
+    api_key: str,
+    context: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """
+    Async version of analyze_audio using the Gemini async client.
 
-    except json.JSONDecodeError as e:
-        print(f"Warning: Failed to parse JSON response: {e}")
-        return {
-            "error": "Failed to parse JSON response",
-            "error_details": str(e),
-            "raw_response": response.text,
-            "_meta": {"prompt": prompt, "context": context},
-        }
+    The upload runs in a worker thread (so the upload cache can be used);
+    the analysis request is awaited on the event loop. Both are retried on
+    transient errors like in analyze_audio.
+
+    Args:
+        audio_path: Path to the audio file
+        api_key: Gemini API key
+        context: Optional clip context (see analyze_audio)
+
+    Returns:
+        dict with: audioType, audioEvents, sceneDescription, emotionalTone
+    """
+    client = _get_async_client(api_key)
+
+    audio_file = Path(audio_path)
+    if not audio_file.exists():
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+
+    upload_task = asyncio.create_task(asyncio.to_thread(_upload_audio, client, audio_file))
+    prompt = build_analysis_prompt(context)
+    uploaded_file = await upload_task
+
+    contents: list[Any] = [uploaded_file, prompt]
+    response = await _with_retry_async(
+        client.aio.models.generate_content, model=DEFAULT_MODEL, contents=contents
+    )
+
+    return _parse_analysis_response(response, prompt, context)
+
+
+async def analyze_and_summarize(
+    audio_path: str,
+    story_text: str,
+    api_key: str,
+    context: Optional[dict[str, Any]] = None,
+) -> tuple[dict[str, Any], str]:
+    """
+    Analyze a clip and summarize its story beat concurrently.
+
+    Both calls are network-bound, so running them together takes roughly as
+    long as the slower of the two.
+
+    Args:
+        audio_path: Path to the audio file
+        story_text: Story beat text to summarize
+        api_key: Gemini API key
+        context: Optional clip context (see analyze_audio)
+
+    Returns:
+        Tuple of (analysis result, story beat summary)
+    """
+    analysis, summary = await asyncio.gather(
+        analyze_audio_async(audio_path, api_key, context=context),
+        summarize_story_beat_async(story_text, api_key),
+    )
+    return analysis, summary
 
 
 if __name__ == "__main__":
@@ -257,6 +908,7 @@ if __name__ == "__main__":
         }
 
         # Analyze the audio with context
+        print(f"Analyzing {Path(audio_path).name} with Gemini...")
         result = analyze_audio(audio_path, api_key, context=test_context)
 
         # Print results
@@ -269,7 +921,7 @@ if __name__ == "__main__":
             print(f"Details: {result['error_details']}")
             print(f"\nRaw response:\n{result['raw_response']}")
         else:
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+            print(dumps_json(result))
 
         print("=" * 60)
 
@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
 # Travel Chronicle - Audio Utilities
 
+import os
+import subprocess  # nosec B404 - only used to run ffmpeg with fixed arguments
 import tempfile
+import weakref
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional
 
 from pydub import AudioSegment
 
+from utils import loads_json
+
+# Constants
+AUDIO_COMPRESS_ENV_VAR = "AUDIO_COMPRESS"
+COMPRESS_THRESHOLD_MB = 5
+COMPRESS_BITRATE = "24k"
+TEMP_DIR_ENV_VAR = "TC_TMPDIR"  # Where intermediate audio files go (e.g. /dev/shm)
+
 
 @dataclass
 class ConcatenatedAudio:
@@ -22,6 +34,18 @@ class ConcatenatedAudio:
     total_duration_ms: float
 
 
+def _make_temp_file(suffix: str) -> Path:
+    """
+    Create an empty temp file for intermediate audio (caller must delete it).
+
+    Files go in TC_TMPDIR if set (e.g. /dev/shm, to keep them off disk),
+    otherwise in the system temp directory.
+    """
+    fd, temp_name = tempfile.mkstemp(suffix=suffix, dir=os.getenv(TEMP_DIR_ENV_VAR) or None)
+    os.close(fd)
+    return Path(temp_name)
+
+
 def format_timestamp(ms: float) -> str:
     """
     Format milliseconds as MM:SS timestamp.
@@ -38,6 +62,189 @@ def format_timestamp(ms: float) -> str:
     return f"{minutes:02d}:{seconds:02d}"
 
 
+def _join_segments(segments: list[AudioSegment]) -> tuple[AudioSegment, list[int]]:
+    """
+    Join audio segments with a single copy of the sample data.
+
+    Appending with `+=` copies everything joined so far on every step; here the
+    raw samples are gathered into one buffer instead. Segments are first
+    converted to the highest frame rate, channel count and sample width among
+    them, as pydub does when appending.
+
+    Args:
+        segments: Decoded audio segments in order
+
+    Returns:
+        Tuple of (joined audio, end offset in ms of each segment)
+    """
+    if not segments:
+        return AudioSegment.empty(), []
+
+    frame_rate = max(seg.frame_rate for seg in segments)
+    channels = max(seg.channels for seg in segments)
+    sample_width = max(seg.sample_width for seg in segments)
+    frame_width = channels * sample_width
+
+    buffer = bytearray()
+    end_offsets = []
+    for seg in segments:
+        seg = seg.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(sample_width)
+        buffer.extend(seg.raw_data)
+        end_offsets.append(round(1000 * (len(buffer) // frame_width) / frame_rate))
+
+    combined = AudioSegment(
+        data=bytes(buffer), sample_width=sample_width, frame_rate=frame_rate, channels=channels
+    )
+    return combined, end_offsets
+
+
+def _probe_audio(path: Path) -> Optional[tuple[str, int, float]]:
+    """
+    Read the codec, channel count and duration of a file's first audio stream.
+
+    Results are memoized on (path, mtime, size), since the same voice
+    references are probed for every clip.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Tuple of (codec name, channels, duration in ms), or None if ffprobe is
+        unavailable or cannot read the file
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return _probe_audio_cached(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _probe_audio_cached(path: str, mtime_ns: int, size: int) -> Optional[tuple[str, int, float]]:
+    """Run ffprobe on a file, memoized on path, mtime and size."""
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=codec_name,channels:format=duration",
+        "-of",
+        "json",
+        path,
+    ]
+    try:
+        result = subprocess.run(  # nosec B603 B607
+            command, check=True, capture_output=True, text=True
+        )
+        probe = loads_json(result.stdout)
+        stream = probe["streams"][0]
+        return (
+            stream["codec_name"],
+            int(stream["channels"]),
+            float(probe["format"]["duration"]) * 1000,
+        )
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError, IndexError):
+        return None
+
+
+def _concat_copy(paths: list[Path], output_path: Path) -> bool:
+    """
+    Join files with ffmpeg's concat demuxer, stream-copying without re-encoding.
+
+    The inputs must share codec parameters.
+
+    Args:
+        paths: Input files in order
+        output_path: Where to write the joined file
+
+    Returns:
+        True on success, False if ffmpeg is unavailable or fails
+    """
+    list_path = _make_temp_file(".txt")
+    try:
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in paths:
+                escaped = str(path.resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        command = [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(list_path),
+            "-c",
+            "copy",
+            str(output_path),
+        ]
+        subprocess.run(command, check=True, capture_output=True)  # nosec B603 B607
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    finally:
+        list_path.unlink(missing_ok=True)
+    return True
+
+
+def _concatenate_with_ffmpeg(paths: list[Path], output_path: Path) -> Optional[list[float]]:
+    """
+    Join Opus files into one WebM with ffmpeg's concat demuxer, without re-encoding.
+
+    Only used when every input is Opus with the same channel count, since the
+    concat demuxer can only stream-copy inputs with matching codec parameters.
+
+    Args:
+        paths: Input files in order
+        output_path: Where to write the joined file
+
+    Returns:
+        Duration in ms of each input, or None if the inputs don't qualify or
+        ffmpeg fails (the caller should fall back to re-encoding)
+    """
+    probes = [_probe_audio(path) for path in paths]
+    if any(probe is None for probe in probes):
+        return None
+    formats = {(probe[0], probe[1]) for probe in probes if probe is not None}
+    if len(formats) != 1 or next(iter(formats))[0] != "opus":
+        return None
+
+    if not _concat_copy(paths, output_path):
+        return None
+    return [probe[2] for probe in probes if probe is not None]
+
+
+def _concatenate_with_pydub(
+    voice_reference_files: list[tuple[dict[str, Any], Path]],
+    clip_path: Path,
+    output_path: Path,
+) -> tuple[list[float], float]:
+    """
+    Decode, join and re-encode the inputs with pydub.
+
+    Returns:
+        Tuple of (end offset in ms of each voice reference, total duration in ms)
+    """
+    # Decode and join the voice references
+    combined, end_offsets = _join_segments(
+        [AudioSegment.from_file(str(ref_path)) for _, ref_path in voice_reference_files]
+    )
+
+    # Add the clip to analyze
+    combined += AudioSegment.from_file(str(clip_path))
+
+    # Export the concatenated audio
+    # Use webm format with opus codec to match input format
+    combined.export(str(output_path), format="webm", codec="libopus")
+
+    return [float(end_ms) for end_ms in end_offsets], float(len(combined))
+
+
 def concatenate_audio_files(
     voice_reference_files: list[tuple[dict[str, Any], Path]],
     clip_path: Path,
@@ -50,57 +257,59 @@ def concatenate_audio_files(
     1. All voice reference files in sequence
     2. The clip to analyze at the end
 
+    When all inputs are Opus, they are stream-copied with ffmpeg's concat
+    demuxer. Otherwise (or if ffmpeg/ffprobe are unavailable) they are decoded
+    with pydub and re-encoded.
+
     Args:
         voice_reference_files: List of (traveler_dict, file_path) tuples
         clip_path: Path to the audio clip to analyze
-        output_dir: Optional directory for output file (uses temp dir if not specified)
+        output_dir: Optional directory for output file (uses a temp file if not
+            specified, deleted when the result is garbage collected)
 
     Returns:
         ConcatenatedAudio with the concatenated file path and timing information
     """
-    # Start with an empty audio segment
-    combined = AudioSegment.empty()
-
-    # Track timing information for voice references
-    voice_segments: list[tuple[dict[str, Any], float, float]] = []
-
-    # Add each voice reference file
-    for traveler, ref_path in voice_reference_files:
-        start_ms = len(combined)
-        segment = AudioSegment.from_file(str(ref_path))
-        combined += segment
-        end_ms = len(combined)
-        voice_segments.append((traveler, start_ms, end_ms))
-
-    # Record where the clip starts
-    clip_start_ms = len(combined)
-
-    # Add the clip to analyze
-    clip_segment = AudioSegment.from_file(str(clip_path))
-    combined += clip_segment
-
-    clip_end_ms = len(combined)
-
     # Determine output path
     if output_dir:
         output_path = output_dir / "concatenated_audio.webm"
     else:
-        # Use a temp file
-        temp_file = tempfile.NamedTemporaryFile(suffix=".webm", delete=False)
-        output_path = Path(temp_file.name)
-        temp_file.close()
+        output_path = _make_temp_file(".webm")
 
-    # Export the concatenated audio
-    # Use webm format with opus codec to match input format
-    combined.export(str(output_path), format="webm", codec="libopus")
+    # Fast path: stream-copy matching Opus inputs without decoding
+    input_paths = [ref_path for _, ref_path in voice_reference_files] + [clip_path]
+    durations = _concatenate_with_ffmpeg(input_paths, output_path)
+    if durations is not None:
+        end_offsets: list[float] = []
+        total_ms = 0.0
+        for duration_ms in durations:
+            total_ms += duration_ms
+            end_offsets.append(total_ms)
+        clip_end_ms = end_offsets.pop()
+    else:
+        end_offsets, clip_end_ms = _concatenate_with_pydub(
+            voice_reference_files, clip_path, output_path
+        )
+
+    # Track timing information for voice references
+    voice_segments: list[tuple[dict[str, Any], float, float]] = []
+    start_ms = 0.0
+    for (traveler, _), end_ms in zip(voice_reference_files, end_offsets):
+        voice_segments.append((traveler, start_ms, end_ms))
+        start_ms = end_ms
 
-    return ConcatenatedAudio(
+    concatenated = ConcatenatedAudio(
         file_path=output_path,
         voice_reference_segments=voice_segments,
-        clip_start_ms=clip_start_ms,
+        clip_start_ms=start_ms,
         clip_end_ms=clip_end_ms,
-        total_duration_ms=len(combined),
+        total_duration_ms=clip_end_ms,
     )
+    if not output_dir:
+        # Delete the temp file once the result is no longer referenced, in case
+        # cleanup_concatenated_audio is never reached
+        weakref.finalize(concatenated, output_path.unlink, missing_ok=True)
+    return concatenated
 
 
 def cleanup_concatenated_audio(concatenated: ConcatenatedAudio) -> None:
@@ -110,5 +319,55 @@ def cleanup_concatenated_audio(concatenated: ConcatenatedAudio) -> None:
     Args:
         concatenated: The ConcatenatedAudio object to clean up
     """
-    if concatenated.file_path.exists():
-        concatenated.file_path.unlink()
+    concatenated.file_path.unlink(missing_ok=True)
+
+
+def compress_for_upload(path: Path) -> Optional[Path]:
+    """
+    Re-encode a large audio file as low-bitrate mono Opus for upload.
+
+    Browser recordings are often 128-192 kbps Opus, while 24 kbps mono is
+    plenty for speech and scene analysis. Only runs when AUDIO_COMPRESS=1 and
+    the file is larger than COMPRESS_THRESHOLD_MB.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Path to a compressed temp file (caller must delete it), or None if the
+        original file should be uploaded as-is
+    """
+    if os.getenv(AUDIO_COMPRESS_ENV_VAR) != "1":
+        return None
+    if path.stat().st_size <= COMPRESS_THRESHOLD_MB * 1024 * 1024:
+        return None
+
+    output_path = _make_temp_file(".webm")
+
+    command = [
+        "ffmpeg",
+        "-y",
+        "-loglevel",
+        "error",
+        "-i",
+        str(path),
+        "-vn",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        COMPRESS_BITRATE,
+        "-ac",
+        "1",
+        "-application",
+        "voip",
+        str(output_path),
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)  # nosec B603 B607
+    except (OSError, subprocess.CalledProcessError):
+        # Quietly upload the original: this can run on a worker thread, and
+        # compression is only an optimization
+        output_path.unlink(missing_ok=True)
+        return None
+
+    return output_path
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Travel Chronicle - LLM Response Cache
+#
+# Stores LLM responses on disk keyed by SHA-256 of (model, prompt), so
+# identical prompts (e.g. story beat summaries on re-runs) skip the API call.
+#
+# Disable with LLM_CACHE_DISABLED=1
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from utils import dumps_json_bytes, loads_json
+
+# Constants
+LLM_CACHE_DISABLED_ENV_VAR = "LLM_CACHE_DISABLED"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "travel-chronicle" / "llm_cache"
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
+
+
+def is_llm_cache_disabled() -> bool:
+    """Return True if the cache is switched off via LLM_CACHE_DISABLED=1."""
+    return os.getenv(LLM_CACHE_DISABLED_ENV_VAR) == "1"
+
+
+def make_key(model: str, prompt: str) -> str:
+    """
+    Build a cache key for a model/prompt pair.
+
+    Args:
+        model: Model name the prompt is sent to
+        prompt: Full prompt text
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    """Get the on-disk path for a cache key (sharded by the first two hex chars)."""
+    return DEFAULT_CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def get(key: str) -> Optional[Any]:
+    """
+    Look up a cached value.
+
+    Args:
+        key: Cache key from make_key()
+
+    Returns:
+        The cached value, or None if missing, expired, unreadable, or disabled
+    """
+    if is_llm_cache_disabled():
+        return None
+
+    entry_path = _entry_path(key)
+    try:
+        entry = loads_json(entry_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get("expires", 0) <= time.time():
+        return None
+    return entry.get("value")
+
+
+def put(key: str, value: Any, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+    """
+    Store a value in the cache, on a best-effort basis.
+
+    Like utils.write_json_atomic, the entry is written next to its final path
+    and renamed into place, so a reader never sees a truncated entry. The
+    temp name is unique to the thread, so concurrent writers of the same key
+    don't collide. A failed write (read-only directory, full disk) only
+    prints a warning.
+
+    Args:
+        key: Cache key from make_key()
+        value: JSON-serializable value to store
+        ttl: Time to live in seconds
+    """
+    if is_llm_cache_disabled():
+        return
+
+    entry_path = _entry_path(key)
+    tmp_path = entry_path.with_name(f".{entry_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_bytes(dumps_json_bytes({"value": value, "expires": time.time() + ttl}))
+        os.replace(tmp_path, entry_path)
+    except OSError as e:
+        tmp_path.unlink(missing_ok=True)
+        print(f"Warning: Failed to write LLM cache entry: {e}")
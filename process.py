@@ -7,22 +7,51 @@
 
 import argparse
 import os
+import re
 import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Any, Optional
 
 from dotenv import load_dotenv
 
-from analyze import analyze_audio, summarize_story_beat
-from transcribe import transcribe_with_diarization, transcribe_without_diarization
-from utils import extract_zip, load_metadata, save_metadata
+from analyze import (
+    analyze_audio,
+    analyze_audio_batch,
+    format_traveler,
+    is_current_analysis,
+    summarize_story_beats_batch,
+)
+from transcribe import (
+    load_voice_reference_data_urls,
+    transcribe_with_diarization,
+    transcribe_without_diarization,
+)
+from utils import (
+    PathLike,
+    extract_zip,
+    load_metadata,
+    prefetch_file,
+    save_metadata,
+    write_json_atomic,
+)
 
 # Constants
 DEFAULT_OUTPUT_BASE = "./output"
 VOICE_REFERENCE_FILENAME = "voice_reference.webm"
 VOICE_REFERENCES_FOLDER = "voice_references"
+CONCURRENCY_ENV_VAR = "TC_CONCURRENCY"
+DEFAULT_MAX_WORKERS = 1  # Concurrency is opt-in, so free-tier quotas aren't hit by default
+PREFETCH_DEPTH = 4  # Clips whose files are queued for reading ahead when processing serially
+WEBM_MAGIC = b"\x1a\x45\xdf\xa3"  # EBML header every WebM file starts with
+ENRICHED_METADATA_FILENAME = "enriched_metadata.json"
+OUTPUT_TIMESTAMP_PATTERN = r"\d{4}-\d{2}-\d{2}_\d{6}"  # Suffix added by generate_output_dir
+CHECKPOINT_INTERVAL = 25  # Clips between saves of the partial results
 
 
 def generate_output_dir(zip_path: str, base_dir: str = DEFAULT_OUTPUT_BASE) -> str:
@@ -48,6 +77,52 @@ def generate_output_dir(zip_path: str, base_dir: str = DEFAULT_OUTPUT_BASE) -> s
     return str(output_dir)
 
 
+def find_previous_results(zip_path: str, base_dir: str = DEFAULT_OUTPUT_BASE) -> Optional[Path]:
+    """
+    Find the enriched metadata saved by the most recent earlier run on this ZIP.
+
+    Args:
+        zip_path: Path to the input ZIP file
+        base_dir: Base output directory
+
+    Returns:
+        Path to the newest enriched_metadata.json, or None if there is none
+    """
+    base_path = Path(base_dir)
+    if not base_path.is_dir():
+        return None
+
+    run_name = re.compile(re.escape(Path(zip_path).stem) + "_" + OUTPUT_TIMESTAMP_PATTERN)
+    # Timestamps sort chronologically as strings, so the newest run sorts last
+    for run_dir in sorted(base_path.iterdir(), key=lambda path: path.name, reverse=True):
+        results_path = run_dir / ENRICHED_METADATA_FILENAME
+        if run_name.fullmatch(run_dir.name) and results_path.is_file():
+            return results_path
+    return None
+
+
+def load_previous_analyses(
+    results_path: Path,
+) -> dict[tuple[str, Optional[str]], dict[str, Any]]:
+    """
+    Load the clip analyses from an earlier run's enriched metadata.
+
+    Args:
+        results_path: Path to an enriched_metadata.json file
+
+    Returns:
+        Dictionary mapping (filename, recordedAt) to the clip's analysis;
+        clips whose analysis or transcription failed are left out so they
+        are retried
+    """
+    previous = load_metadata(results_path)
+    return {
+        (clip["filename"], clip.get("recordedAt")): clip["analysis"]
+        for clip in previous.get("clips", [])
+        if clip.get("filename") and clip.get("analysis") and not clip.get("transcriptionError")
+    }
+
+
 @dataclass
 class ApiKeys:
     """API keys for the pipeline."""
@@ -64,16 +139,66 @@ class VoiceReference:
     file_path: Path
 
 
+@dataclass
+class PreparedClip:
+    """A clip with its context and audio path resolved, ready for the API calls."""
+
+    clip: dict[str, Any]
+    context: dict[str, Any] = field(default_factory=dict)
+    audio_path: Optional[Path] = None
+    error: Optional[Exception] = None
+    previous_analysis: Optional[dict[str, Any]] = None
+
+    @property
+    def needs_analysis(self) -> bool:
+        """True if the clip prepared cleanly and there is no earlier result to reuse."""
+        return self.error is None and self.previous_analysis is None
+
+
+class RateLimiter:
+    """Token bucket that spaces out API requests across threads."""
+
+    def __init__(self, requests_per_second: float, burst: int = 1) -> None:
+        """
+        Args:
+            requests_per_second: Sustained number of requests allowed per second
+            burst: Number of requests that may start at once after an idle period
+        """
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        self.requests_per_second = requests_per_second
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may start."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.requests_per_second)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.requests_per_second
+            time.sleep(wait)
+
+
 @dataclass
 class ProcessingStats:
     """Statistics collected during clip processing."""
 
     processed_count: int = 0
     error_count: int = 0
-    audio_type_counts: dict[str, int] = field(default_factory=dict)
+    audio_type_counts: Counter[str] = field(default_factory=Counter)
     total_utterances: int = 0
     total_audio_events: int = 0
     clips_with_story_beats: int = 0
+    reused_count: int = 0
+    transcription_error_count: int = 0
 
 
 def build_story_beats_lookup(metadata: dict[str, Any]) -> dict[str, dict[str, Any]]:
@@ -90,6 +215,19 @@ def build_story_beats_lookup(metadata: dict[str, Any]) -> dict[str, dict[str, An
     return {beat["id"]: beat for beat in story_beats if "id" in beat}
 
 
+def count_starred_story_beats(story_beats_lookup: dict[str, dict[str, Any]]) -> int:
+    """
+    Count the starred story beats.
+
+    Args:
+        story_beats_lookup: Dictionary mapping story beat IDs to their full data
+
+    Returns:
+        Number of story beats marked as starred
+    """
+    return sum(1 for beat in story_beats_lookup.values() if beat.get("starred"))
+
+
 def summarize_story_beats(
     story_beats_lookup: dict[str, dict[str, Any]], api_key: str
 ) -> dict[str, str]:
@@ -110,17 +248,12 @@ def summarize_story_beats(
     print("SUMMARIZING STORY BEATS")
     print("=" * 60)
 
-    summaries: dict[str, str] = {}
-    total = len(story_beats_lookup)
-
-    for idx, (beat_id, beat) in enumerate(story_beats_lookup.items(), 1):
-        text = beat.get("text", "")
-        if not text:
-            continue
-
-        print(f"Summarizing story beat {idx}/{total}...")
-        summary = summarize_story_beat(text, api_key)
-        summaries[beat_id] = summary
+    stories = {
+        beat_id: beat["text"] for beat_id, beat in story_beats_lookup.items() if beat.get("text")
+    }
+    print(f"Summarizing {len(stories)} story beats...")
+    summaries = summarize_story_beats_batch(stories, api_key)
+    for summary in summaries.values():
         print(f"  → {summary[:80]}{'...' if len(summary) > 80 else ''}")
 
     print(f"\n{len(summaries)} story beats summarized")
@@ -143,6 +276,44 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Show what would be processed without calling Gemini API",
     )
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help=f"Process one clip at a time even if {CONCURRENCY_ENV_VAR} is set",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        metavar="N",
+        help=f"Number of clips to send to the APIs at once (default: {CONCURRENCY_ENV_VAR} or "
+        f"{DEFAULT_MAX_WORKERS}); pair with --rps to stay under the API rate limits",
+    )
+    parser.add_argument(
+        "--rps",
+        type=float,
+        metavar="R",
+        help="Start Gemini analysis for at most R clips (or batches) per second (default: no limit)",
+    )
+    parser.add_argument(
+        "--reuse-uploads",
+        action="store_true",
+        help="Reuse Gemini uploads of identical audio from earlier runs (same as GEMINI_FILE_CACHE=1)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Analyze N clips per Gemini request (default: 1, one request per clip)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Reuse analyses from the last run on this ZIP that used the same model, "
+            "prompt and clip context"
+        ),
+    )
     return parser.parse_args()
 
 
@@ -233,6 +404,34 @@ def load_voice_references(
     return voice_references
 
 
+def encode_voice_references_in_background(
+    voice_references: list[VoiceReference],
+) -> Optional[Future[list[str]]]:
+    """
+    Start encoding the voice references for OpenAI on a background thread.
+
+    The encodings are cached by the transcribe module, so once the returned
+    future completes the first clip's transcription doesn't wait for them.
+
+    Args:
+        voice_references: List of voice references for speaker identification
+
+    Returns:
+        Future for the data URLs, or None if there are no voice references
+    """
+    if not voice_references:
+        return None
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        return executor.submit(
+            load_voice_reference_data_urls, [vr.file_path for vr in voice_references]
+        )
+    finally:
+        # Lets the worker exit once the encoding is done
+        executor.shutdown(wait=False)
+
+
 def print_voice_reference_summary(
     travelers: list[dict[str, Any]], voice_references: list[VoiceReference]
 ) -> None:
@@ -243,17 +442,15 @@ def print_voice_reference_summary(
         travelers: List of all travelers
         voice_references: List of loaded voice references
     """
-    from analyze import format_traveler
-
     if not travelers:
         print("\nNo travelers defined")
         return
 
     voice_ref_names = [format_traveler(vr.traveler) for vr in voice_references]
-    missing_travelers = [
-        t for t in travelers if not any(vr.traveler == t for vr in voice_references)
+    names_with_reference = {vr.traveler.get("name") for vr in voice_references}
+    missing_names = [
+        format_traveler(t) for t in travelers if t.get("name") not in names_with_reference
     ]
-    missing_names = [format_traveler(t) for t in missing_travelers]
 
     if voice_references:
         names_str = ", ".join(voice_ref_names)
@@ -269,11 +466,11 @@ def print_voice_reference_summary(
 
 def print_header(dry_run: bool) -> None:
     """Print the pipeline header."""
-    print("=" * 60)
-    print("TRAVEL CHRONICLE PROCESSING PIPELINE")
+    lines = ["=" * 60, "TRAVEL CHRONICLE PROCESSING PIPELINE"]
     if dry_run:
-        print("(DRY RUN MODE - No API calls will be made)")
-    print("=" * 60)
+        lines.append("(DRY RUN MODE - No API calls will be made)")
+    lines.append("=" * 60)
+    print("\n".join(lines))
 
 
 def print_trip_summary(
@@ -285,46 +482,42 @@ def print_trip_summary(
     Returns:
         Tuple of (trip_data, clips, travelers, story_beats_lookup)
     """
-    print("\n" + "=" * 60)
-    print("TRIP SUMMARY")
-    print("=" * 60)
+    # Lines are collected and printed in a single write
+    lines = ["\n" + "=" * 60, "TRIP SUMMARY", "=" * 60]
 
     # Handle both old and new metadata structures
     trip_data = metadata.get("trip", {})
     trip_name = trip_data.get("name") or metadata.get("tripName", "Unknown")
-    print(f"Trip Name: {trip_name}")
+    lines.append(f"Trip Name: {trip_name}")
 
     # Get trip ID and export date if available
     if trip_data.get("id"):
-        print(f"Trip ID: {trip_data['id']}")
+        lines.append(f"Trip ID: {trip_data['id']}")
     if trip_data.get("exportedAt"):
-        print(f"Exported At: {trip_data['exportedAt']}")
+        lines.append(f"Exported At: {trip_data['exportedAt']}")
 
     clips = metadata.get("clips", [])
-    print(f"Number of Clips: {len(clips)}")
+    lines.append(f"Number of Clips: {len(clips)}")
 
     # Build story beats lookup and print summary
     story_beats_lookup = build_story_beats_lookup(metadata)
     if story_beats_lookup:
-        story_beats = list(story_beats_lookup.values())
-        starred_count = sum(1 for beat in story_beats if beat.get("starred"))
+        starred_count = count_starred_story_beats(story_beats_lookup)
         clips_with_beats = sum(1 for clip in clips if clip.get("storyBeatId"))
-        print(f"Story Beats: {len(story_beats)} ({starred_count} starred)")
-        print(f"Clips with Story Beats: {clips_with_beats}")
+        lines.append(f"Story Beats: {len(story_beats_lookup)} ({starred_count} starred)")
+        lines.append(f"Clips with Story Beats: {clips_with_beats}")
 
     # List travelers (check both 'talent' and 'travelers')
     travelers = trip_data.get("talent") or metadata.get("travelers", [])
     if travelers:
-        print("\nTalent/Travelers:")
+        lines.append("\nTalent/Travelers:")
         for traveler in travelers:
-            if "age" in traveler:
-                print(f"  - {traveler['name']} (age {traveler['age']})")
-            else:
-                print(f"  - {traveler['name']}")
+            lines.append(f"  - {format_traveler(traveler)}")
     else:
-        print("\nTalent/Travelers: None specified")
+        lines.append("\nTalent/Travelers: None specified")
 
-    print("=" * 60)
+    lines.append("=" * 60)
+    print("\n".join(lines))
 
     return trip_data, clips, travelers, story_beats_lookup
 
@@ -347,38 +540,266 @@ def build_clip_context(
     Returns:
         Context dictionary for audio analysis
     """
-    context: dict[str, Any] = {"travelers": travelers if travelers else []}
+    context, _ = build_clip_context_with_story_beat(
+        clip, travelers, story_beats_lookup, story_beat_summaries
+    )
+    return context
+
+
+def build_clip_context_with_story_beat(
+    clip: dict[str, Any],
+    travelers: list[dict[str, Any]],
+    story_beats_lookup: Optional[dict[str, dict[str, Any]]] = None,
+    story_beat_summaries: Optional[dict[str, str]] = None,
+) -> tuple[dict[str, Any], Optional[dict[str, Any]]]:
+    """
+    Build context dictionary for a clip, also returning the story beat it resolved.
+
+    Lets callers that need the story beat too (e.g. to enrich the clip) reuse
+    this lookup instead of repeating it.
+
+    Args:
+        clip: Clip metadata
+        travelers: List of traveler information
+        story_beats_lookup: Optional dictionary mapping story beat IDs to their data
+        story_beat_summaries: Optional dictionary mapping story beat IDs to summaries
+
+    Returns:
+        Tuple of (context dictionary, story beat from story_beats_lookup or None)
+    """
+    get = clip.get
+    context: dict[str, Any] = {"travelers": travelers or []}
+    story_beat: Optional[dict[str, Any]] = None
 
     # Add location if available (handle None gracefully)
-    location = clip.get("location")
+    location = get("location")
     if location and isinstance(location, dict):
         place_name = location.get("placeName")
         if place_name:
             context["location"] = place_name
 
     # Add story beat context - check new format (storyBeatId) first, then legacy (storyBeatContext)
-    story_beat_id = clip.get("storyBeatId")
+    story_beat_id = get("storyBeatId")
     if story_beat_id and story_beats_lookup:
         story_beat = story_beats_lookup.get(story_beat_id)
         if story_beat:
             # Use summary if available, otherwise use full text
-            if story_beat_summaries and story_beat_id in story_beat_summaries:
-                context["storyBeatContext"] = story_beat_summaries[story_beat_id]
-            elif story_beat.get("text"):
-                context["storyBeatContext"] = story_beat["text"]
+            summary = story_beat_summaries.get(story_beat_id) if story_beat_summaries else None
+            if summary is not None:
+                context["storyBeatContext"] = summary
+            else:
+                text = story_beat.get("text")
+                if text:
+                    context["storyBeatContext"] = text
             # Include starred status
             if story_beat.get("starred"):
                 context["storyBeatStarred"] = True
-    elif clip.get("storyBeatContext"):
+    else:
         # Legacy format: inline storyBeatContext
-        context["storyBeatContext"] = clip["storyBeatContext"]
+        inline_context = get("storyBeatContext")
+        if inline_context:
+            context["storyBeatContext"] = inline_context
 
     # Add recorded timestamp if available
-    recorded_at = clip.get("recordedAt")
+    recorded_at = get("recordedAt")
     if recorded_at:
         context["recordedAt"] = recorded_at
 
-    return context
+    return context, story_beat
+
+
+def fetch_clip_results(
+    audio_path: Path,
+    context: dict[str, Any],
+    api_keys: ApiKeys,
+    voice_references: list[VoiceReference],
+    reuse_uploads: Optional[bool] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """
+    Call OpenAI and Gemini for a single clip.
+
+    Prints nothing, and neither do the analyze and transcribe functions it
+    calls, so it can run in a worker thread without interleaving with the
+    main thread's per-clip report.
+
+    Args:
+        audio_path: Path to audio file
+        context: Context dictionary
+        api_keys: API keys for both services
+        voice_references: List of voice references for speaker identification
+        reuse_uploads: Reuse previous Gemini uploads of identical audio
+            (defaults to GEMINI_FILE_CACHE=1)
+        rate_limiter: Limits how often a clip's (or batch's) Gemini analysis
+            starts (no limit if None)
+
+    Returns:
+        Tuple of (transcription result, analysis result)
+    """
+    # Transcribe with OpenAI (speaker diarization) on a second thread while
+    # Gemini analyzes the clip here, so a clip takes as long as the slower
+    # call rather than both
+    with ThreadPoolExecutor(max_workers=1) as transcriber:
+        transcription_future = transcriber.submit(
+            transcribe_clip_or_error, audio_path, api_keys, voice_references
+        )
+
+        # Analyze with Gemini (audioType, audioEvents, sceneDescription, emotionalTone)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            analysis_result = analyze_audio(
+                str(audio_path),
+                api_keys.gemini,
+                context=context,
+                reuse_uploads=reuse_uploads,
+            )
+        except Exception as e:
+            # Recorded like a parse failure so the transcript is still kept
+            analysis_result = {"error": str(e)}
+
+        return transcription_future.result(), analysis_result
+
+
+def transcribe_clip(
+    audio_path: Path, api_keys: ApiKeys, voice_references: list[VoiceReference]
+) -> dict[str, Any]:
+    """
+    Transcribe a clip with OpenAI, identifying speakers when voice references exist.
+
+    Args:
+        audio_path: Path to audio file
+        api_keys: API keys for both services
+        voice_references: List of voice references for speaker identification
+
+    Returns:
+        Transcription result
+    """
+    voice_ref_tuples = [(vr.traveler, vr.file_path) for vr in voice_references]
+
+    if voice_ref_tuples:
+        return transcribe_with_diarization(
+            audio_path,
+            voice_ref_tuples,
+            api_keys.openai,
+        )
+    return transcribe_without_diarization(
+        audio_path,
+        api_keys.openai,
+    )
+
+
+def transcribe_clip_or_error(
+    audio_path: Path, api_keys: ApiKeys, voice_references: list[VoiceReference]
+) -> dict[str, Any]:
+    """
+    Transcribe a clip like transcribe_clip(), reporting a failure instead of raising.
+
+    Lets a clip keep its Gemini analysis when only the transcription fails.
+
+    Args:
+        audio_path: Path to audio file
+        api_keys: API keys for both services
+        voice_references: List of voice references for speaker identification
+
+    Returns:
+        Transcription result, or {"transcript": [], "error": message} on failure
+    """
+    try:
+        return transcribe_clip(audio_path, api_keys, voice_references)
+    except Exception as e:
+        return {"transcript": [], "error": str(e)}
+
+
+def fetch_batch_results(
+    audio_paths: list[Path],
+    contexts: list[dict[str, Any]],
+    api_keys: ApiKeys,
+    voice_references: list[VoiceReference],
+    reuse_uploads: Optional[bool] = None,
+    rate_limiter: Optional[RateLimiter] = None,
+) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+    """
+    Call OpenAI for each clip and Gemini once for the whole batch.
+
+    Like fetch_clip_results, safe to run in a worker thread.
+
+    Args:
+        audio_paths: Paths to the audio files
+        contexts: Context dictionary for each clip (same order as audio_paths)
+        api_keys: API keys for both services
+        voice_references: List of voice references for speaker identification
+        reuse_uploads: Reuse previous Gemini uploads of identical audio
+            (defaults to GEMINI_FILE_CACHE=1)
+        rate_limiter: Limits how often a clip's (or batch's) Gemini analysis
+            starts (no limit if None)
+
+    Returns:
+        (transcription result, analysis result) for each clip, in input order
+    """
+    # The clips are transcribed one after another on a second thread while
+    # Gemini analyzes the batch
+    with ThreadPoolExecutor(max_workers=1) as transcriber:
+        transcription_results = transcriber.map(
+            lambda audio_path: transcribe_clip_or_error(audio_path, api_keys, voice_references),
+            audio_paths,
+        )
+
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            analysis_results = analyze_audio_batch(
+                [str(audio_path) for audio_path in audio_paths],
+                api_keys.gemini,
+                contexts=list(contexts),
+                reuse_uploads=reuse_uploads,
+            )
+        except Exception as e:
+            # Recorded on every clip like a parse failure so the transcripts are still kept
+            analysis_results = [{"error": str(e)}] * len(audio_paths)
+
+        return list(zip(transcription_results, analysis_results))
+
+
+def _batch_item_future(
+    batch_future: Future[list[tuple[dict[str, Any], dict[str, Any]]]], position: int
+) -> Future[tuple[dict[str, Any], dict[str, Any]]]:
+    """Get a future for one clip's results that resolves when its batch does."""
+    item_future: Future[tuple[dict[str, Any], dict[str, Any]]] = Future()
+
+    def copy_outcome(done: Future[list[tuple[dict[str, Any], dict[str, Any]]]]) -> None:
+        if done.cancelled():
+            item_future.cancel()
+        elif done.exception() is not None:
+            item_future.set_exception(done.exception())
+        else:
+            item_future.set_result(done.result()[position])
+
+    batch_future.add_done_callback(copy_outcome)
+    return item_future
+
+
+def reuse_previous_analysis(
+    clip: dict[str, Any], analysis: dict[str, Any], stats: ProcessingStats
+) -> None:
+    """
+    Record a clip's analysis from an earlier run instead of calling the APIs.
+
+    Args:
+        clip: Clip metadata (modified in place)
+        analysis: The clip's analysis from the earlier run
+        stats: Statistics object (modified in place)
+    """
+    clip["analysis"] = analysis
+    audio_type = analysis.get("audioType") or "unknown"
+
+    stats.audio_type_counts[audio_type] += 1
+    stats.total_utterances += len(analysis.get("transcript") or [])
+    stats.total_audio_events += len(analysis.get("audioEvents") or [])
+    stats.processed_count += 1
+    stats.reused_count += 1
+
+    print(f"  ↺ {audio_type}, reused from previous run")
 
 
 def process_single_clip(
@@ -389,6 +810,9 @@ def process_single_clip(
     voice_references: list[VoiceReference],
     verbose: bool,
     stats: ProcessingStats,
+    pending_results: Optional[Future[tuple[dict[str, Any], dict[str, Any]]]] = None,
+    reuse_uploads: Optional[bool] = None,
+    rate_limiter: Optional[RateLimiter] = None,
 ) -> None:
     """
     Process a single audio clip using hybrid approach.
@@ -404,68 +828,73 @@ def process_single_clip(
         voice_references: List of voice references for speaker identification
         verbose: Whether to show verbose output
         stats: Statistics object (modified in place)
+        pending_results: Future already running fetch_clip_results for this
+            clip in a worker thread (the API calls are made here if None)
+        reuse_uploads: Reuse previous Gemini uploads of identical audio
+            (defaults to GEMINI_FILE_CACHE=1)
+        rate_limiter: Limits how often a clip's (or batch's) Gemini analysis
+            starts (no limit if None)
     """
     try:
-        # Step 1: Transcribe with OpenAI (speaker diarization)
-        voice_ref_tuples = [(vr.traveler, vr.file_path) for vr in voice_references]
-
-        if voice_ref_tuples:
-            transcription_result = transcribe_with_diarization(
-                audio_path,
-                voice_ref_tuples,
-                api_keys.openai,
-            )
+        if pending_results is not None:
+            transcription_result, analysis_result = pending_results.result()
         else:
-            transcription_result = transcribe_without_diarization(
-                audio_path,
-                api_keys.openai,
+            transcription_result, analysis_result = fetch_clip_results(
+                audio_path, context, api_keys, voice_references, reuse_uploads, rate_limiter
             )
 
         transcript = transcription_result.get("transcript", [])
 
-        # Step 2: Analyze with Gemini (audioType, audioEvents, sceneDescription, emotionalTone)
-        analysis_result = analyze_audio(
-            str(audio_path),
-            api_keys.gemini,
-            context=context,
-        )
+        # A failed transcription doesn't discard the analysis, and vice versa
+        if "error" in transcription_result:
+            print(f"  ⚠️  Transcription failed: {transcription_result['error']}")
+            clip["transcriptionError"] = transcription_result["error"]
+            stats.transcription_error_count += 1
 
         # Check if analysis succeeded
         if "error" in analysis_result:
-            print(f"  ⚠️  Analysis failed: {analysis_result['error']}")
+            reason = analysis_result["error"]
+            if "error_details" in analysis_result:
+                reason = f"{reason}: {analysis_result['error_details']}"
+            print(f"  ⚠️  Analysis failed: {reason}")
             clip["analysis"] = None
             clip["analysisError"] = analysis_result["error"]
+            if transcript:
+                clip["transcript"] = transcript
             stats.error_count += 1
         else:
             # Merge results from both APIs
+            get = analysis_result.get
             clip["analysis"] = {
-                "audioType": analysis_result.get("audioType"),
+                "audioType": get("audioType"),
                 "transcript": transcript,  # From OpenAI
-                "audioEvents": analysis_result.get("audioEvents"),
-                "sceneDescription": analysis_result.get("sceneDescription"),
-                "emotionalTone": analysis_result.get("emotionalTone"),
+                "audioEvents": get("audioEvents"),
+                "sceneDescription": get("sceneDescription"),
+                "emotionalTone": get("emotionalTone"),
+                "_meta": get("_meta"),
             }
 
             # Update statistics
             utterance_count = len(transcript)
-            event_count = len(analysis_result.get("audioEvents", []))
-            audio_type = analysis_result.get("audioType", "unknown")
+            event_count = len(get("audioEvents", []))
+            audio_type = get("audioType", "unknown")
 
-            stats.audio_type_counts[audio_type] = stats.audio_type_counts.get(audio_type, 0) + 1
+            stats.audio_type_counts[audio_type] += 1
             stats.total_utterances += utterance_count
             stats.total_audio_events += event_count
 
-            # Print brief result
-            print(f"  ✓ {audio_type}, {utterance_count} utterances, {event_count} audio events")
-
-            # Show verbose output if requested
+            # Print brief result, plus the transcript if requested, as a single
+            # write so a long transcript costs one call and stays in one block
+            report = [f"  ✓ {audio_type}, {utterance_count} utterances, {event_count} audio events"]
             if verbose and transcript:
-                print("\n  Transcript:")
+                report.append("\n  Transcript:")
                 for utterance in transcript:
-                    speaker = utterance.get("speaker", "Unknown")
-                    text = utterance.get("text", "")
-                    timestamp = utterance.get("timestamp", "00:00")
-                    print(f"    [{timestamp}] {speaker}: {text}")
+                    field_of = utterance.get
+                    report.append(
+                        f"    [{field_of('timestamp', '00:00')}] "
+                        f"{field_of('speaker', 'Unknown')}: {field_of('text', '')}"
+                    )
+            print("\n".join(report))
 
             stats.processed_count += 1
 
@@ -476,6 +905,130 @@ def process_single_clip(
         stats.error_count += 1
 
 
+def index_clip_files(extracted_folder: PathLike, clips: list[dict[str, Any]]) -> set[str]:
+    """
+    List the files in every folder that clips point into, one directory read per folder.
+
+    Avoids a separate stat() per clip when checking that audio files exist.
+
+    Args:
+        extracted_folder: Path to extracted ZIP contents (str or Path)
+        clips: List of clip metadata
+
+    Returns:
+        Set of existing file paths relative to extracted_folder (e.g. "audio/clip_001.webm")
+    """
+    folders = {PurePosixPath(clip.get("filename", "unknown")).parent for clip in clips}
+
+    extracted_path = Path(extracted_folder)
+    existing_files: set[str] = set()
+    for folder in folders:
+        try:
+            with os.scandir(extracted_path / folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        existing_files.add(str(folder / entry.name))
+        except OSError:
+            # Folder missing - its clips will be reported as not found
+            continue
+
+    return existing_files
+
+
+def prepare_clip(
+    clip: dict[str, Any],
+    extracted_folder: PathLike,
+    travelers: list[dict[str, Any]],
+    story_beats_lookup: dict[str, dict[str, Any]],
+    story_beat_summaries: dict[str, str],
+    existing_files: Optional[set[str]] = None,
+) -> PreparedClip:
+    """
+    Resolve a clip's context, story beat and audio path before any API calls.
+
+    Args:
+        clip: Clip metadata (storyBeat is added in place)
+        extracted_folder: Path to extracted ZIP contents (str or Path)
+        travelers: List of traveler information
+        story_beats_lookup: Dictionary mapping story beat IDs to their data
+        story_beat_summaries: Dictionary mapping story beat IDs to summaries
+        existing_files: Files from index_clip_files() (each path is checked
+            on disk if None)
+
+    Returns:
+        PreparedClip, with error set if the clip cannot be processed
+    """
+    prepared = PreparedClip(clip=clip)
+    try:
+        # Build clip-specific context, resolving the story beat once for both
+        # the context and the enriched output
+        prepared.context, story_beat = build_clip_context_with_story_beat(
+            clip, travelers, story_beats_lookup, story_beat_summaries
+        )
+        if story_beat:
+            clip["storyBeat"] = {
+                "id": clip["storyBeatId"],
+                "text": story_beat.get("text"),
+                "starred": story_beat.get("starred", False),
+            }
+
+        # Build full path to audio file
+        clip_filename = clip.get("filename", "unknown")
+        audio_path = Path(extracted_folder, clip_filename)
+        if existing_files is not None:
+            found = str(PurePosixPath(clip_filename)) in existing_files
+        else:
+            found = audio_path.is_file()
+        if not found:
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        prepared.audio_path = audio_path
+
+    except Exception as e:
+        prepared.error = e
+
+    return prepared
+
+
+def check_audio_header(audio_path: Path) -> None:
+    """
+    Check that an audio file looks readable by reading only its first bytes.
+
+    Args:
+        audio_path: Path to the audio file
+
+    Raises:
+        ValueError: If the file is empty, or is a .webm file without a WebM header
+    """
+    with open(audio_path, "rb") as f:
+        header = f.read(len(WEBM_MAGIC))
+    if not header:
+        raise ValueError(f"Audio file is empty: {audio_path}")
+    if audio_path.suffix.lower() == ".webm" and header != WEBM_MAGIC:
+        raise ValueError(f"Audio file is not a valid WebM file: {audio_path}")
+
+
+def get_max_workers(serial: bool = False, concurrency: Optional[int] = None) -> int:
+    """
+    Get how many clips to send to the APIs at once.
+
+    Args:
+        serial: Process one clip at a time regardless of other settings
+        concurrency: Number of clips from the command line (overrides
+            TC_CONCURRENCY)
+
+    Returns:
+        Number of worker threads (at least 1)
+    """
+    if serial:
+        return 1
+    if concurrency is not None:
+        return max(1, concurrency)
+    try:
+        return max(1, int(os.getenv(CONCURRENCY_ENV_VAR, str(DEFAULT_MAX_WORKERS))))
+    except ValueError:
+        return DEFAULT_MAX_WORKERS
+
+
 def process_clips(
     clips: list[dict[str, Any]],
     extracted_folder: str,
@@ -486,10 +1039,22 @@ def process_clips(
     voice_references: list[VoiceReference],
     verbose: bool,
     dry_run: bool,
+    max_workers: int = 1,
+    reuse_uploads: Optional[bool] = None,
+    batch_size: int = 1,
+    rate_limiter: Optional[RateLimiter] = None,
+    previous_analyses: Optional[dict[tuple[str, Optional[str]], dict[str, Any]]] = None,
+    metadata: Optional[dict[str, Any]] = None,
+    results_path: Optional[Path] = None,
 ) -> ProcessingStats:
     """
     Process all clips using hybrid approach (OpenAI + Gemini).
 
+    With max_workers > 1 the API calls for all clips are started up front in a
+    thread pool; results are still printed and recorded in clip order. With
+    batch_size > 1, clips are sent to Gemini batch_size at a time in a single
+    request each.
+
     Args:
         clips: List of clip metadata
         extracted_folder: Path to extracted ZIP contents
@@ -500,6 +1065,18 @@ def process_clips(
         voice_references: List of voice references for speaker identification
         verbose: Whether to show verbose output
         dry_run: Whether this is a dry run
+        max_workers: Number of clips to send to the APIs at once
+        reuse_uploads: Reuse previous Gemini uploads of identical audio
+            (defaults to GEMINI_FILE_CACHE=1)
+        batch_size: Number of clips to analyze per Gemini request
+        rate_limiter: Limits how often a clip's (or batch's) Gemini analysis
+            starts (no limit if None)
+        previous_analyses: Analyses from an earlier run, keyed by (filename,
+            recordedAt); a clip reuses its analysis instead of calling the APIs
+            if the model, prompt and context it was made with are unchanged
+        metadata: Metadata the clips belong to, saved to results_path every
+            CHECKPOINT_INTERVAL clips so a crash loses little work
+        results_path: Where to save checkpoints (no checkpoints if None)
 
     Returns:
         Processing statistics
@@ -510,72 +1087,185 @@ def process_clips(
 
     stats = ProcessingStats()
 
-    for idx, clip in enumerate(clips, 1):
-        clip_filename = clip.get("filename", "unknown")
-        percentage = int((idx / len(clips)) * 100)
-        print(f"\nProcessing clip {idx}/{len(clips)} ({percentage}%): {clip_filename}")
+    # Format voice reference names once for the dry run output
+    if dry_run:
+        voice_ref_names_str = ", ".join(format_traveler(vr.traveler) for vr in voice_references)
 
-        try:
-            # Build clip-specific context
-            context = build_clip_context(clip, travelers, story_beats_lookup, story_beat_summaries)
-
-            # Track clips with story beats
-            if context.get("storyBeatContext"):
-                stats.clips_with_story_beats += 1
-
-            # Resolve story beat for enriched output
-            story_beat_id = clip.get("storyBeatId")
-            if story_beat_id and story_beats_lookup:
-                story_beat = story_beats_lookup.get(story_beat_id)
-                if story_beat:
-                    clip["storyBeat"] = {
-                        "id": story_beat_id,
-                        "text": story_beat.get("text"),
-                        "starred": story_beat.get("starred", False),
-                    }
-
-            # Build full path to audio file
-            audio_path = Path(extracted_folder) / clip_filename
-            if not audio_path.exists():
-                raise FileNotFoundError(f"Audio file not found: {audio_path}")
-
-            # Dry run mode - show what would be processed
-            if dry_run:
-                from analyze import format_traveler
-
-                print(f"  [DRY RUN] Would analyze: {audio_path}")
-                print(
-                    f"  [DRY RUN] Context: {len(travelers)} travelers, "
-                    f"location: {context.get('location', 'N/A')}"
-                )
-                if context.get("storyBeatContext"):
-                    starred = " (starred)" if context.get("storyBeatStarred") else ""
-                    print(f"  [DRY RUN] Story beat: {context['storyBeatContext'][:50]}...{starred}")
-                if voice_references:
-                    voice_ref_names = [format_traveler(vr.traveler) for vr in voice_references]
-                    print(f"  [DRY RUN] Voice references: {', '.join(voice_ref_names)}")
-                    print("  [DRY RUN] Would use OpenAI for transcription + Gemini for analysis")
-                continue
-
-            # Analyze the audio
-            if api_keys is None:
-                raise ValueError("API keys are required for audio analysis")
-
-            process_single_clip(
-                clip,
-                audio_path,
-                context,
+    # Convert the folder once rather than for every clip
+    extracted_path = Path(extracted_folder)
+    existing_files = index_clip_files(extracted_path, clips)
+    prepared_clips = [
+        prepare_clip(
+            clip,
+            extracted_path,
+            travelers,
+            story_beats_lookup,
+            story_beat_summaries,
+            existing_files,
+        )
+        for clip in clips
+    ]
+    if previous_analyses:
+        for prepared in prepared_clips:
+            clip_key = (prepared.clip.get("filename", ""), prepared.clip.get("recordedAt"))
+            previous_analysis = previous_analyses.get(clip_key)
+            # Redo clips whose story beat, context, prompt or model has changed
+            if previous_analysis is not None and is_current_analysis(
+                previous_analysis, prepared.context
+            ):
+                prepared.previous_analysis = previous_analysis
+
+    # Preflight: find missing and unreadable audio before any API calls, so
+    # only clips that can be processed are scheduled. A bad clip is skipped
+    # with an error entry; the rest of the run carries on
+    for prepared in prepared_clips:
+        if prepared.needs_analysis and prepared.audio_path is not None:
+            try:
+                check_audio_header(prepared.audio_path)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Skipping {prepared.clip.get('filename', 'unknown')}: {e}")
+                prepared.error = e
+    failed_count = sum(
+        1
+        for prepared in prepared_clips
+        if prepared.error is not None and prepared.previous_analysis is None
+    )
+    if failed_count:
+        print(
+            f"Preflight: {failed_count}/{len(clips)} clips can't be processed and will be skipped"
+        )
+
+    # Start the API calls for every clip; the threads release the GIL while
+    # waiting on the network
+    executor: Optional[ThreadPoolExecutor] = None
+    pending: dict[int, Future[tuple[dict[str, Any], dict[str, Any]]]] = {}
+    if api_keys is not None and not dry_run and batch_size > 1:
+        # Batches run in the background even when processing serially, so one
+        # batch's requests are in flight while the previous one is reported
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        ready = [
+            (idx, prepared.audio_path, prepared.context)
+            for idx, prepared in enumerate(prepared_clips)
+            if prepared.needs_analysis and prepared.audio_path is not None
+        ]
+        for start in range(0, len(ready), batch_size):
+            batch = ready[start : start + batch_size]
+            batch_future = executor.submit(
+                fetch_batch_results,
+                [audio_path for _, audio_path, _ in batch],
+                [context for _, _, context in batch],
                 api_keys,
                 voice_references,
-                verbose,
-                stats,
+                reuse_uploads,
+                rate_limiter,
             )
+            for position, (idx, _, _) in enumerate(batch):
+                pending[idx] = _batch_item_future(batch_future, position)
+    elif api_keys is not None and not dry_run and max_workers > 1:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        for idx, prepared in enumerate(prepared_clips):
+            if prepared.needs_analysis and prepared.audio_path is not None:
+                pending[idx] = executor.submit(
+                    fetch_clip_results,
+                    prepared.audio_path,
+                    prepared.context,
+                    api_keys,
+                    voice_references,
+                    reuse_uploads,
+                    rate_limiter,
+                )
 
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
-            clip["analysis"] = None
-            clip["analysisError"] = str(e)
-            stats.error_count += 1
+    # Index of the first clip not yet handed to prefetch_file
+    next_prefetch = 1
+
+    try:
+        for idx, prepared in enumerate(prepared_clips, 1):
+            # Save the results so far every CHECKPOINT_INTERVAL clips
+            done_count = idx - 1
+            if (
+                metadata is not None
+                and results_path is not None
+                and not dry_run
+                and done_count
+                and done_count % CHECKPOINT_INTERVAL == 0
+            ):
+                write_json_atomic(metadata, results_path)
+                print(f"\nCheckpoint: results for {done_count} clips saved")
+
+            clip = prepared.clip
+            context = prepared.context
+            clip_filename = clip.get("filename", "unknown")
+            percentage = int((idx / len(clips)) * 100)
+            print(f"\nProcessing clip {idx}/{len(clips)} ({percentage}%): {clip_filename}")
+
+            try:
+                # Track clips with story beats
+                if context.get("storyBeatContext"):
+                    stats.clips_with_story_beats += 1
+
+                if prepared.previous_analysis is not None:
+                    reuse_previous_analysis(clip, prepared.previous_analysis, stats)
+                    continue
+
+                if prepared.error is not None:
+                    raise prepared.error
+
+                # Dry run mode - show what would be processed
+                if dry_run:
+                    print(f"  [DRY RUN] Would analyze: {prepared.audio_path}")
+                    print(
+                        f"  [DRY RUN] Context: {len(travelers)} travelers, "
+                        f"location: {context.get('location', 'N/A')}"
+                    )
+                    if context.get("storyBeatContext"):
+                        starred = " (starred)" if context.get("storyBeatStarred") else ""
+                        print(
+                            f"  [DRY RUN] Story beat: {context['storyBeatContext'][:50]}...{starred}"
+                        )
+                    if voice_references:
+                        print(f"  [DRY RUN] Voice references: {voice_ref_names_str}")
+                        print(
+                            "  [DRY RUN] Would use OpenAI for transcription + Gemini for analysis"
+                        )
+                    continue
+
+                # Analyze the audio
+                if api_keys is None:
+                    raise ValueError("API keys are required for audio analysis")
+                if prepared.audio_path is None:
+                    raise ValueError("Audio path was not resolved")
+
+                # When processing one clip at a time, keep the next few clips'
+                # reads queued with the kernel while this one waits on the APIs,
+                # so the disk can serve them together
+                if executor is None:
+                    prefetch_end = min(idx + PREFETCH_DEPTH, len(prepared_clips))
+                    for ahead in prepared_clips[max(next_prefetch, idx) : prefetch_end]:
+                        if ahead.needs_analysis and ahead.audio_path is not None:
+                            prefetch_file(ahead.audio_path)
+                    next_prefetch = max(next_prefetch, prefetch_end)
+
+                process_single_clip(
+                    clip,
+                    prepared.audio_path,
+                    context,
+                    api_keys,
+                    voice_references,
+                    verbose,
+                    stats,
+                    pending_results=pending.get(idx - 1),
+                    reuse_uploads=reuse_uploads,
+                    rate_limiter=rate_limiter,
+                )
+
+            except Exception as e:
+                print(f"  ✗ Error: {e}")
+                clip["analysis"] = None
+                clip["analysisError"] = str(e)
+                stats.error_count += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     return stats
 
@@ -587,38 +1277,44 @@ def print_final_summary(
     dry_run: bool,
 ) -> None:
     """Print the final processing summary."""
-    print("\n" + "=" * 60)
-    print("SUMMARY")
-    print("=" * 60)
+    # Lines are collected and printed in a single write
+    lines = ["\n" + "=" * 60, "SUMMARY", "=" * 60]
 
     if dry_run:
-        print(f"Dry run complete! Would process {num_clips} clips")
+        lines.append(f"Dry run complete! Would process {num_clips} clips")
     else:
-        print(f"Done! Processed {stats.processed_count}/{num_clips} clips successfully")
+        lines.append(f"Done! Processed {stats.processed_count}/{num_clips} clips successfully")
+        if stats.reused_count > 0:
+            lines.append(f"Reused: {stats.reused_count} clips analyzed in a previous run")
         if stats.error_count > 0:
-            print(f"Errors: {stats.error_count} clips failed")
+            lines.append(f"Errors: {stats.error_count} clips failed")
+        if stats.transcription_error_count > 0:
+            lines.append(
+                f"Transcription errors: {stats.transcription_error_count} clips "
+                "(saved without a transcript)"
+            )
 
-        # Show audio type breakdown
+        # Show audio type breakdown, most common first
         if stats.audio_type_counts:
-            print("\nAudio Type Breakdown:")
+            lines.append("\nAudio Type Breakdown:")
             type_summary = ", ".join(
-                [f"{count} {atype}" for atype, count in sorted(stats.audio_type_counts.items())]
+                f"{count} {atype}" for atype, count in stats.audio_type_counts.most_common()
             )
-            print(f"  {type_summary}")
+            lines.append(f"  {type_summary}")
 
         # Show story beat stats
         if story_beats_lookup:
-            story_beats = list(story_beats_lookup.values())
-            starred_count = sum(1 for beat in story_beats if beat.get("starred"))
-            print(f"\nStory Beats: {len(story_beats)} ({starred_count} starred)")
-            print(f"  {stats.clips_with_story_beats} clips are reactions to story beats")
+            starred_count = count_starred_story_beats(story_beats_lookup)
+            lines.append(f"\nStory Beats: {len(story_beats_lookup)} ({starred_count} starred)")
+            lines.append(f"  {stats.clips_with_story_beats} clips are reactions to story beats")
 
         # Show totals
-        print("\nTotals:")
-        print(f"  {stats.total_utterances} utterances transcribed")
-        print(f"  {stats.total_audio_events} audio events detected")
+        lines.append("\nTotals:")
+        lines.append(f"  {stats.total_utterances} utterances transcribed")
+        lines.append(f"  {stats.total_audio_events} audio events detected")
 
-    print("=" * 60)
+    lines.append("=" * 60)
+    print("\n".join(lines))
 
 
 def main() -> None:
@@ -663,11 +1359,37 @@ def main() -> None:
         else:
             print("\nNo voice references (speaker ID may be less accurate)")
 
+        # Encode the voice references while story beats are summarized
+        voice_reference_encoding = (
+            None if dry_run else encode_voice_references_in_background(voice_references)
+        )
+
+        # Reuse analyses from the last run on this ZIP if asked to
+        previous_analyses = None
+        if not dry_run and args.resume:
+            previous_results = find_previous_results(zip_path)
+            if previous_results is not None:
+                try:
+                    previous_analyses = load_previous_analyses(previous_results)
+                except (OSError, ValueError) as e:
+                    # A partial or corrupt earlier run just means starting over
+                    print(f"\nWarning: Could not resume from {previous_results}: {e}")
+                else:
+                    print(
+                        f"\nResuming from {previous_results}: "
+                        f"{len(previous_analyses)} clips analyzed there"
+                    )
+
         # Summarize story beats (skip in dry run mode)
         story_beat_summaries: dict[str, str] = {}
         if not dry_run and api_keys and story_beats_lookup:
             story_beat_summaries = summarize_story_beats(story_beats_lookup, api_keys.gemini)
 
+        # Wait for the encodings so clips don't redo them; an error resurfaces
+        # when the first clip is transcribed
+        if voice_reference_encoding is not None:
+            voice_reference_encoding.exception()
+
         # Process all clips using hybrid approach (OpenAI + Gemini)
         stats = process_clips(
             clips,
@@ -679,6 +1401,13 @@ def main() -> None:
             voice_references,
             verbose,
             dry_run,
+            max_workers=get_max_workers(args.serial, args.concurrency),
+            reuse_uploads=True if args.reuse_uploads else None,
+            batch_size=max(1, args.batch_size),
+            rate_limiter=RateLimiter(args.rps) if args.rps and args.rps > 0 else None,
+            previous_analyses=previous_analyses,
+            metadata=metadata,
+            results_path=Path(output_dir) / ENRICHED_METADATA_FILENAME,
         )
 
         # Save enriched metadata
@@ -686,7 +1415,7 @@ def main() -> None:
             print("\n" + "=" * 60)
             print("SAVING RESULTS")
             print("=" * 60)
-            enriched_output_path = Path(output_dir) / "enriched_metadata.json"
+            enriched_output_path = Path(output_dir) / ENRICHED_METADATA_FILENAME
             save_metadata(metadata, enriched_output_path)
 
         # Print final summary
@@ -1,5 +1,6 @@
 # Shared fixtures for Travel Chronicle Pipeline tests
 
+import copy
 import json
 import tempfile
 import zipfile
@@ -13,9 +14,13 @@ import pytest
 WEBM_STUB = b"\x1a\x45\xdf\xa3\xa3\x42\x86\x81\x01\x42\xf7\x81\x01\x42\xf2\x81\x04"
 
 
-@pytest.fixture
-def sample_metadata():
-    """Sample metadata matching Travel Chronicle export format."""
+@pytest.fixture(scope="session")
+def shared_sample_metadata():
+    """
+    Sample metadata matching Travel Chronicle export format.
+
+    Built once per session for session-scoped fixtures; tests use sample_metadata.
+    """
     return {
         "trip": {
             "id": "trip_test123",
@@ -65,8 +70,14 @@ def sample_metadata():
 
 
 @pytest.fixture
-def sample_gemini_response():
-    """Sample Gemini API response for audio analysis (non-transcript fields)."""
+def sample_metadata(shared_sample_metadata):
+    """A copy of the sample metadata that a test is free to modify."""
+    return copy.deepcopy(shared_sample_metadata)
+
+
+@pytest.fixture(scope="session")
+def shared_sample_gemini_response():
+    """Sample Gemini API response for audio analysis, built once per session."""
     return {
         "audioType": "speech",
         "audioEvents": [
@@ -78,6 +89,18 @@ def sample_gemini_response():
     }
 
 
+@pytest.fixture
+def sample_gemini_response(shared_sample_gemini_response):
+    """A copy of the sample Gemini response that a test is free to modify."""
+    return copy.deepcopy(shared_sample_gemini_response)
+
+
+@pytest.fixture(scope="session")
+def sample_gemini_response_json(shared_sample_gemini_response):
+    """The sample Gemini response serialized once, as Gemini's response text."""
+    return json.dumps(shared_sample_gemini_response)
+
+
 @pytest.fixture
 def sample_openai_transcription():
     """Sample OpenAI transcription response."""
@@ -93,6 +116,31 @@ def sample_openai_transcription():
     }
 
 
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(tmp_path, monkeypatch):
+    """Point the LLM response cache at a per-test directory."""
+    import llm_cache
+
+    cache_dir = tmp_path / "llm_cache"
+    monkeypatch.setattr(llm_cache, "DEFAULT_CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def clear_api_clients():
+    """Start each test without cached Gemini or OpenAI clients."""
+    import analyze
+    import transcribe
+
+    analyze._CLIENT_CACHE.clear()
+    analyze._ASYNC_CLIENT_CACHE.clear()
+    transcribe._CLIENT_CACHE.clear()
+    yield
+    analyze._CLIENT_CACHE.clear()
+    analyze._ASYNC_CLIENT_CACHE.clear()
+    transcribe._CLIENT_CACHE.clear()
+
+
 @pytest.fixture
 def temp_dir(tmp_path):
     """Temporary directory for test outputs."""
@@ -103,39 +151,28 @@ def temp_dir(tmp_path):
 def sample_metadata_file(temp_dir, sample_metadata):
     """Creates a temporary metadata.json file."""
     metadata_path = temp_dir / "metadata.json"
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(sample_metadata, f, indent=2, ensure_ascii=False)
+    metadata_path.write_text(json.dumps(sample_metadata, ensure_ascii=False), encoding="utf-8")
     return metadata_path
 
 
-@pytest.fixture
-def sample_zip_file(temp_dir, sample_metadata):
-    """Creates a sample ZIP file with metadata and audio directory structure."""
-    # Create a folder structure to zip
-    extract_dir = temp_dir / "test_export"
-    extract_dir.mkdir()
-
-    # Create metadata.json
-    metadata_path = extract_dir / "metadata.json"
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(sample_metadata, f, indent=2, ensure_ascii=False)
-
-    # Create audio directory with placeholder files
-    audio_dir = extract_dir / "audio"
-    audio_dir.mkdir()
-
-    # Create minimal WebM files (just headers, not real audio)
-    for i in range(1, 3):
-        audio_file = audio_dir / f"clip_{i:03d}.webm"
-        audio_file.write_bytes(WEBM_STUB)
-
-    # Create ZIP file
-    zip_path = temp_dir / "test_export.zip"
-    with zipfile.ZipFile(zip_path, "w") as zipf:
-        for file_path in extract_dir.rglob("*"):
-            if file_path.is_file():
-                arcname = file_path.relative_to(extract_dir.parent)
-                zipf.write(file_path, arcname)
+@pytest.fixture(scope="session")
+def sample_zip_file(tmp_path_factory, shared_sample_metadata):
+    """
+    Creates a sample ZIP file with metadata and audio directory structure.
+
+    The archive is built once per session; tests only read it.
+    """
+    session_dir = tmp_path_factory.mktemp("zip_session")
+
+    # Write metadata.json and minimal WebM files (just headers, not real
+    # audio) straight into the archive; stubs are tiny, so store them as-is
+    zip_path = session_dir / "test_export.zip"
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zipf:
+        zipf.writestr(
+            "test_export/metadata.json", json.dumps(shared_sample_metadata, ensure_ascii=False)
+        )
+        for i in range(1, 3):
+            zipf.writestr(f"test_export/audio/clip_{i:03d}.webm", WEBM_STUB)
 
     return zip_path
 
@@ -168,13 +205,6 @@ def create_test_zip(temp_dir):
         Returns:
             Path to the created ZIP file
         """
-        extract_dir: Path = temp_dir / name
-        extract_dir.mkdir(exist_ok=True)
-
-        # Create metadata.json
-        with open(extract_dir / "metadata.json", "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
-
         # Determine audio files to create
         if audio_files is None:
             # Extract from clips in metadata
@@ -184,24 +214,17 @@ def create_test_zip(temp_dir):
                 if clip.get("filename")
             ]
 
-        # Create audio directory with stub files
-        if audio_files:
-            audio_dir = extract_dir / "audio"
-            audio_dir.mkdir(exist_ok=True)
+        # Write metadata.json and stub files straight into the archive, stored
+        # uncompressed since the stubs are only a few bytes
+        zip_path: Path = temp_dir / f"{name}.zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zipf:
+            zipf.writestr(f"{name}/metadata.json", json.dumps(metadata, ensure_ascii=False))
             for filename in audio_files:
-                (audio_dir / filename).write_bytes(WEBM_STUB)
+                zipf.writestr(f"{name}/audio/{filename}", WEBM_STUB)
 
-        # Create voice reference file if requested
-        if include_voice_reference:
-            (extract_dir / "voice_reference.webm").write_bytes(WEBM_STUB)
-
-        # Create ZIP file
-        zip_path: Path = temp_dir / f"{name}.zip"
-        with zipfile.ZipFile(zip_path, "w") as zipf:
-            for file_path in extract_dir.rglob("*"):
-                if file_path.is_file():
-                    arcname = file_path.relative_to(extract_dir.parent)
-                    zipf.write(file_path, arcname)
+            # Add voice reference file if requested
+            if include_voice_reference:
+                zipf.writestr(f"{name}/voice_reference.webm", WEBM_STUB)
 
         return zip_path
 
@@ -217,7 +240,7 @@ def webm_stub_file(temp_dir):
 
 
 @pytest.fixture
-def mock_gemini_client(mocker, sample_gemini_response):
+def mock_gemini_client(mocker, sample_gemini_response_json):
     """Mocks the Gemini API client."""
     mock_client = mocker.Mock()
 
@@ -228,9 +251,12 @@ def mock_gemini_client(mocker, sample_gemini_response):
 
     # Mock generate_content response
     mock_response = mocker.Mock()
-    mock_response.text = json.dumps(sample_gemini_response)
+    mock_response.text = sample_gemini_response_json
     mock_client.models.generate_content.return_value = mock_response
 
+    # Async client shares the same response
+    mock_client.aio.models.generate_content = mocker.AsyncMock(return_value=mock_response)
+
     return mock_client
 
 
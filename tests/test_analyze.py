@@ -1,27 +1,43 @@
 # Tests for analyze.py
 
+import asyncio
+import hashlib
 import json
 
+import httpx
 import pytest
-
-from analyze import DEFAULT_MODEL, analyze_audio, extract_json_from_text, format_traveler
+from conftest import WEBM_STUB
+from google.genai import errors
+
+import analyze
+from analyze import (
+    DEFAULT_MODEL,
+    analyze_and_summarize,
+    analyze_audio,
+    analyze_audio_async,
+    analyze_audio_batch,
+    build_analysis_prompt,
+    build_batch_analysis_prompt,
+    extract_json_from_text,
+    format_traveler,
+    is_current_analysis,
+    summarize_story_beat,
+    summarize_story_beat_async,
+    summarize_story_beats_batch,
+)
 
 
 class TestAnalyzeAudio:
     """Tests for analyze_audio function."""
 
     def test_analyze_basic_audio_file(
-        self, temp_dir, mock_genai_module, mock_gemini_client, sample_gemini_response
+        self, webm_stub_file, mock_genai_module, mock_gemini_client, sample_gemini_response
     ):
         """Test basic audio analysis without context.
 
         Note: Transcript is NOT included - it's now handled by OpenAI.
         """
-        # Create a dummy audio file
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")  # Minimal WebM header
-
-        result = analyze_audio(str(audio_path), "fake_api_key")
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
 
         # Verify API was called
         mock_genai_module.Client.assert_called_once_with(api_key="fake_api_key")
@@ -36,16 +52,13 @@ class TestAnalyzeAudio:
         assert "_meta" in result
 
     def test_analyze_with_full_context(
-        self, temp_dir, mock_genai_module, mock_gemini_client, sample_gemini_response
+        self, webm_stub_file, mock_genai_module, mock_gemini_client, sample_gemini_response
     ):
         """Test audio analysis with full context.
 
         Note: Travelers are no longer included in the Gemini prompt since
         speaker identification is now handled by OpenAI's gpt-4o-transcribe-diarize.
         """
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
         context = {
             "travelers": [
                 {"name": "Alice", "age": 9},
@@ -57,7 +70,7 @@ class TestAnalyzeAudio:
             "recordedAt": "2025-12-22T10:30:00.000Z",
         }
 
-        result = analyze_audio(str(audio_path), "fake_api_key", context=context)
+        result = analyze_audio(str(webm_stub_file), "fake_api_key", context=context)
 
         # Verify the prompt includes context (but NOT travelers - handled by OpenAI)
         call_args = mock_gemini_client.models.generate_content.call_args
@@ -71,14 +84,11 @@ class TestAnalyzeAudio:
         assert result["audioType"] == "speech"
         assert result["_meta"]["context"] == context
 
-    def test_analyze_json_in_markdown_code_block(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+    @pytest.mark.parametrize("fence", ["```json", "```"], ids=["json-fenced", "bare-fenced"])
+    def test_analyze_json_in_code_block(
+        self, fence, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
-        """Test parsing JSON wrapped in markdown code blocks."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
-        # Mock response with markdown-wrapped JSON
+        """Test parsing JSON wrapped in markdown code blocks, with or without the json marker."""
         mock_response = mock_gemini_client.models.generate_content.return_value
         json_content = {
             "audioType": "ambient",
@@ -87,40 +97,22 @@ class TestAnalyzeAudio:
             "sceneDescription": "Peaceful nature scene",
             "emotionalTone": "calm",
         }
-        mock_response.text = f"```json\n{json.dumps(json_content)}\n```"
+        mock_response.text = f"{fence}\n{json.dumps(json_content)}\n```"
 
-        result = analyze_audio(str(audio_path), "fake_api_key")
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
 
         assert result["audioType"] == "ambient"
         assert result["sceneDescription"] == "Peaceful nature scene"
 
-    def test_analyze_json_in_generic_code_block(
-        self, temp_dir, mock_genai_module, mock_gemini_client
-    ):
-        """Test parsing JSON in generic code blocks (without json marker)."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
-        mock_response = mock_gemini_client.models.generate_content.return_value
-        json_content = {"audioType": "music", "transcript": [], "audioEvents": []}
-        mock_response.text = f"```\n{json.dumps(json_content)}\n```"
-
-        result = analyze_audio(str(audio_path), "fake_api_key")
-
-        assert result["audioType"] == "music"
-
     def test_analyze_handles_json_parse_error(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
         """Test handling of malformed JSON response."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
         # Mock response with invalid JSON
         mock_response = mock_gemini_client.models.generate_content.return_value
         mock_response.text = "This is not valid JSON { broken }"
 
-        result = analyze_audio(str(audio_path), "fake_api_key")
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
 
         # Should return error dict
         assert "error" in result
@@ -136,106 +128,169 @@ class TestAnalyzeAudio:
             analyze_audio(str(nonexistent_file), "fake_api_key")
 
     def test_analyze_uploads_with_correct_mime_type(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
         """Test that audio file is uploaded with correct MIME type."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
-        analyze_audio(str(audio_path), "fake_api_key")
+        analyze_audio(str(webm_stub_file), "fake_api_key")
 
         # Verify upload was called with correct config
         upload_call = mock_gemini_client.files.upload.call_args
         assert upload_call[1]["config"]["mime_type"] == "audio/webm"
 
-    def test_analyze_uses_correct_model(self, temp_dir, mock_genai_module, mock_gemini_client):
-        """Test that the correct Gemini model is used."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
+    def test_analyze_uses_upload_cache_when_enabled(
+        self, webm_stub_file, temp_dir, mock_genai_module, mock_gemini_client, monkeypatch
+    ):
+        """Test that a repeat analysis reuses the cached upload."""
+        import upload_cache
+
+        monkeypatch.setenv("GEMINI_FILE_CACHE", "1")
+        monkeypatch.setattr(upload_cache, "DEFAULT_CACHE_PATH", temp_dir / "cache.sqlite3")
+        mock_uploaded_file = mock_gemini_client.files.upload.return_value
+        mock_uploaded_file.uri = "https://example.com/files/uploaded_file_name"
+        mock_uploaded_file.expiration_time = None
+
+        analyze_audio(str(webm_stub_file), "fake_api_key")
+        analyze_audio(str(webm_stub_file), "fake_api_key")
+
+        mock_gemini_client.files.upload.assert_called_once()
+        mock_gemini_client.files.get.assert_called_once_with(name="uploaded_file_name")
+
+    def test_analyze_reuse_uploads_overrides_environment(
+        self, webm_stub_file, temp_dir, mock_genai_module, mock_gemini_client, monkeypatch
+    ):
+        """Test that reuse_uploads=True enables the upload cache without GEMINI_FILE_CACHE."""
+        import upload_cache
+
+        monkeypatch.delenv("GEMINI_FILE_CACHE", raising=False)
+        monkeypatch.setattr(upload_cache, "DEFAULT_CACHE_PATH", temp_dir / "cache.sqlite3")
+        mock_uploaded_file = mock_gemini_client.files.upload.return_value
+        mock_uploaded_file.uri = "https://example.com/files/uploaded_file_name"
+        mock_uploaded_file.expiration_time = None
+
+        analyze_audio(str(webm_stub_file), "fake_api_key", reuse_uploads=True)
+        analyze_audio(str(webm_stub_file), "fake_api_key", reuse_uploads=True)
 
-        analyze_audio(str(audio_path), "fake_api_key")
+        mock_gemini_client.files.upload.assert_called_once()
+
+    def test_analyze_upload_cache_hit_skips_compression(
+        self, webm_stub_file, temp_dir, mock_genai_module, mock_gemini_client, monkeypatch, mocker
+    ):
+        """Test that uploads are cached by the original file, so a hit isn't compressed again."""
+        import upload_cache
+
+        monkeypatch.setattr(upload_cache, "DEFAULT_CACHE_PATH", temp_dir / "cache.sqlite3")
+        mock_uploaded_file = mock_gemini_client.files.upload.return_value
+        mock_uploaded_file.uri = "https://example.com/files/uploaded_file_name"
+        mock_uploaded_file.expiration_time = None
+        compressed = temp_dir / "compressed.webm"
+
+        def fake_compress(path):
+            compressed.write_bytes(b"smaller")
+            return compressed
+
+        compress = mocker.patch("analyze.compress_for_upload", side_effect=fake_compress)
+
+        analyze_audio(str(webm_stub_file), "fake_api_key", reuse_uploads=True)
+        analyze_audio(str(webm_stub_file), "fake_api_key", reuse_uploads=True)
+
+        compress.assert_called_once()
+        mock_gemini_client.files.upload.assert_called_once()
+        assert not compressed.exists()
+        with upload_cache.UploadCache() as cache:
+            assert cache.get(upload_cache.hash_file(webm_stub_file)) is not None
+
+    def test_analyze_retries_only_the_upload_request(
+        self, webm_stub_file, mock_genai_module, mock_gemini_client, mocker
+    ):
+        """Test that a dropped upload is retried without compressing the file again."""
+        mocker.patch("analyze.time.sleep")
+        compress = mocker.patch("analyze.compress_for_upload", return_value=None)
+        upload = mock_gemini_client.files.upload
+        upload.side_effect = [httpx.ConnectError("connection reset"), upload.return_value]
+
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
+
+        assert result["audioType"] == "speech"
+        assert upload.call_count == 2
+        compress.assert_called_once()
+
+    def test_analyze_propagates_upload_error(
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
+    ):
+        """Test that an upload failure is raised before anything is sent to Gemini."""
+        mock_gemini_client.files.upload.side_effect = RuntimeError("upload failed")
+
+        with pytest.raises(RuntimeError, match="upload failed"):
+            analyze_audio(str(webm_stub_file), "fake_api_key")
+
+        mock_gemini_client.models.generate_content.assert_not_called()
+
+    def test_analyze_uses_correct_model(
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
+    ):
+        """Test that the correct Gemini model is used."""
+        analyze_audio(str(webm_stub_file), "fake_api_key")
 
         # Verify generate_content was called with correct model
         call_args = mock_gemini_client.models.generate_content.call_args
         assert call_args[1]["model"] == DEFAULT_MODEL
 
     def test_analyze_includes_meta_information(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
-        """Test that result includes _meta field with prompt and context."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
+        """Test that result includes _meta field with prompt hash and context."""
         context = {"travelers": [{"name": "Alice"}]}
-        result = analyze_audio(str(audio_path), "fake_api_key", context=context)
+        result = analyze_audio(str(webm_stub_file), "fake_api_key", context=context)
 
+        prompt = mock_gemini_client.models.generate_content.call_args[1]["contents"][-1]
         assert "_meta" in result
-        assert "prompt" in result["_meta"]
-        assert "context" in result["_meta"]
-        assert "raw_response" in result["_meta"]
+        assert result["_meta"]["model"] == DEFAULT_MODEL
+        assert result["_meta"]["prompt_sha256"] == hashlib.sha256(prompt.encode()).hexdigest()
         assert result["_meta"]["context"] == context
+        # Full prompt and raw response are only kept on parse errors
+        assert "prompt" not in result["_meta"]
+        assert "raw_response" not in result["_meta"]
 
-    def test_analyze_empty_context(self, temp_dir, mock_genai_module, mock_gemini_client):
+    def test_analyze_empty_context(self, webm_stub_file, mock_genai_module, mock_gemini_client):
         """Test audio analysis with empty context dict."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
-        result = analyze_audio(str(audio_path), "fake_api_key", context={})
+        result = analyze_audio(str(webm_stub_file), "fake_api_key", context={})
 
         # Should still work, just without context in prompt
         assert "audioType" in result
         assert result["_meta"]["context"] == {}
 
-    def test_analyze_partial_context(self, temp_dir, mock_genai_module, mock_gemini_client):
+    @pytest.mark.parametrize(
+        ("context", "expected_in_prompt"),
+        [
+            ({"location": "Test Location"}, ["Test Location"]),
+            (
+                {"storyBeatContext": "A special family moment", "storyBeatStarred": True},
+                ["A special family moment", "starred as a favorite by the family"],
+            ),
+        ],
+        ids=["location-only", "starred-story-beat"],
+    )
+    def test_analyze_partial_context(
+        self, context, expected_in_prompt, webm_stub_file, mock_genai_module, mock_gemini_client
+    ):
         """Test audio analysis with partial context (only some fields)."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
+        result = analyze_audio(str(webm_stub_file), "fake_api_key", context=context)
 
-        # Only location, no travelers or storyBeat
-        context = {"location": "Test Location"}
-
-        result = analyze_audio(str(audio_path), "fake_api_key", context=context)
-
-        # Verify prompt includes location
-        call_args = mock_gemini_client.models.generate_content.call_args
-        prompt = call_args[1]["contents"][-1]
-
-        assert "Test Location" in prompt
+        prompt = mock_gemini_client.models.generate_content.call_args[1]["contents"][-1]
+        for expected in expected_in_prompt:
+            assert expected in prompt
         assert result["_meta"]["context"] == context
 
-    def test_analyze_with_starred_story_beat(self, temp_dir, mock_genai_module, mock_gemini_client):
-        """Test audio analysis with starred story beat context."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
-        context = {
-            "storyBeatContext": "A special family moment",
-            "storyBeatStarred": True,
-        }
-
-        result = analyze_audio(str(audio_path), "fake_api_key", context=context)
-
-        # Verify prompt includes starred message
-        call_args = mock_gemini_client.models.generate_content.call_args
-        prompt = call_args[1]["contents"][-1]
-
-        assert "A special family moment" in prompt
-        assert "starred as a favorite by the family" in prompt
-        assert "audioType" in result
-
     def test_analyze_with_unstarred_story_beat(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
         """Test audio analysis with unstarred story beat (no starred message)."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
         context = {
             "storyBeatContext": "A regular story",
             # storyBeatStarred not set or False
         }
 
-        result = analyze_audio(str(audio_path), "fake_api_key", context=context)
+        result = analyze_audio(str(webm_stub_file), "fake_api_key", context=context)
 
         # Verify prompt does NOT include starred message
         call_args = mock_gemini_client.models.generate_content.call_args
@@ -246,22 +301,480 @@ class TestAnalyzeAudio:
         assert "audioType" in result
 
     def test_analyze_handles_none_response_text(
-        self, temp_dir, mock_genai_module, mock_gemini_client
+        self, webm_stub_file, mock_genai_module, mock_gemini_client
     ):
         """Test handling of None response.text."""
-        audio_path = temp_dir / "test_audio.webm"
-        audio_path.write_bytes(b"\x1a\x45\xdf\xa3")
-
         # Mock response with None text
         mock_response = mock_gemini_client.models.generate_content.return_value
         mock_response.text = None
 
-        result = analyze_audio(str(audio_path), "fake_api_key")
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
 
         # Should handle None gracefully and return error
         assert "error" in result
         assert result["error"] == "Failed to parse JSON response"
 
+    def test_analyze_reuses_client_across_calls(self, webm_stub_file, mock_genai_module):
+        """Test that one Gemini client is created per API key and reused."""
+        analyze_audio(str(webm_stub_file), "fake_api_key")
+        analyze_audio(str(webm_stub_file), "fake_api_key")
+        analyze_audio(str(webm_stub_file), "other_api_key")
+
+        assert mock_genai_module.Client.call_count == 2
+        mock_genai_module.Client.assert_any_call(api_key="fake_api_key")
+        mock_genai_module.Client.assert_any_call(api_key="other_api_key")
+
+
+class TestSummarizeStoryBeat:
+    """Tests for summarize_story_beat function."""
+
+    LONG_STORY = "Once upon a time at La Mina Falls, " * 10
+
+    def test_short_text_returned_without_api_call(self, mock_genai_module):
+        """Texts under 200 characters should be returned unchanged."""
+        assert summarize_story_beat("A short story", "fake_api_key") == "A short story"
+        mock_genai_module.Client.assert_not_called()
+
+    def test_long_text_is_summarized(self, mock_genai_module, mock_gemini_client):
+        """Long texts should be summarized by Gemini, with wrapping quotes removed."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = '"A family visits a waterfall."'
+
+        summary = summarize_story_beat(self.LONG_STORY, "fake_api_key")
+
+        assert summary == "A family visits a waterfall."
+        mock_gemini_client.models.generate_content.assert_called_once()
+
+    def test_repeat_summary_served_from_cache(self, mock_genai_module, mock_gemini_client):
+        """Summarizing the same text twice should only call Gemini once."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = "A family visits a waterfall."
+
+        first = summarize_story_beat(self.LONG_STORY, "fake_api_key")
+        second = summarize_story_beat(self.LONG_STORY, "fake_api_key")
+
+        assert first == second == "A family visits a waterfall."
+        mock_gemini_client.models.generate_content.assert_called_once()
+
+    def test_empty_response_not_cached(self, mock_genai_module, mock_gemini_client):
+        """Falling back to the original text should not poison the cache."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = None
+
+        assert summarize_story_beat(self.LONG_STORY, "fake_api_key") == self.LONG_STORY
+        summarize_story_beat(self.LONG_STORY, "fake_api_key")
+
+        assert mock_gemini_client.models.generate_content.call_count == 2
+
+
+class TestSummarizeStoryBeatsBatch:
+    """Tests for summarize_story_beats_batch function."""
+
+    LONG_STORY = "Once upon a time at La Mina Falls, " * 10
+
+    def test_one_request_for_several_beats(self, mock_genai_module, mock_gemini_client):
+        """Long beats share one request; short ones are kept as they are."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = '```json\n{"a": "Summary A.", "b": "Summary B."}\n```'
+        stories = {"a": self.LONG_STORY + "A", "short": "A short story", "b": self.LONG_STORY + "B"}
+
+        summaries = summarize_story_beats_batch(stories, "fake_api_key")
+
+        assert summaries == {"a": "Summary A.", "short": "A short story", "b": "Summary B."}
+        mock_gemini_client.models.generate_content.assert_called_once()
+        prompt = mock_gemini_client.models.generate_content.call_args.kwargs["contents"][0]
+        assert '"id": "a"' in prompt and '"id": "b"' in prompt
+
+    def test_summaries_shared_with_single_beat_cache(self, mock_genai_module, mock_gemini_client):
+        """Batched summaries are cached under the same keys summarize_story_beat uses."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = '{"a": "Summary A.", "b": "Summary B."}'
+        stories = {"a": self.LONG_STORY + "A", "b": self.LONG_STORY + "B"}
+
+        summarize_story_beats_batch(stories, "fake_api_key")
+
+        assert summarize_story_beat(stories["b"], "fake_api_key") == "Summary B."
+        mock_gemini_client.models.generate_content.assert_called_once()
+
+    def test_missing_summary_falls_back_to_single_request(
+        self, mock_genai_module, mock_gemini_client, mocker
+    ):
+        """A beat the batched response leaves out is summarized on its own."""
+        batch_response = mocker.Mock(text='{"a": "Summary A."}')
+        single_response = mocker.Mock(text="Summary B.")
+        mock_gemini_client.models.generate_content.side_effect = [batch_response, single_response]
+        stories = {"a": self.LONG_STORY + "A", "b": self.LONG_STORY + "B"}
+
+        summaries = summarize_story_beats_batch(stories, "fake_api_key")
+
+        assert summaries == {"a": "Summary A.", "b": "Summary B."}
+        assert mock_gemini_client.models.generate_content.call_count == 2
+
+    def test_unparseable_response_falls_back(self, mock_genai_module, mock_gemini_client, capsys):
+        """If the batched response isn't a JSON object, each beat is summarized on its own."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = "Not JSON"
+        stories = {"a": self.LONG_STORY + "A", "b": self.LONG_STORY + "B"}
+
+        summaries = summarize_story_beats_batch(stories, "fake_api_key")
+
+        assert summaries == {"a": "Not JSON", "b": "Not JSON"}
+        assert mock_gemini_client.models.generate_content.call_count == 3
+        assert "Failed to parse batch summary response" in capsys.readouterr().out
+
+
+class TestAnalyzeAudioBatch:
+    """Tests for analyze_audio_batch function."""
+
+    @pytest.fixture
+    def clip_paths(self, temp_dir):
+        """Two stub audio clips."""
+        paths = []
+        for name in ("clip_001.webm", "clip_002.webm"):
+            path = temp_dir / name
+            path.write_bytes(WEBM_STUB)
+            paths.append(str(path))
+        return paths
+
+    def test_batch_single_request(
+        self, clip_paths, mock_genai_module, mock_gemini_client, sample_gemini_response
+    ):
+        """All clips should be uploaded and analyzed in one request."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        second = dict(sample_gemini_response, audioType="ambient")
+        mock_response.text = json.dumps({"results": [sample_gemini_response, second]})
+        contexts = [{"location": "Golden Gate Bridge"}, None]
+
+        results = analyze_audio_batch(clip_paths, "fake_api_key", contexts)
+
+        assert mock_gemini_client.files.upload.call_count == 2
+        mock_gemini_client.models.generate_content.assert_called_once()
+        contents = mock_gemini_client.models.generate_content.call_args[1]["contents"]
+        assert len(contents) == 3
+        assert "Clip 1:\n- Location: Golden Gate Bridge" in contents[-1]
+        assert "Clip 2:\n- No additional context" in contents[-1]
+
+        assert [r["audioType"] for r in results] == ["speech", "ambient"]
+        assert results[0]["_meta"]["context"] == contexts[0]
+        assert results[1]["_meta"]["batch_index"] == 1
+
+    def test_batch_wrong_result_count_returns_errors(
+        self, clip_paths, mock_genai_module, mock_gemini_client, sample_gemini_response
+    ):
+        """A response with the wrong number of results should fail every clip."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = json.dumps({"results": [sample_gemini_response]})
+
+        results = analyze_audio_batch(clip_paths, "fake_api_key")
+
+        assert len(results) == 2
+        assert all(r["error"] == "Failed to parse JSON response" for r in results)
+        assert "Expected 2 results" in results[0]["error_details"]
+
+    def test_batch_invalid_json_returns_errors(
+        self, clip_paths, mock_genai_module, mock_gemini_client
+    ):
+        """Malformed JSON should produce an error result per clip."""
+        mock_response = mock_gemini_client.models.generate_content.return_value
+        mock_response.text = "not json"
+
+        results = analyze_audio_batch(clip_paths, "fake_api_key")
+
+        assert [r["error"] for r in results] == ["Failed to parse JSON response"] * 2
+
+    def test_batch_missing_file_raises(self, clip_paths, temp_dir, mock_genai_module):
+        """Missing files should be reported before anything is uploaded."""
+        with pytest.raises(FileNotFoundError, match="Audio file not found"):
+            analyze_audio_batch([*clip_paths, str(temp_dir / "missing.webm")], "fake_api_key")
+
+    def test_batch_context_length_mismatch(self, clip_paths, mock_genai_module):
+        """contexts must line up with audio_paths."""
+        with pytest.raises(ValueError, match="one entry per audio file"):
+            analyze_audio_batch(clip_paths, "fake_api_key", contexts=[None])
+
+    def test_batch_empty(self, mock_genai_module):
+        """An empty batch should not call Gemini."""
+        assert analyze_audio_batch([], "fake_api_key") == []
+        mock_genai_module.Client.assert_not_called()
+
+
+class TestAsyncAnalysis:
+    """Tests for the async analysis and summarization functions."""
+
+    LONG_STORY = "Once upon a time at La Mina Falls, " * 10
+
+    def test_analyze_audio_async(self, webm_stub_file, mock_genai_module, mock_gemini_client):
+        """Async analysis should upload the file and await the async client."""
+        context = {"location": "Golden Gate Bridge"}
+
+        result = asyncio.run(analyze_audio_async(str(webm_stub_file), "fake_api_key", context))
+
+        mock_gemini_client.files.upload.assert_called_once()
+        mock_gemini_client.aio.models.generate_content.assert_awaited_once()
+        mock_gemini_client.models.generate_content.assert_not_called()
+        prompt = mock_gemini_client.aio.models.generate_content.call_args[1]["contents"][-1]
+        assert "Golden Gate Bridge" in prompt
+        assert result["audioType"] == "speech"
+
+    def test_analyze_audio_async_missing_file(self, temp_dir, mock_genai_module):
+        """Async analysis should raise for a missing file."""
+        with pytest.raises(FileNotFoundError, match="Audio file not found"):
+            asyncio.run(analyze_audio_async(str(temp_dir / "missing.webm"), "fake_api_key"))
+
+    def test_summarize_story_beat_async(self, mock_genai_module, mock_gemini_client):
+        """Async summarization should use the async client."""
+        mock_response = mock_gemini_client.aio.models.generate_content.return_value
+        mock_response.text = "A family visits a waterfall."
+
+        summary = asyncio.run(summarize_story_beat_async(self.LONG_STORY, "fake_api_key"))
+
+        assert summary == "A family visits a waterfall."
+        mock_gemini_client.aio.models.generate_content.assert_awaited_once()
+
+    def test_async_client_shared_within_event_loop(self, mock_genai_module, mock_gemini_client):
+        """Async calls on one event loop share a client; a new loop gets its own."""
+        mock_gemini_client.aio.models.generate_content.return_value.text = "A short summary."
+
+        async def summarize_twice():
+            await summarize_story_beat_async(self.LONG_STORY, "fake_api_key")
+            await summarize_story_beat_async(self.LONG_STORY + "Again.", "fake_api_key")
+
+        asyncio.run(summarize_twice())
+        assert mock_genai_module.Client.call_count == 1
+
+        asyncio.run(summarize_story_beat_async(self.LONG_STORY + "Once more.", "fake_api_key"))
+        assert mock_genai_module.Client.call_count == 2
+
+    def test_analyze_audio_async_retries_without_blocking(
+        self, webm_stub_file, mock_genai_module, mock_gemini_client, mocker
+    ):
+        """A transient failure should be retried after an asyncio.sleep, not time.sleep."""
+        async_sleep = mocker.patch("analyze.asyncio.sleep", new_callable=mocker.AsyncMock)
+        blocking_sleep = mocker.patch("analyze.time.sleep")
+        generate = mock_gemini_client.aio.models.generate_content
+        generate.side_effect = [errors.ServerError(503, {}), generate.return_value]
+
+        result = asyncio.run(analyze_audio_async(str(webm_stub_file), "fake_api_key"))
+
+        assert result["audioType"] == "speech"
+        assert generate.await_count == 2
+        async_sleep.assert_awaited_once()
+        blocking_sleep.assert_not_called()
+        mock_gemini_client.files.upload.assert_called_once()
+
+    def test_summarize_story_beat_async_gives_up_on_client_error(
+        self, mock_genai_module, mock_gemini_client, mocker
+    ):
+        """Non-transient errors should not be retried."""
+        async_sleep = mocker.patch("analyze.asyncio.sleep", new_callable=mocker.AsyncMock)
+        generate = mock_gemini_client.aio.models.generate_content
+        generate.side_effect = errors.ClientError(400, {})
+
+        with pytest.raises(errors.ClientError):
+            asyncio.run(summarize_story_beat_async(self.LONG_STORY, "fake_api_key"))
+        generate.assert_awaited_once()
+        async_sleep.assert_not_awaited()
+
+    def test_analyze_and_summarize(self, webm_stub_file, mock_genai_module, mock_gemini_client):
+        """Combined call should return both the analysis and the summary."""
+        analysis, summary = asyncio.run(
+            analyze_and_summarize(str(webm_stub_file), "A short story", "fake_api_key")
+        )
+
+        assert analysis["audioType"] == "speech"
+        assert summary == "A short story"
+
+
+class TestWithRetry:
+    """Tests for the _with_retry helper."""
+
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, mocker):
+        """Skip real backoff delays."""
+        return mocker.patch("analyze.time.sleep")
+
+    def test_success_on_first_attempt(self, mocker, no_sleep):
+        """Successful calls should not be retried."""
+        fn = mocker.Mock(return_value="ok")
+
+        assert analyze._with_retry(fn, 1, key="value") == "ok"
+        fn.assert_called_once_with(1, key="value")
+        no_sleep.assert_not_called()
+
+    def test_retries_server_error_then_succeeds(self, mocker, no_sleep):
+        """5xx errors should be retried with exponential backoff."""
+        fn = mocker.Mock(side_effect=[errors.ServerError(503, {}), "ok"])
+
+        assert analyze._with_retry(fn) == "ok"
+        assert fn.call_count == 2
+        assert 1 <= no_sleep.call_args[0][0] < 1.25
+
+    @pytest.mark.parametrize(
+        "error", [httpx.ConnectError("connection reset"), httpx.ReadTimeout("timed out")]
+    )
+    def test_retries_network_errors(self, mocker, no_sleep, error):
+        """Dropped connections and timeouts should be retried."""
+        fn = mocker.Mock(side_effect=[error, "ok"])
+
+        assert analyze._with_retry(fn) == "ok"
+        assert fn.call_count == 2
+
+    def test_async_retries_network_errors(self, mocker):
+        """The async helper should retry timeouts as well."""
+        async_sleep = mocker.patch("analyze.asyncio.sleep", new_callable=mocker.AsyncMock)
+        fn = mocker.AsyncMock(side_effect=[httpx.ConnectTimeout("timed out"), "ok"])
+
+        assert asyncio.run(analyze._with_retry_async(fn)) == "ok"
+        async_sleep.assert_awaited_once()
+
+    def test_retries_rate_limit(self, mocker, no_sleep):
+        """429 errors should be retried."""
+        fn = mocker.Mock(side_effect=[errors.ClientError(429, {}), "ok"])
+
+        assert analyze._with_retry(fn) == "ok"
+
+    def test_rate_limit_waits_for_suggested_delay(self, mocker, no_sleep):
+        """A RetryInfo delay in a 429 response should be used instead of the backoff."""
+        response_json = {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "details": [
+                    {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "7s"}
+                ],
+            }
+        }
+        fn = mocker.Mock(side_effect=[errors.ClientError(429, response_json), "ok"])
+
+        assert analyze._with_retry(fn) == "ok"
+        assert 7 <= no_sleep.call_args[0][0] < 7.25
+
+    def test_suggested_delay_is_capped(self, mocker, no_sleep):
+        """Very long suggested delays should be capped."""
+        response_json = {"error": {"details": [{"retryDelay": "600s"}]}}
+        fn = mocker.Mock(side_effect=[errors.ClientError(429, response_json), "ok"])
+
+        analyze._with_retry(fn)
+
+        delay = no_sleep.call_args[0][0]
+        assert analyze.MAX_RETRY_DELAY_SECONDS <= delay < analyze.MAX_RETRY_DELAY_SECONDS + 0.25
+
+    def test_does_not_retry_client_error(self, mocker, no_sleep):
+        """Non-rate-limit 4xx errors should fail immediately."""
+        fn = mocker.Mock(side_effect=errors.ClientError(400, {}))
+
+        with pytest.raises(errors.ClientError):
+            analyze._with_retry(fn)
+        fn.assert_called_once()
+        no_sleep.assert_not_called()
+
+    def test_gives_up_after_max_attempts(self, mocker, no_sleep):
+        """Persistent transient errors should be raised after the last attempt."""
+        fn = mocker.Mock(side_effect=errors.ServerError(500, {}))
+
+        with pytest.raises(errors.ServerError):
+            analyze._with_retry(fn)
+        assert fn.call_count == analyze.MAX_API_ATTEMPTS
+        assert no_sleep.call_count == analyze.MAX_API_ATTEMPTS - 1
+
+    def test_analyze_audio_retries_generate_content(
+        self, webm_stub_file, mock_genai_module, mock_gemini_client, sample_gemini_response
+    ):
+        """A transient failure in generate_content should not re-upload the file."""
+        generate = mock_gemini_client.models.generate_content
+        generate.side_effect = [errors.ServerError(503, {}), generate.return_value]
+
+        result = analyze_audio(str(webm_stub_file), "fake_api_key")
+
+        assert result["audioType"] == sample_gemini_response["audioType"]
+        assert generate.call_count == 2
+        mock_gemini_client.files.upload.assert_called_once()
+
+
+class TestBuildAnalysisPrompt:
+    """Tests for build_analysis_prompt and build_batch_analysis_prompt."""
+
+    def test_prompt_ends_with_prebuilt_instructions(self):
+        """The fixed instructions are appended as-is after the per-call context."""
+        prompt = build_analysis_prompt({"location": "El Yunque"})
+
+        assert prompt.startswith("Analyze this audio clip recorded during a family trip.")
+        assert "- Location: El Yunque\n" in prompt
+        assert prompt.endswith(analyze._ANALYSIS_INSTRUCTIONS)
+
+    @pytest.mark.parametrize("context", [None, {}])
+    def test_prompt_without_context_is_precomputed(self, context):
+        """Without context the precomputed default prompt is returned."""
+        prompt = build_analysis_prompt(context)
+
+        assert prompt is analyze._DEFAULT_ANALYSIS_PROMPT
+        assert "CONTEXT:" not in prompt
+
+    def test_batch_prompt_ends_with_prebuilt_instructions(self):
+        """The batch prompt lists each clip, then the fixed batch instructions."""
+        prompt = build_batch_analysis_prompt([{"location": "El Yunque"}, None])
+
+        assert "Clip 1:\n- Location: El Yunque\n" in prompt
+        assert "Clip 2:\n- No additional context\n" in prompt
+        assert prompt.endswith(analyze._BATCH_ANALYSIS_INSTRUCTIONS)
+
+    @pytest.mark.parametrize(
+        "recorded_at",
+        ["2025-12-22T10:30:00Z", "2025-12-22T10:30:00.000Z", "2025-12-22T10:30:00+00:00"],
+    )
+    def test_recorded_at_formats(self, recorded_at):
+        """UTC timestamps with or without a trailing Z are formatted the same way."""
+        prompt = build_analysis_prompt({"recordedAt": recorded_at})
+
+        assert "- Recorded at: December 22, 2025, 10:30 AM\n" in prompt
+
+    def test_instructions_share_response_rules(self):
+        """Single and batch instructions end with the same response rules."""
+        assert analyze._ANALYSIS_INSTRUCTIONS.endswith(analyze._ANALYSIS_RESPONSE_RULES)
+        assert analyze._BATCH_ANALYSIS_INSTRUCTIONS.endswith(analyze._ANALYSIS_RESPONSE_RULES)
+
+
+class TestIsCurrentAnalysis:
+    """Tests for is_current_analysis function."""
+
+    CONTEXT = {"travelers": [{"name": "Alice"}], "storyBeatContext": "The old fort"}
+
+    def meta(self, context, **overrides):
+        """Build the _meta analyze_audio records for a context."""
+        prompt = build_analysis_prompt(context)
+        meta = {
+            "model": DEFAULT_MODEL,
+            "prompt_sha256": hashlib.sha256(prompt.encode()).hexdigest(),
+            "context": context,
+        }
+        return {**meta, **overrides}
+
+    def test_same_model_prompt_and_context(self):
+        """An analysis made from the same request is current."""
+        result = {"audioType": "speech", "_meta": self.meta(self.CONTEXT)}
+
+        assert is_current_analysis(result, dict(self.CONTEXT))
+
+    def test_changed_context(self):
+        """A changed story beat means the clip has to be analyzed again."""
+        result = {"audioType": "speech", "_meta": self.meta(self.CONTEXT)}
+
+        assert not is_current_analysis(result, {**self.CONTEXT, "storyBeatContext": "The bay"})
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [{"model": "older-model"}, {"prompt_sha256": "0" * 64}, {"batch_index": 0}],
+    )
+    def test_different_request(self, overrides):
+        """Another model or prompt, or a batched request, is not current."""
+        result = {"audioType": "speech", "_meta": self.meta(self.CONTEXT, **overrides)}
+
+        assert not is_current_analysis(result, self.CONTEXT)
+
+    def test_missing_meta(self):
+        """Analyses saved without _meta are never reused."""
+        assert not is_current_analysis({"audioType": "speech"}, self.CONTEXT)
+
 
 class TestFormatTraveler:
     """Tests for format_traveler helper function."""
@@ -363,3 +876,11 @@ class TestExtractJsonFromText:
         text = "No code block here, just plain text"
         result = extract_json_from_text(text)
         assert result == text
+
+    def test_extract_plain_json_skips_regex(self, mocker):
+        """Test that plain JSON is returned without running the code block regex."""
+        mock_pattern = mocker.patch("analyze._JSON_CODE_BLOCK_PATTERN")
+        text = '  [{"key": "use `this` command"}]\n'
+        result = extract_json_from_text(text)
+        assert result == '[{"key": "use `this` command"}]'
+        mock_pattern.search.assert_not_called()
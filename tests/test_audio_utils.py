@@ -1,18 +1,31 @@
 # Tests for audio_utils.py - Audio concatenation and utilities
 
+import gc
+import subprocess
 from pathlib import Path
 
 import pytest
+from conftest import WEBM_STUB
 from pydub import AudioSegment
 
+import audio_utils
 from audio_utils import (
     ConcatenatedAudio,
     cleanup_concatenated_audio,
+    compress_for_upload,
     concatenate_audio_files,
     format_timestamp,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_audio_caches():
+    """Start each test with an empty ffprobe cache."""
+    audio_utils._probe_audio_cached.cache_clear()
+    yield
+    audio_utils._probe_audio_cached.cache_clear()
+
+
 class TestFormatTimestamp:
     """Tests for format_timestamp function."""
 
@@ -161,6 +174,37 @@ class TestConcatenateAudioFiles:
         finally:
             cleanup_concatenated_audio(result)
 
+    def test_concatenate_temp_file_deleted_with_result(self, create_synthetic_audio):
+        """A temp output file is removed once its result is garbage collected."""
+        voice_ref = create_synthetic_audio(duration_ms=500)
+        clip = create_synthetic_audio(duration_ms=500)
+
+        result = concatenate_audio_files([({"name": "Test"}, voice_ref)], clip, output_dir=None)
+        file_path = result.file_path
+        assert file_path.exists()
+
+        del result
+        gc.collect()
+
+        assert not file_path.exists()
+
+    def test_concatenate_temp_file_in_tc_tmpdir(
+        self, create_synthetic_audio, temp_dir, monkeypatch
+    ):
+        """TC_TMPDIR chooses where temp output files are created."""
+        scratch = temp_dir / "scratch"
+        scratch.mkdir()
+        monkeypatch.setenv("TC_TMPDIR", str(scratch))
+        voice_ref = create_synthetic_audio(duration_ms=500)
+        clip = create_synthetic_audio(duration_ms=500)
+
+        result = concatenate_audio_files([({"name": "Test"}, voice_ref)], clip, output_dir=None)
+
+        try:
+            assert result.file_path.parent == scratch
+        finally:
+            cleanup_concatenated_audio(result)
+
     def test_concatenate_empty_voice_refs(self, create_synthetic_audio, temp_dir):
         """Concatenation with no voice references (only clip)."""
         clip = create_synthetic_audio(duration_ms=2000)
@@ -180,9 +224,187 @@ class TestConcatenateAudioFiles:
         voice_ref_files = [({"name": "Test"}, voice_ref)]
         result = concatenate_audio_files(voice_ref_files, clip, temp_dir)
 
-        # Should be loadable by pydub
+        # Should be loadable by pydub (joining the separately encoded clip adds
+        # the Opus encoder delay of a few ms)
         reloaded = AudioSegment.from_file(str(result.file_path))
-        assert len(reloaded) == 2000
+        assert abs(len(reloaded) - 2000) < 10
+
+
+class TestJoinSegments:
+    """Tests for _join_segments helper."""
+
+    def test_matches_repeated_append(self):
+        """Joining gives the same audio and offsets as appending one by one."""
+        from pydub.generators import Sine
+
+        segments = [Sine(440 + 110 * i).to_audio_segment(duration=300 * (i + 1)) for i in range(4)]
+
+        combined, end_offsets = audio_utils._join_segments(segments)
+
+        expected = AudioSegment.empty()
+        expected_offsets = []
+        for seg in segments:
+            expected += seg
+            expected_offsets.append(len(expected))
+        assert combined.raw_data == expected.raw_data
+        assert end_offsets == expected_offsets == [300, 900, 1800, 3000]
+
+    def test_converts_mismatched_formats(self):
+        """Segments are converted to the highest rate, channel count and sample width."""
+        mono = AudioSegment.silent(duration=500, frame_rate=16000)
+        stereo = AudioSegment.silent(duration=250, frame_rate=44100).set_channels(2)
+
+        combined, end_offsets = audio_utils._join_segments([mono, stereo])
+
+        assert combined.frame_rate == 44100
+        assert combined.channels == 2
+        assert end_offsets == [500, 750]
+        assert len(combined) == 750
+
+    def test_empty(self):
+        """No segments gives empty audio."""
+        combined, end_offsets = audio_utils._join_segments([])
+
+        assert len(combined) == 0
+        assert end_offsets == []
+
+
+class TestConcatenateWithFfmpeg:
+    """Tests for the ffmpeg stream-copy path of concatenate_audio_files."""
+
+    @pytest.fixture
+    def opus_files(self, temp_dir):
+        """Two voice references and a clip (contents are never decoded)."""
+        paths = []
+        for name in ("ellen.webm", "mom's.webm", "clip.webm"):
+            path = temp_dir / name
+            path.write_bytes(WEBM_STUB)
+            paths.append(path)
+        return paths
+
+    def test_opus_inputs_are_stream_copied(self, opus_files, temp_dir, mocker):
+        """Matching Opus inputs are joined with the concat demuxer, timed from ffprobe."""
+        durations = {opus_files[0]: 1000.0, opus_files[1]: 2500.0, opus_files[2]: 4000.0}
+        mocker.patch("audio_utils._probe_audio", side_effect=lambda p: ("opus", 1, durations[p]))
+        list_contents = []
+
+        def fake_run(command, **kwargs):
+            list_path = Path(command[command.index("-i") + 1])
+            list_contents.append(list_path.read_text(encoding="utf-8"))
+            return subprocess.CompletedProcess(command, 0)
+
+        mock_run = mocker.patch("audio_utils.subprocess.run", side_effect=fake_run)
+        from_file = mocker.spy(audio_utils.AudioSegment, "from_file")
+        travelers = [{"name": "Ellen"}, {"name": "Mom"}]
+
+        result = concatenate_audio_files(
+            [(travelers[0], opus_files[0]), (travelers[1], opus_files[1])],
+            opus_files[2],
+            temp_dir,
+        )
+
+        command = mock_run.call_args[0][0]
+        assert command[command.index("-f") + 1] == "concat"
+        assert command[command.index("-c") + 1] == "copy"
+        assert command[-1] == str(temp_dir / "concatenated_audio.webm")
+        assert list_contents[0].splitlines() == [
+            f"file '{opus_files[0].resolve()}'",
+            "file '" + str(opus_files[1].resolve()).replace("'", "'\\''") + "'",
+            f"file '{opus_files[2].resolve()}'",
+        ]
+        from_file.assert_not_called()
+
+        assert result.voice_reference_segments == [
+            (travelers[0], 0.0, 1000.0),
+            (travelers[1], 1000.0, 3500.0),
+        ]
+        assert result.clip_start_ms == 3500.0
+        assert result.clip_end_ms == 7500.0
+        assert result.total_duration_ms == 7500.0
+
+    def test_mismatched_codecs_fall_back_to_pydub(self, create_synthetic_audio, temp_dir, mocker):
+        """Non-Opus inputs are decoded and re-encoded together with pydub."""
+        voice_ref = create_synthetic_audio(duration_ms=1000)
+        clip = create_synthetic_audio(duration_ms=500)
+        mocker.patch("audio_utils._probe_audio", return_value=("pcm_s16le", 1, 1000.0))
+        mock_run = mocker.patch("audio_utils.subprocess.run")
+        export = mocker.patch.object(audio_utils.AudioSegment, "export")
+
+        result = concatenate_audio_files([({"name": "A"}, voice_ref)], clip, temp_dir)
+
+        # One encode of the whole file, with the encoder's default settings
+        export.assert_called_once_with(str(result.file_path), format="webm", codec="libopus")
+        mock_run.assert_not_called()
+        assert result.clip_start_ms == 1000
+        assert result.clip_end_ms == 1500
+
+    def test_ffmpeg_failure_falls_back_to_pydub(self, opus_files, temp_dir, mocker):
+        """If the concat demuxer fails, the pydub path is used instead."""
+        mocker.patch("audio_utils._probe_audio", return_value=("opus", 1, 1000.0))
+        mocker.patch(
+            "audio_utils.subprocess.run",
+            side_effect=subprocess.CalledProcessError(1, "ffmpeg"),
+        )
+        fallback = mocker.patch(
+            "audio_utils._concatenate_with_pydub", return_value=([1000.0], 2000.0)
+        )
+
+        result = concatenate_audio_files([({"name": "A"}, opus_files[0])], opus_files[2], temp_dir)
+
+        fallback.assert_called_once()
+        assert result.clip_start_ms == 1000.0
+        assert result.clip_end_ms == 2000.0
+
+
+class TestProbeAudio:
+    """Tests for _probe_audio helper."""
+
+    FFPROBE_OUTPUT = (
+        '{"streams": [{"codec_name": "opus", "channels": 2}], "format": {"duration": "1.5"}}'
+    )
+
+    def test_parses_ffprobe_output(self, webm_stub_file, mocker):
+        """Codec, channels and duration (in ms) are read from ffprobe JSON."""
+        mocker.patch(
+            "audio_utils.subprocess.run",
+            return_value=subprocess.CompletedProcess([], 0, stdout=self.FFPROBE_OUTPUT),
+        )
+
+        assert audio_utils._probe_audio(webm_stub_file) == ("opus", 2, 1500.0)
+
+    def test_probes_each_file_once(self, webm_stub_file, mocker):
+        """Repeated probes of an unchanged file reuse the first result."""
+        mock_run = mocker.patch(
+            "audio_utils.subprocess.run",
+            return_value=subprocess.CompletedProcess([], 0, stdout=self.FFPROBE_OUTPUT),
+        )
+
+        audio_utils._probe_audio(webm_stub_file)
+        audio_utils._probe_audio(webm_stub_file)
+
+        mock_run.assert_called_once()
+
+    def test_missing_file_returns_none(self, temp_dir, mocker):
+        """Files that don't exist are not probed."""
+        mock_run = mocker.patch("audio_utils.subprocess.run")
+
+        assert audio_utils._probe_audio(temp_dir / "missing.webm") is None
+        mock_run.assert_not_called()
+
+    def test_missing_ffprobe_returns_none(self, webm_stub_file, mocker):
+        """Without ffprobe on PATH the probe reports nothing."""
+        mocker.patch("audio_utils.subprocess.run", side_effect=FileNotFoundError)
+
+        assert audio_utils._probe_audio(webm_stub_file) is None
+
+    def test_no_audio_stream_returns_none(self, webm_stub_file, mocker):
+        """Files without an audio stream are not probed successfully."""
+        mocker.patch(
+            "audio_utils.subprocess.run",
+            return_value=subprocess.CompletedProcess([], 0, stdout='{"streams": [], "format": {}}'),
+        )
+
+        assert audio_utils._probe_audio(webm_stub_file) is None
 
 
 class TestCleanupConcatenatedAudio:
@@ -214,6 +436,82 @@ class TestCleanupConcatenatedAudio:
         cleanup_concatenated_audio(nonexistent)
 
 
+class TestCompressForUpload:
+    """Tests for compress_for_upload function."""
+
+    @pytest.fixture
+    def large_file(self, temp_dir, monkeypatch):
+        """A file just over the compression threshold, with compression enabled."""
+        monkeypatch.setenv("AUDIO_COMPRESS", "1")
+        monkeypatch.setattr(audio_utils, "COMPRESS_THRESHOLD_MB", 0)
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"x" * 1024)
+        return path
+
+    def test_disabled_by_default(self, large_file, monkeypatch, mocker):
+        """Should not touch ffmpeg unless AUDIO_COMPRESS=1."""
+        monkeypatch.delenv("AUDIO_COMPRESS")
+        mock_run = mocker.patch("audio_utils.subprocess.run")
+
+        assert compress_for_upload(large_file) is None
+        mock_run.assert_not_called()
+
+    def test_small_file_not_compressed(self, webm_stub_file, monkeypatch, mocker):
+        """Files under the threshold should be uploaded as-is."""
+        monkeypatch.setenv("AUDIO_COMPRESS", "1")
+        mock_run = mocker.patch("audio_utils.subprocess.run")
+
+        assert compress_for_upload(webm_stub_file) is None
+        mock_run.assert_not_called()
+
+    def test_large_file_reencoded_as_opus(self, large_file, mocker):
+        """Large files should be re-encoded to low-bitrate mono Opus in a temp file."""
+        mock_run = mocker.patch("audio_utils.subprocess.run")
+
+        output_path = compress_for_upload(large_file)
+        assert output_path is not None
+
+        try:
+            assert output_path.suffix == ".webm"
+            command = mock_run.call_args[0][0]
+            assert command[0] == "ffmpeg"
+            assert str(large_file) in command
+            assert command[command.index("-c:a") + 1] == "libopus"
+            assert command[command.index("-b:a") + 1] == "24k"
+            assert command[command.index("-ac") + 1] == "1"
+            assert command[-1] == str(output_path)
+        finally:
+            output_path.unlink(missing_ok=True)
+
+    def test_ffmpeg_failure_falls_back_to_original(self, large_file, mocker, capsys):
+        """If ffmpeg fails, should quietly clean up and return None."""
+        mocker.patch(
+            "audio_utils.subprocess.run",
+            side_effect=subprocess.CalledProcessError(1, "ffmpeg"),
+        )
+        mkstemp = mocker.spy(audio_utils.tempfile, "mkstemp")
+
+        assert compress_for_upload(large_file) is None
+        assert not Path(mkstemp.spy_return[1]).exists()
+        assert capsys.readouterr().out == ""
+
+    def test_compresses_real_audio(self, create_synthetic_audio, monkeypatch):
+        """Should produce a decodable file from real audio."""
+        monkeypatch.setenv("AUDIO_COMPRESS", "1")
+        monkeypatch.setattr(audio_utils, "COMPRESS_THRESHOLD_MB", 0)
+        source = create_synthetic_audio(duration_ms=2000)
+
+        output_path = compress_for_upload(source)
+
+        try:
+            assert output_path is not None
+            assert output_path.stat().st_size > 0
+            assert output_path.stat().st_size < source.stat().st_size
+        finally:
+            if output_path:
+                output_path.unlink(missing_ok=True)
+
+
 class TestConcatenatedAudioDataclass:
     """Tests for ConcatenatedAudio dataclass."""
 
@@ -0,0 +1,95 @@
+# Tests for llm_cache.py
+
+import time
+
+import llm_cache
+
+
+class TestMakeKey:
+    """Tests for make_key function."""
+
+    def test_key_is_stable(self):
+        """Same model and prompt should always produce the same key."""
+        assert llm_cache.make_key("model", "prompt") == llm_cache.make_key("model", "prompt")
+
+    def test_key_depends_on_model(self):
+        """Different models should not share cache entries."""
+        assert llm_cache.make_key("model-a", "prompt") != llm_cache.make_key("model-b", "prompt")
+
+    def test_key_separates_model_and_prompt(self):
+        """Model/prompt boundary should be unambiguous."""
+        assert llm_cache.make_key("ab", "c") != llm_cache.make_key("a", "bc")
+
+
+class TestGetPut:
+    """Tests for get and put functions."""
+
+    def test_get_missing_returns_none(self):
+        """Unknown keys should miss."""
+        assert llm_cache.get(llm_cache.make_key("model", "missing")) is None
+
+    def test_put_then_get(self, isolated_llm_cache):
+        """Stored values should round-trip."""
+        key = llm_cache.make_key("model", "prompt")
+        llm_cache.put(key, "A short summary")
+
+        assert llm_cache.get(key) == "A short summary"
+        assert (isolated_llm_cache / key[:2] / f"{key}.json").exists()
+
+    def test_expired_entry_is_ignored(self, monkeypatch):
+        """Entries past their TTL should miss."""
+        key = llm_cache.make_key("model", "prompt")
+        llm_cache.put(key, "A short summary", ttl=60)
+
+        monkeypatch.setattr(time, "time", lambda: 10**12)
+        assert llm_cache.get(key) is None
+
+    def test_corrupt_entry_is_ignored(self, isolated_llm_cache):
+        """Unreadable cache files should be treated as a miss."""
+        key = llm_cache.make_key("model", "prompt")
+        entry_path = isolated_llm_cache / key[:2] / f"{key}.json"
+        entry_path.parent.mkdir(parents=True)
+        entry_path.write_text("not json")
+
+        assert llm_cache.get(key) is None
+
+    def test_non_object_entry_is_ignored(self, isolated_llm_cache):
+        """Valid JSON that isn't an entry object should be treated as a miss."""
+        key = llm_cache.make_key("model", "prompt")
+        entry_path = isolated_llm_cache / key[:2] / f"{key}.json"
+        entry_path.parent.mkdir(parents=True)
+        entry_path.write_text('["not", "an", "entry"]')
+
+        assert llm_cache.get(key) is None
+
+    def test_put_leaves_no_temp_files(self, isolated_llm_cache):
+        """Entries are renamed into place, so only the entry itself remains."""
+        key = llm_cache.make_key("model", "prompt")
+        llm_cache.put(key, "first")
+        llm_cache.put(key, "second")
+
+        assert [path.name for path in (isolated_llm_cache / key[:2]).iterdir()] == [f"{key}.json"]
+        assert llm_cache.get(key) == "second"
+
+    def test_put_failure_is_not_raised(self, isolated_llm_cache, mocker, capsys):
+        """A cache that can't be written (read-only, disk full) only warns."""
+        mocker.patch("llm_cache.os.replace", side_effect=OSError("No space left on device"))
+        key = llm_cache.make_key("model", "prompt")
+
+        llm_cache.put(key, "A short summary")
+
+        assert llm_cache.get(key) is None
+        assert not any(isolated_llm_cache.rglob("*.tmp"))
+        assert "Failed to write LLM cache entry" in capsys.readouterr().out
+
+    def test_disabled_cache_neither_reads_nor_writes(self, monkeypatch, isolated_llm_cache):
+        """LLM_CACHE_DISABLED=1 should bypass the cache entirely."""
+        key = llm_cache.make_key("model", "prompt")
+        llm_cache.put(key, "cached")
+
+        monkeypatch.setenv("LLM_CACHE_DISABLED", "1")
+        assert llm_cache.get(key) is None
+
+        other_key = llm_cache.make_key("model", "other")
+        llm_cache.put(other_key, "not cached")
+        assert not (isolated_llm_cache / other_key[:2]).exists()
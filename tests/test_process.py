@@ -2,10 +2,14 @@
 
 import json
 import sys
+import threading
+from collections import Counter
 from pathlib import Path
+from typing import Any
 
 import pytest
 from conftest import WEBM_STUB
+from google.genai import errors
 
 # Import needs to happen after sys.argv is set in some tests
 import process
@@ -14,6 +18,11 @@ import process
 class TestProcessMain:
     """Tests for the main processing pipeline."""
 
+    @pytest.fixture(autouse=True)
+    def isolated_output_dir(self, temp_dir, monkeypatch):
+        """Run each test from its own directory so ./output never carries over between runs."""
+        monkeypatch.chdir(temp_dir)
+
     def test_dry_run_mode(self, sample_zip_file, monkeypatch, capsys, temp_dir):
         """Test dry run mode (no API calls)."""
         # Set command line arguments
@@ -124,6 +133,245 @@ class TestProcessMain:
         assert "Done! Processed" in captured.out
         assert "2/2 clips successfully" in captured.out
 
+    def test_process_reuse_uploads_flag(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_gemini_response,
+        sample_openai_transcription,
+        temp_dir,
+    ):
+        """Test that --reuse-uploads turns on the Gemini upload cache for every clip."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file), "--reuse-uploads"])
+        monkeypatch.chdir(temp_dir)
+
+        mock_analyze = mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        process.main()
+
+        assert mock_analyze.call_count == 2
+        for call in mock_analyze.call_args_list:
+            assert call.kwargs["reuse_uploads"] is True
+
+    def test_process_resume_reuses_previous_run(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        mock_genai_module,
+        mock_gemini_client,
+        sample_openai_transcription,
+        capsys,
+        temp_dir,
+    ):
+        """With --resume, clips analyzed from the same prompt and context aren't sent again."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file)])
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+        process.main()
+
+        # Date the first run earlier, and pretend the second clip's context changed since
+        (first_run,) = (temp_dir / "output").iterdir()
+        previous_run = first_run.rename(temp_dir / "output" / "test_export_2025-12-22_120000")
+        results_path = previous_run / "enriched_metadata.json"
+        results = json.loads(results_path.read_text())
+        results["clips"][1]["analysis"]["_meta"]["context"]["storyBeatContext"] = "An old story"
+        results_path.write_text(json.dumps(results))
+        generate = mock_gemini_client.models.generate_content
+        generate.reset_mock()
+        capsys.readouterr()
+
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file), "--resume"])
+        process.main()
+
+        assert generate.call_count == 1
+        out = capsys.readouterr().out
+        assert "2 clips analyzed there" in out
+        assert "2/2 clips successfully" in out
+        assert "Reused: 1 clips" in out
+
+    def test_process_without_resume_reanalyzes_everything(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_gemini_response,
+        sample_openai_transcription,
+        temp_dir,
+    ):
+        """Test that results from the previous run are ignored without --resume."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file)])
+        previous_run = temp_dir / "output" / "test_export_2025-12-22_120000"
+        previous_run.mkdir(parents=True)
+        (previous_run / "enriched_metadata.json").write_text(
+            json.dumps({"clips": [{"filename": "audio/clip_001.webm", "analysis": {}}]})
+        )
+
+        mock_analyze = mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        process.main()
+
+        assert mock_analyze.call_count == 2
+
+    def test_process_ignores_unreadable_previous_run(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_gemini_response,
+        sample_openai_transcription,
+        capsys,
+        temp_dir,
+    ):
+        """Test that a corrupt results file from the last run is skipped instead of aborting."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file), "--resume"])
+        previous_run = temp_dir / "output" / "test_export_2025-12-22_120000"
+        previous_run.mkdir(parents=True)
+        (previous_run / "enriched_metadata.json").write_text('{"clips": [')
+
+        mock_analyze = mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        process.main()
+
+        assert mock_analyze.call_count == 2
+        out = capsys.readouterr().out
+        assert "Could not resume" in out
+        assert "2/2 clips successfully" in out
+
+    def test_process_batch_size_flag(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_gemini_response,
+        sample_openai_transcription,
+        temp_dir,
+    ):
+        """Test that --batch-size sends several clips in one Gemini request."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file), "--batch-size", "4"])
+        monkeypatch.chdir(temp_dir)
+
+        mock_batch = mocker.patch(
+            "process.analyze_audio_batch",
+            side_effect=lambda audio_paths, *args, **kwargs: (
+                [sample_gemini_response] * len(audio_paths)
+            ),
+        )
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        process.main()
+
+        mock_batch.assert_called_once()
+        assert len(mock_batch.call_args.args[0]) == 2
+
+    def test_process_batch_size_flag_analysis_failure(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_openai_transcription,
+        capsys,
+    ):
+        """Test that a failed batch analysis still saves each clip's transcript."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(sys, "argv", ["process.py", str(sample_zip_file), "--batch-size", "4"])
+
+        mocker.patch("process.analyze_audio_batch", side_effect=RuntimeError("upload failed"))
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        process.main()
+
+        assert "Analysis failed: upload failed" in capsys.readouterr().out
+        output_files = list(Path("output").glob("*/enriched_metadata.json"))
+        clips = json.loads(output_files[0].read_text())["clips"]
+        assert [clip["analysisError"] for clip in clips] == ["upload failed", "upload failed"]
+        assert [clip["transcript"] for clip in clips] == [
+            sample_openai_transcription["transcript"]
+        ] * 2
+
+    def test_process_concurrency_and_rps_flags(
+        self,
+        sample_zip_file,
+        monkeypatch,
+        mocker,
+        sample_gemini_response,
+        sample_openai_transcription,
+        temp_dir,
+    ):
+        """Test that --concurrency and --rps reach process_clips."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["process.py", str(sample_zip_file), "--concurrency", "2", "--rps", "50"],
+        )
+        monkeypatch.chdir(temp_dir)
+
+        mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+        spy = mocker.spy(process, "process_clips")
+
+        process.main()
+
+        assert spy.call_args.kwargs["max_workers"] == 2
+        assert spy.call_args.kwargs["rate_limiter"].requests_per_second == 50
+
+    def test_process_concurrent_run_prints_only_from_main_thread(
+        self, sample_zip_file, monkeypatch, mocker, mock_genai_module, mock_gemini_client
+    ):
+        """Test that a whole --concurrency run, with the real API wrappers, prints in one thread."""
+        monkeypatch.setenv("GEMINI_API_KEY", "fake_key")
+        monkeypatch.setenv("OPENAI_API_KEY", "fake_openai_key")
+        monkeypatch.setattr(
+            sys, "argv", ["process.py", str(sample_zip_file), "--concurrency", "4", "--verbose"]
+        )
+        printing_threads = set()
+
+        def record_print(*args, **kwargs):
+            printing_threads.add(threading.current_thread())
+
+        mocker.patch("builtins.print", side_effect=record_print)
+        openai_client = mocker.Mock()
+        openai_client.audio.transcriptions.create.return_value.model_dump.return_value = {
+            "segments": [{"start": 0.0, "speaker": "A", "text": "Look at that!"}]
+        }
+        mocker.patch("transcribe.OpenAI", return_value=openai_client)
+
+        process.main()
+
+        assert mock_gemini_client.files.upload.call_count == 2
+        assert openai_client.audio.transcriptions.create.call_count == 2
+        assert printing_threads == {threading.main_thread()}
+
     def test_process_verbose_flag(
         self,
         sample_zip_file,
@@ -223,8 +471,8 @@ class TestProcessMain:
 
         captured = capsys.readouterr()
 
-        # Verify error was reported but processing continued
-        assert "Analysis failed" in captured.out
+        # Verify error was reported with its details but processing continued
+        assert "Analysis failed: Analysis failed: Mock error" in captured.out
         assert "1/2 clips successfully" in captured.out
         assert "Errors: 1" in captured.out
 
@@ -325,7 +573,7 @@ class TestProcessMain:
 
         audio_dir = extract_dir / "audio"
         audio_dir.mkdir()
-        (audio_dir / "clip_001.webm").write_bytes(b"\x1a\x45\xdf\xa3")
+        (audio_dir / "clip_001.webm").write_bytes(WEBM_STUB)
 
         zip_path = temp_dir / "old_export.zip"
         with zipfile.ZipFile(zip_path, "w") as zipf:
@@ -405,7 +653,7 @@ class TestProcessMain:
 
         audio_dir = extract_dir / "audio"
         audio_dir.mkdir()
-        (audio_dir / "clip_001.webm").write_bytes(b"\x1a\x45\xdf\xa3")
+        (audio_dir / "clip_001.webm").write_bytes(WEBM_STUB)
 
         zip_path = temp_dir / "minimal_export.zip"
         with zipfile.ZipFile(zip_path, "w") as zipf:
@@ -540,7 +788,7 @@ class TestProcessMain:
         captured = capsys.readouterr()
 
         # Verify exception was caught and processing continued
-        assert "Processing failed:" in captured.out
+        assert "Analysis failed:" in captured.out
         assert "Unexpected error" in captured.out
         assert "1/2 clips successfully" in captured.out
         assert "Errors: 1" in captured.out
@@ -583,6 +831,43 @@ class TestBuildClipContext:
         assert context["storyBeatContext"] == "Story about the bridge"
         assert context["recordedAt"] == "2025-12-22T10:00:00.000Z"
 
+    def test_build_context_prefers_story_beat_summary(self):
+        """A story beat's summary is used instead of its full text."""
+        clip = {"storyBeatId": "beat-1"}
+        story_beats_lookup = {"beat-1": {"id": "beat-1", "text": "The full story", "starred": True}}
+
+        context = process.build_clip_context(
+            clip, [], story_beats_lookup, {"beat-1": "Short summary"}
+        )
+
+        assert context["storyBeatContext"] == "Short summary"
+        assert context["storyBeatStarred"] is True
+
+    def test_build_context_ignores_inline_context_for_story_beat_id(self):
+        """The legacy inline storyBeatContext is only used when there is no storyBeatId."""
+        clip = {"storyBeatId": "missing-beat", "storyBeatContext": "Legacy context"}
+
+        context = process.build_clip_context(clip, [], {"beat-1": {"id": "beat-1"}})
+
+        assert "storyBeatContext" not in context
+
+    def test_build_context_shares_travelers_and_story_beat_text(self):
+        """Contexts reference the shared travelers list and story beat text rather than copying them."""
+        travelers = [{"name": "Alice", "age": 9}]
+        story_beats_lookup = {"beat-1": {"id": "beat-1", "text": "A long story " * 100}}
+        clips = [
+            {"storyBeatId": "beat-1", "recordedAt": f"2025-12-22T10:0{i}:00.000Z"} for i in range(2)
+        ]
+
+        first, second = (
+            process.build_clip_context(clip, travelers, story_beats_lookup) for clip in clips
+        )
+
+        assert first["travelers"] is travelers
+        assert second["travelers"] is travelers
+        assert first["storyBeatContext"] is second["storyBeatContext"]
+        assert first["recordedAt"] != second["recordedAt"]
+
     def test_build_context_with_empty_travelers(self):
         """Test building context with empty travelers list."""
         clip = {"recordedAt": "2025-12-22T10:00:00.000Z"}
@@ -736,6 +1021,19 @@ class TestBuildStoryBeatsLookup:
         assert "beat_1" in lookup
 
 
+class TestCountStarredStoryBeats:
+    """Tests for count_starred_story_beats function."""
+
+    def test_counts_only_starred(self):
+        """Beats without a truthy starred flag aren't counted."""
+        lookup: dict[str, dict[str, Any]] = {
+            "a": {"id": "a", "starred": True},
+            "b": {"id": "b", "starred": False},
+            "c": {"id": "c"},
+        }
+        assert process.count_starred_story_beats(lookup) == 1
+
+
 class TestProcessingStats:
     """Tests for ProcessingStats dataclass."""
 
@@ -758,6 +1056,15 @@ class TestProcessingStats:
 
         assert "speech" not in stats2.audio_type_counts
 
+    def test_audio_type_counts_start_at_zero(self):
+        """Unseen audio types count as zero, so they can be incremented directly."""
+        stats = process.ProcessingStats()
+
+        stats.audio_type_counts["speech"] += 1
+
+        assert stats.audio_type_counts["ambient"] == 0
+        assert stats.audio_type_counts == {"speech": 1}
+
     def test_stats_modification(self):
         """Test modifying stats values."""
         stats = process.ProcessingStats()
@@ -776,6 +1083,573 @@ class TestProcessingStats:
         assert stats.total_audio_events == 50
 
 
+class TestConcurrentProcessing:
+    """Tests for processing clips concurrently."""
+
+    @pytest.fixture
+    def clip_folder(self, temp_dir):
+        """Extracted folder with three clips."""
+        clips = []
+        for idx in range(3):
+            filename = f"clip_{idx}.webm"
+            (temp_dir / filename).write_bytes(WEBM_STUB)
+            clips.append({"filename": filename})
+        return temp_dir, clips
+
+    def run_clips(self, clips, folder, max_workers, batch_size=1):
+        """Run process_clips with fake API keys and no voice references."""
+        return process.process_clips(
+            clips,
+            str(folder),
+            [],
+            {},
+            {},
+            process.ApiKeys(gemini="fake_key", openai="fake_openai_key"),
+            [],
+            verbose=False,
+            dry_run=False,
+            max_workers=max_workers,
+            batch_size=batch_size,
+        )
+
+    def test_api_calls_overlap(self, clip_folder, mocker, sample_openai_transcription):
+        """With several workers, clips are analyzed at the same time."""
+        folder, clips = clip_folder
+        barrier = threading.Barrier(len(clips), timeout=5)
+
+        def fake_analyze(audio_path, api_key, context=None, reuse_uploads=None):
+            barrier.wait()  # Times out unless all clips are in flight together
+            return {"audioType": Path(audio_path).stem, "audioEvents": []}
+
+        mocker.patch("process.analyze_audio", side_effect=fake_analyze)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=len(clips))
+
+        assert stats.processed_count == 3
+        assert stats.error_count == 0
+        assert [c["analysis"]["audioType"] for c in clips] == ["clip_0", "clip_1", "clip_2"]
+
+    def test_transcription_overlaps_analysis(self, clip_folder, mocker):
+        """A clip's OpenAI and Gemini calls run at the same time, even when serial."""
+        folder, clips = clip_folder
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_transcribe(audio_path, api_key):
+            barrier.wait()  # Times out unless the analysis is in flight too
+            return {"transcript": []}
+
+        def fake_analyze(audio_path, api_key, context=None, reuse_uploads=None):
+            barrier.wait()
+            return {"audioType": "conversation", "audioEvents": []}
+
+        mocker.patch("process.transcribe_without_diarization", side_effect=fake_transcribe)
+        mocker.patch("process.analyze_audio", side_effect=fake_analyze)
+
+        stats = self.run_clips(clips, folder, max_workers=1)
+
+        assert stats.processed_count == 3
+
+    def test_output_stays_in_clip_order(
+        self, clip_folder, mocker, sample_openai_transcription, capsys
+    ):
+        """Results are reported in clip order even when later clips finish first."""
+        folder, clips = clip_folder
+        first_clip_done = threading.Event()
+
+        def fake_analyze(audio_path, api_key, context=None, reuse_uploads=None):
+            if Path(audio_path).stem == "clip_0":
+                first_clip_done.set()
+            else:
+                first_clip_done.wait(timeout=5)
+            return {"audioType": Path(audio_path).stem, "audioEvents": []}
+
+        mocker.patch("process.analyze_audio", side_effect=fake_analyze)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        self.run_clips(clips, folder, max_workers=3)
+
+        out = capsys.readouterr().out
+        positions = [out.index(f"✓ clip_{idx},") for idx in range(3)]
+        assert positions == sorted(positions)
+        assert out.index("Processing clip 2/3") < positions[1] < out.index("Processing clip 3/3")
+
+    @pytest.mark.parametrize("batch_size", [1, 2])
+    def test_only_main_thread_prints(
+        self, clip_folder, mocker, mock_genai_module, mock_gemini_client, batch_size
+    ):
+        """Nothing on the worker side, including the real API wrappers, writes to stdout."""
+        folder, clips = clip_folder
+        printing_threads = set()
+
+        def record_print(*args, **kwargs):
+            printing_threads.add(threading.current_thread())
+
+        mocker.patch("builtins.print", side_effect=record_print)
+        mocker.patch("analyze.time.sleep")
+        # One transient failure so the retry path runs too
+        generate = mock_gemini_client.models.generate_content
+        generate.side_effect = [errors.ServerError(503, {})] + [generate.return_value] * len(clips)
+        openai_client = mocker.Mock()
+        openai_client.audio.transcriptions.create.return_value.model_dump.return_value = {
+            "segments": [{"start": 0.0, "speaker": "A", "text": "Look at that!"}]
+        }
+        mocker.patch("transcribe.OpenAI", return_value=openai_client)
+
+        self.run_clips(clips, folder, max_workers=3, batch_size=batch_size)
+
+        assert generate.call_count > 1
+        assert openai_client.audio.transcriptions.create.call_count == len(clips)
+        assert printing_threads == {threading.main_thread()}
+
+    def test_stats_tallied_from_concurrent_results(
+        self, clip_folder, mocker, sample_openai_transcription
+    ):
+        """Statistics from clips analyzed in parallel add up exactly."""
+        folder, clips = clip_folder
+        audio_types = {"clip_0": "conversation", "clip_1": "singing", "clip_2": "conversation"}
+
+        def fake_analyze(audio_path, api_key, context=None, reuse_uploads=None):
+            return {"audioType": audio_types[Path(audio_path).stem], "audioEvents": [{}, {}]}
+
+        mocker.patch("process.analyze_audio", side_effect=fake_analyze)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=3)
+
+        assert stats.audio_type_counts == Counter({"conversation": 2, "singing": 1})
+        assert stats.total_audio_events == 6
+        assert stats.total_utterances == 3 * len(sample_openai_transcription["transcript"])
+
+    def test_checkpoints_partial_results(
+        self, clip_folder, mocker, sample_openai_transcription, temp_dir
+    ):
+        """Results so far are saved every CHECKPOINT_INTERVAL clips."""
+        folder, clips = clip_folder
+        mocker.patch("process.CHECKPOINT_INTERVAL", 2)
+        mocker.patch(
+            "process.analyze_audio", return_value={"audioType": "conversation", "audioEvents": []}
+        )
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+        saved = []
+        mocker.patch(
+            "process.write_json_atomic",
+            side_effect=lambda metadata, path: saved.append(json.loads(json.dumps(metadata))),
+        )
+        metadata = {"clips": clips}
+
+        process.process_clips(
+            clips,
+            str(folder),
+            [],
+            {},
+            {},
+            process.ApiKeys(gemini="fake_key", openai="fake_openai_key"),
+            [],
+            verbose=False,
+            dry_run=False,
+            metadata=metadata,
+            results_path=temp_dir / "enriched_metadata.json",
+        )
+
+        assert len(saved) == 1
+        assert [bool(clip.get("analysis")) for clip in saved[0]["clips"]] == [True, True, False]
+
+    def test_worker_exception_recorded_on_clip(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription, capsys
+    ):
+        """An exception in a worker thread fails only that clip, keeping its transcript."""
+        folder, clips = clip_folder
+
+        def fake_analyze(audio_path, api_key, context=None, reuse_uploads=None):
+            if Path(audio_path).stem == "clip_1":
+                raise RuntimeError("Unexpected error during analysis")
+            return sample_gemini_response
+
+        mocker.patch("process.analyze_audio", side_effect=fake_analyze)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=3)
+
+        assert stats.processed_count == 2
+        assert stats.error_count == 1
+        # Failed clips keep the transcript at the top level, next to a null analysis
+        assert clips[1]["analysis"] is None
+        assert clips[1]["analysisError"] == "Unexpected error during analysis"
+        assert clips[1]["transcript"] == sample_openai_transcription["transcript"]
+        # Analyzed clips keep it inside the analysis only
+        assert clips[0]["analysis"]["transcript"] == sample_openai_transcription["transcript"]
+        assert "transcript" not in clips[0]
+        assert "Analysis failed: Unexpected error" in capsys.readouterr().out
+
+    def test_transcription_failure_keeps_analysis(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription, capsys
+    ):
+        """A clip whose transcription fails still records its Gemini analysis."""
+        folder, clips = clip_folder
+
+        def fake_transcribe(audio_path, api_key):
+            if Path(audio_path).stem == "clip_1":
+                raise RuntimeError("OpenAI is down")
+            return sample_openai_transcription
+
+        mocker.patch("process.transcribe_without_diarization", side_effect=fake_transcribe)
+        mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+
+        stats = self.run_clips(clips, folder, max_workers=3)
+
+        assert stats.processed_count == 3
+        assert stats.transcription_error_count == 1
+        assert clips[1]["analysis"]["audioType"] == sample_gemini_response["audioType"]
+        assert clips[1]["analysis"]["transcript"] == []
+        assert clips[1]["transcriptionError"] == "OpenAI is down"
+        assert "Transcription failed: OpenAI is down" in capsys.readouterr().out
+
+    def test_missing_file_not_submitted(self, clip_folder, mocker, sample_gemini_response):
+        """Clips whose audio file is missing fail without calling the APIs."""
+        folder, clips = clip_folder
+        (folder / "clip_2.webm").unlink()
+        mock_analyze = mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch("process.transcribe_without_diarization", return_value={"transcript": []})
+
+        stats = self.run_clips(clips, folder, max_workers=3)
+
+        assert mock_analyze.call_count == 2
+        assert stats.error_count == 1
+        assert "Audio file not found" in clips[2]["analysisError"]
+
+    def test_unreadable_clip_skipped_before_api_calls(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription, capsys
+    ):
+        """Clips with broken audio are reported up front and never sent to the APIs."""
+        folder, clips = clip_folder
+        (folder / "clip_1.webm").write_bytes(b"")
+        mock_analyze = mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=2)
+
+        out = capsys.readouterr().out
+        assert "Warning: Skipping clip_1.webm: Audio file is empty" in out
+        assert "Preflight: 1/3 clips can't be processed" in out
+        assert sorted(Path(call.args[0]).name for call in mock_analyze.call_args_list) == [
+            "clip_0.webm",
+            "clip_2.webm",
+        ]
+        assert "Audio file is empty" in clips[1]["analysisError"]
+        assert stats.error_count == 1
+
+    def test_bad_webm_header_skips_only_that_clip_in_dry_run(self, clip_folder, capsys):
+        """A .webm file without a WebM header warns and skips that clip; the run carries on."""
+        folder, clips = clip_folder
+        (folder / "clip_1.webm").write_bytes(b"<html>not audio</html>")
+
+        stats = process.process_clips(
+            clips, str(folder), [], {}, {}, None, [], verbose=False, dry_run=True, max_workers=1
+        )
+
+        out = capsys.readouterr().out
+        assert "Warning: Skipping clip_1.webm: Audio file is not a valid WebM file" in out
+        assert out.count("[DRY RUN] Would analyze") == 2
+        assert "not a valid WebM" in clips[1]["analysisError"]
+        assert "analysisError" not in clips[0]
+        assert "analysisError" not in clips[2]
+        assert stats.error_count == 1
+
+    def test_serial_prefetches_next_clip(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription
+    ):
+        """One clip at a time, the next clip's file is prefetched before the API calls."""
+        folder, clips = clip_folder
+        prefetch = mocker.patch("process.prefetch_file")
+        mocker.patch("process.analyze_audio", return_value=sample_gemini_response)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        self.run_clips(clips, folder, max_workers=1)
+
+        assert [call.args[0].name for call in prefetch.call_args_list] == [
+            "clip_1.webm",
+            "clip_2.webm",
+        ]
+
+    def test_serial_prefetch_window(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription
+    ):
+        """Files are prefetched PREFETCH_DEPTH clips ahead, each exactly once."""
+        folder, clips = clip_folder
+        mocker.patch.object(process, "PREFETCH_DEPTH", 1)
+        events = []
+        mocker.patch(
+            "process.prefetch_file", side_effect=lambda path: events.append(f"prefetch {path.name}")
+        )
+
+        def analyze(audio_path, *args, **kwargs):
+            events.append(f"analyze {Path(audio_path).name}")
+            return sample_gemini_response
+
+        mocker.patch("process.analyze_audio", side_effect=analyze)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        self.run_clips(clips, folder, max_workers=1)
+
+        assert events == [
+            "prefetch clip_1.webm",
+            "analyze clip_0.webm",
+            "prefetch clip_2.webm",
+            "analyze clip_1.webm",
+            "analyze clip_2.webm",
+        ]
+
+    def test_batches_clips_into_one_gemini_request(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription
+    ):
+        """With a batch size, clips are analyzed batch_size at a time and recorded in order."""
+        folder, clips = clip_folder
+        mock_analyze = mocker.patch("process.analyze_audio")
+
+        def fake_analyze_batch(audio_paths, api_key, contexts=None, reuse_uploads=None):
+            return [
+                {**sample_gemini_response, "sceneDescription": Path(audio_path).name}
+                for audio_path in audio_paths
+            ]
+
+        mock_batch = mocker.patch("process.analyze_audio_batch", side_effect=fake_analyze_batch)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=1, batch_size=2)
+
+        mock_analyze.assert_not_called()
+        assert [len(call.args[0]) for call in mock_batch.call_args_list] == [2, 1]
+        assert [clip["analysis"]["sceneDescription"] for clip in clips] == [
+            "clip_0.webm",
+            "clip_1.webm",
+            "clip_2.webm",
+        ]
+        assert stats.processed_count == 3
+
+    def test_batch_failure_fails_each_clip_in_batch(
+        self, clip_folder, mocker, sample_gemini_response, sample_openai_transcription
+    ):
+        """An exception for one batch is recorded on its clips only, keeping their transcripts."""
+        folder, clips = clip_folder
+
+        def fake_analyze_batch(audio_paths, api_key, contexts=None, reuse_uploads=None):
+            if len(audio_paths) == 2:
+                raise RuntimeError("boom")
+            return [sample_gemini_response]
+
+        mocker.patch("process.analyze_audio_batch", side_effect=fake_analyze_batch)
+        mocker.patch(
+            "process.transcribe_without_diarization", return_value=sample_openai_transcription
+        )
+
+        stats = self.run_clips(clips, folder, max_workers=2, batch_size=2)
+
+        assert clips[0]["analysisError"] == "boom"
+        assert clips[1]["analysisError"] == "boom"
+        assert clips[0]["transcript"] == sample_openai_transcription["transcript"]
+        assert clips[1]["transcript"] == sample_openai_transcription["transcript"]
+        assert clips[2]["analysis"]["audioType"] == "speech"
+        assert stats.error_count == 2
+        assert stats.processed_count == 1
+
+
+class TestIndexClipFiles:
+    """Tests for index_clip_files function."""
+
+    def test_indexes_each_folder_once(self, temp_dir, mocker):
+        """Files are listed with one directory read per folder clips point into."""
+        (temp_dir / "audio").mkdir()
+        for name in ("clip_001.webm", "clip_002.webm"):
+            (temp_dir / "audio" / name).write_bytes(WEBM_STUB)
+        (temp_dir / "root_clip.webm").write_bytes(WEBM_STUB)
+        clips = [
+            {"filename": "audio/clip_001.webm"},
+            {"filename": "audio/clip_002.webm"},
+            {"filename": "audio/missing.webm"},
+            {"filename": "root_clip.webm"},
+        ]
+        scandir = mocker.spy(process.os, "scandir")
+
+        existing = process.index_clip_files(str(temp_dir), clips)
+
+        assert existing == {"audio/clip_001.webm", "audio/clip_002.webm", "root_clip.webm"}
+        assert scandir.call_count == 2
+
+    def test_missing_folder(self, temp_dir):
+        """Clips in a folder that doesn't exist are simply not indexed."""
+        existing = process.index_clip_files(str(temp_dir), [{"filename": "nope/clip.webm"}])
+
+        assert existing == set()
+
+    def test_check_audio_header_accepts_webm(self, temp_dir):
+        """Files starting with the WebM header pass."""
+        path = temp_dir / "clip.webm"
+        path.write_bytes(WEBM_STUB)
+
+        process.check_audio_header(path)
+
+    def test_check_audio_header_rejects_empty_file(self, temp_dir):
+        """Empty files are rejected whatever their extension."""
+        path = temp_dir / "clip.m4a"
+        path.write_bytes(b"")
+
+        with pytest.raises(ValueError, match="empty"):
+            process.check_audio_header(path)
+
+    def test_check_audio_header_rejects_bad_webm(self, temp_dir):
+        """A .webm file without the EBML header is rejected."""
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"<html>not audio</html>")
+
+        with pytest.raises(ValueError, match="not a valid WebM"):
+            process.check_audio_header(path)
+
+    def test_prepare_clip_looks_up_story_beat_once(self, temp_dir):
+        """The story beat is looked up once for both the context and the enriched clip."""
+
+        class CountingLookup(dict):
+            lookups = 0
+
+            def get(self, key, default=None):
+                CountingLookup.lookups += 1
+                return super().get(key, default)
+
+        lookup = CountingLookup(
+            {"beat-1": {"id": "beat-1", "text": "The Eiffel Tower", "starred": True}}
+        )
+        clip = {"filename": "clip.webm", "storyBeatId": "beat-1"}
+
+        prepared = process.prepare_clip(
+            clip, str(temp_dir), [], lookup, {}, existing_files={"clip.webm"}
+        )
+
+        assert CountingLookup.lookups == 1
+        assert prepared.context["storyBeatContext"] == "The Eiffel Tower"
+        assert prepared.context["storyBeatStarred"] is True
+        assert clip["storyBeat"] == {"id": "beat-1", "text": "The Eiffel Tower", "starred": True}
+
+    def test_prepare_clip_uses_index(self, temp_dir):
+        """prepare_clip checks the index instead of the filesystem when given one."""
+        clip = {"filename": "audio/clip_001.webm"}
+
+        prepared = process.prepare_clip(
+            clip, str(temp_dir), [], {}, {}, existing_files={"audio/clip_001.webm"}
+        )
+        missing = process.prepare_clip(clip, str(temp_dir), [], {}, {}, existing_files=set())
+
+        assert prepared.error is None
+        assert prepared.audio_path == temp_dir / "audio" / "clip_001.webm"
+        assert isinstance(missing.error, FileNotFoundError)
+
+    def test_prepare_clip_without_index_requires_a_file(self, temp_dir):
+        """Without an index, a directory with the clip's name doesn't count as its audio."""
+        (temp_dir / "clip_001.webm").mkdir()
+
+        prepared = process.prepare_clip({"filename": "clip_001.webm"}, temp_dir, [], {}, {})
+
+        assert isinstance(prepared.error, FileNotFoundError)
+
+
+class TestGetMaxWorkers:
+    """Tests for get_max_workers function."""
+
+    def test_default(self, monkeypatch):
+        """Without TC_CONCURRENCY clips are processed one at a time."""
+        monkeypatch.delenv("TC_CONCURRENCY", raising=False)
+        assert process.get_max_workers() == 1
+
+    def test_from_environment(self, monkeypatch):
+        """TC_CONCURRENCY overrides the default."""
+        monkeypatch.setenv("TC_CONCURRENCY", "3")
+        assert process.get_max_workers() == 3
+
+    def test_serial_flag(self, monkeypatch):
+        """--serial always means one worker."""
+        monkeypatch.setenv("TC_CONCURRENCY", "3")
+        assert process.get_max_workers(serial=True) == 1
+
+    def test_concurrency_argument(self, monkeypatch):
+        """--concurrency overrides TC_CONCURRENCY, but not --serial."""
+        monkeypatch.setenv("TC_CONCURRENCY", "3")
+        assert process.get_max_workers(concurrency=5) == 5
+        assert process.get_max_workers(concurrency=0) == 1
+        assert process.get_max_workers(serial=True, concurrency=5) == 1
+
+    @pytest.mark.parametrize("value", ["0", "-2", "lots"])
+    def test_invalid_values(self, monkeypatch, value):
+        """Non-positive values mean one worker; non-numbers use the default."""
+        monkeypatch.setenv("TC_CONCURRENCY", value)
+        expected = process.DEFAULT_MAX_WORKERS if value == "lots" else 1
+        assert process.get_max_workers() == expected
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter class."""
+
+    @pytest.fixture
+    def fake_clock(self, mocker):
+        """Replace time.monotonic and time.sleep with a clock that sleeping advances."""
+
+        class FakeClock:
+            def __init__(self) -> None:
+                self.now = 100.0
+                self.sleeps: list[float] = []
+
+        clock = FakeClock()
+
+        def fake_sleep(seconds):
+            clock.sleeps.append(seconds)
+            clock.now += seconds
+
+        mocker.patch("process.time.monotonic", side_effect=lambda: clock.now)
+        mocker.patch("process.time.sleep", side_effect=fake_sleep)
+        return clock
+
+    def test_spaces_requests(self, fake_clock):
+        """After the first request, each one waits for the next token."""
+        limiter = process.RateLimiter(requests_per_second=4)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert fake_clock.sleeps == pytest.approx([0.25, 0.25])
+
+    def test_burst_allows_immediate_requests(self, fake_clock):
+        """Up to `burst` requests start without waiting after an idle period."""
+        limiter = process.RateLimiter(requests_per_second=2, burst=3)
+
+        for _ in range(3):
+            limiter.acquire()
+        assert fake_clock.sleeps == []
+
+        limiter.acquire()
+        assert fake_clock.sleeps == pytest.approx([0.5])
+
+    def test_rejects_non_positive_rate(self):
+        """A rate of zero would never allow a request."""
+        with pytest.raises(ValueError):
+            process.RateLimiter(requests_per_second=0)
+
+
 class TestGenerateOutputDir:
     """Tests for generate_output_dir function."""
 
@@ -806,6 +1680,53 @@ class TestGenerateOutputDir:
         assert "my trip export_" in result
 
 
+class TestPreviousResults:
+    """Tests for find_previous_results and load_previous_analyses."""
+
+    def write_results(self, run_dir, clips):
+        """Save an enriched_metadata.json with the given clips in run_dir."""
+        run_dir.mkdir(parents=True)
+        results_path = run_dir / "enriched_metadata.json"
+        results_path.write_text(json.dumps({"clips": clips}))
+        return results_path
+
+    def test_finds_newest_run_for_zip(self, temp_dir):
+        """The most recent run on the same ZIP wins; other ZIPs' runs are ignored."""
+        self.write_results(temp_dir / "trip_2025-12-20_090000", [])
+        newest = self.write_results(temp_dir / "trip_2025-12-21_090000", [])
+        self.write_results(temp_dir / "trip_v2_2025-12-22_090000", [])
+        (temp_dir / "trip_2025-12-23_090000").mkdir()  # Run that never saved results
+
+        assert process.find_previous_results("/exports/trip.zip", str(temp_dir)) == newest
+
+    def test_no_previous_run(self, temp_dir):
+        """Test that a missing output directory means there is nothing to reuse."""
+        assert process.find_previous_results("trip.zip", str(temp_dir / "missing")) is None
+
+    def test_loads_only_successful_analyses(self, temp_dir):
+        """Clips with a failed analysis or transcription are left out so the next run retries them."""
+        results_path = self.write_results(
+            temp_dir / "trip_2025-12-20_090000",
+            [
+                {"filename": "a.webm", "recordedAt": "t1", "analysis": {"audioType": "singing"}},
+                {"filename": "b.webm", "analysis": None, "analysisError": "timeout"},
+                {"filename": "c.webm", "analysis": {"audioType": "conversation"}},
+                {
+                    "filename": "d.webm",
+                    "analysis": {"audioType": "speech", "transcript": []},
+                    "transcriptionError": "timeout",
+                },
+            ],
+        )
+
+        analyses = process.load_previous_analyses(results_path)
+
+        assert analyses == {
+            ("a.webm", "t1"): {"audioType": "singing"},
+            ("c.webm", None): {"audioType": "conversation"},
+        }
+
+
 class TestDetectVoiceReference:
     """Tests for detect_voice_reference function."""
 
@@ -913,6 +1834,34 @@ class TestLoadVoiceReferences:
         assert result == []
 
 
+class TestEncodeVoiceReferencesInBackground:
+    """Tests for encode_voice_references_in_background function."""
+
+    def test_no_voice_references(self):
+        """Test that nothing is started without voice references."""
+        assert process.encode_voice_references_in_background([]) is None
+
+    def test_encodes_off_the_main_thread(self, temp_dir, mocker):
+        """The voice references are encoded on another thread and the data URLs returned."""
+        ref_path = temp_dir / "alice.webm"
+        ref_path.write_bytes(WEBM_STUB)
+        encoding_threads = []
+
+        def fake_load(paths):
+            encoding_threads.append(threading.current_thread())
+            return [f"data:{path.name}" for path in paths]
+
+        mocker.patch("process.load_voice_reference_data_urls", side_effect=fake_load)
+
+        future = process.encode_voice_references_in_background(
+            [process.VoiceReference(traveler={"name": "Alice"}, file_path=ref_path)]
+        )
+
+        assert future is not None
+        assert future.result(timeout=5) == ["data:alice.webm"]
+        assert encoding_threads[0] is not threading.main_thread()
+
+
 class TestPrintVoiceReferenceSummary:
     """Tests for print_voice_reference_summary function."""
 
@@ -1039,7 +1988,7 @@ class TestPrintFinalSummary:
         stats = process.ProcessingStats(
             processed_count=8,
             error_count=2,
-            audio_type_counts={"speech": 6, "ambient": 2},
+            audio_type_counts=Counter({"speech": 6, "ambient": 2}),
             total_utterances=50,
             total_audio_events=20,
         )
@@ -1054,12 +2003,24 @@ class TestPrintFinalSummary:
         assert "50 utterances transcribed" in captured.out
         assert "20 audio events detected" in captured.out
 
+    def test_summary_lists_most_common_audio_type_first(self, capsys):
+        """The audio type breakdown is ordered by count, highest first."""
+        stats = process.ProcessingStats(
+            processed_count=9,
+            audio_type_counts=Counter({"ambient": 2, "speech": 6, "music": 1}),
+        )
+
+        process.print_final_summary(stats, num_clips=9, story_beats_lookup={}, dry_run=False)
+
+        captured = capsys.readouterr()
+        assert "6 speech, 2 ambient, 1 music" in captured.out
+
     def test_summary_no_errors(self, capsys):
         """Test summary output with no errors."""
         stats = process.ProcessingStats(
             processed_count=5,
             error_count=0,
-            audio_type_counts={"speech": 5},
+            audio_type_counts=Counter({"speech": 5}),
             total_utterances=25,
             total_audio_events=10,
         )
@@ -1075,7 +2036,7 @@ class TestPrintFinalSummary:
         stats = process.ProcessingStats(
             processed_count=5,
             error_count=0,
-            audio_type_counts={"speech": 5},
+            audio_type_counts=Counter({"speech": 5}),
             total_utterances=25,
             total_audio_events=10,
             clips_with_story_beats=3,
@@ -1118,6 +2079,23 @@ class TestPrintTripSummary:
         assert len(travelers) == 4
         assert story_beats_lookup == {}  # No story beats in sample_metadata
 
+    def test_trip_summary_is_a_single_write(self, sample_metadata, mocker):
+        """The whole summary goes to stdout in one print call."""
+        mock_print = mocker.patch("process.print", create=True)
+
+        process.print_trip_summary(sample_metadata)
+
+        assert mock_print.call_count == 1
+        assert "Trip Name: Test Trip\n" in mock_print.call_args.args[0]
+
+    def test_trip_summary_traveler_with_null_age(self, capsys):
+        """Travelers are listed the same way as in prompts, so a null age isn't printed."""
+        process.print_trip_summary({"travelers": [{"name": "Mom", "age": None}], "clips": []})
+
+        captured = capsys.readouterr()
+        assert "  - Mom\n" in captured.out
+        assert "age None" not in captured.out
+
     def test_trip_summary_old_format(self, capsys):
         """Test trip summary with old metadata format."""
         old_metadata = {
@@ -0,0 +1,182 @@
+# Tests for transcribe.py
+
+import base64
+
+import pytest
+
+import transcribe
+from transcribe import (
+    encode_audio_as_data_url,
+    format_timestamp,
+    load_voice_reference_data_urls,
+    segments_to_transcript,
+    transcribe_with_diarization,
+    transcribe_without_diarization,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_encoding_cache():
+    """Start each test with an empty voice reference encoding cache."""
+    transcribe._encode_audio_cached.cache_clear()
+    yield
+    transcribe._encode_audio_cached.cache_clear()
+
+
+@pytest.fixture
+def mock_openai_client(mocker):
+    """Mocks the OpenAI client used for transcription."""
+    mock_client = mocker.Mock()
+    mock_response = mocker.Mock()
+    mock_response.model_dump.return_value = {
+        "segments": [
+            {"start": 0.0, "speaker": "Alice", "text": " Look at that! "},
+            {"start": 3.2, "speaker": "Mom", "text": "   "},
+        ]
+    }
+    mock_client.audio.transcriptions.create.return_value = mock_response
+    mocker.patch("transcribe.OpenAI", return_value=mock_client)
+    return mock_client
+
+
+class TestEncodeAudioAsDataUrl:
+    """Tests for encode_audio_as_data_url function."""
+
+    def test_webm_data_url(self, webm_stub_file):
+        """WebM files should be encoded with the audio/webm MIME type."""
+        data_url = encode_audio_as_data_url(webm_stub_file)
+
+        prefix, encoded = data_url.split(",", 1)
+        assert prefix == "data:audio/webm;base64"
+        assert base64.b64decode(encoded) == webm_stub_file.read_bytes()
+
+    def test_mime_type_from_extension(self, temp_dir):
+        """Known extensions should map to their MIME type."""
+        path = temp_dir / "voice.m4a"
+        path.write_bytes(b"data")
+
+        assert encode_audio_as_data_url(path).startswith("data:audio/mp4;base64,")
+
+
+class TestLoadVoiceReferenceDataUrls:
+    """Tests for load_voice_reference_data_urls function."""
+
+    def test_preserves_order(self, temp_dir):
+        """Data URLs should come back in input order."""
+        paths = []
+        for name in ("a", "b", "c"):
+            path = temp_dir / f"{name}.webm"
+            path.write_bytes(name.encode())
+            paths.append(path)
+
+        data_urls = load_voice_reference_data_urls(paths)
+
+        assert data_urls == [encode_audio_as_data_url(p) for p in paths]
+
+    def test_empty(self):
+        """No paths should produce no data URLs."""
+        assert load_voice_reference_data_urls([]) == []
+
+    def test_reuses_encoding_for_unchanged_file(self, webm_stub_file, mocker):
+        """Unchanged files should only be encoded once per session."""
+        spy = mocker.spy(transcribe, "encode_audio_as_data_url")
+
+        load_voice_reference_data_urls([webm_stub_file])
+        load_voice_reference_data_urls([webm_stub_file])
+
+        assert spy.call_count == 1
+
+    def test_reencodes_changed_file(self, webm_stub_file, mocker):
+        """A modified file should be encoded again."""
+        first = load_voice_reference_data_urls([webm_stub_file])
+        webm_stub_file.write_bytes(b"different audio bytes")
+
+        second = load_voice_reference_data_urls([webm_stub_file])
+
+        assert first != second
+
+
+class TestTranscribeWithDiarization:
+    """Tests for transcribe_with_diarization function."""
+
+    def test_sends_existing_voice_references(self, temp_dir, webm_stub_file, mock_openai_client):
+        """Only voice references that exist should be sent, with matching names."""
+        alice_ref = temp_dir / "alice.webm"
+        alice_ref.write_bytes(b"alice")
+        voice_references = [
+            ({"name": "Alice"}, alice_ref),
+            ({"name": "Bob"}, temp_dir / "missing.webm"),
+        ]
+
+        result = transcribe_with_diarization(webm_stub_file, voice_references, "fake_key")
+
+        extra_body = mock_openai_client.audio.transcriptions.create.call_args[1]["extra_body"]
+        assert extra_body["known_speaker_names"] == ["Alice"]
+        assert extra_body["known_speaker_references"] == [encode_audio_as_data_url(alice_ref)]
+        assert result["_meta"]["voice_references"] == ["Alice"]
+
+    def test_cached_references_cost_one_stat_each(
+        self, temp_dir, webm_stub_file, mock_openai_client, mocker
+    ):
+        """Once encoded, each voice reference is only stat()ed once per transcription."""
+        refs = []
+        for name in ("alice", "bob"):
+            ref_path = temp_dir / f"{name}.webm"
+            ref_path.write_bytes(name.encode())
+            refs.append(({"name": name}, ref_path))
+        transcribe_with_diarization(webm_stub_file, refs, "fake_key")
+        encode = mocker.spy(transcribe, "encode_audio_as_data_url")
+        stat = mocker.spy(transcribe.Path, "stat")
+
+        transcribe_with_diarization(webm_stub_file, refs, "fake_key")
+
+        assert encode.call_count == 0
+        assert stat.call_count == 2
+
+    def test_skips_empty_segments(self, webm_stub_file, mock_openai_client):
+        """Blank segments should be dropped and text stripped."""
+        result = transcribe_with_diarization(webm_stub_file, [], "fake_key")
+
+        assert result["transcript"] == [
+            {"timestamp": "00:00", "speaker": "Alice", "text": "Look at that!"}
+        ]
+
+    def test_reuses_client_across_calls(self, webm_stub_file, mock_openai_client, mocker):
+        """One OpenAI client per API key is shared by all transcriptions."""
+        openai_class = mocker.patch("transcribe.OpenAI", return_value=mock_openai_client)
+
+        transcribe_with_diarization(webm_stub_file, [], "fake_key")
+        transcribe_without_diarization(webm_stub_file, "fake_key")
+        transcribe_without_diarization(webm_stub_file, "other_key")
+
+        assert openai_class.call_count == 2
+        assert mock_openai_client.audio.transcriptions.create.call_count == 3
+
+
+class TestFormatTimestamp:
+    """Tests for format_timestamp function."""
+
+    @pytest.mark.parametrize(
+        ("seconds", "expected"),
+        [(0, "00:00"), (5.9, "00:05"), (65, "01:05"), (3599, "59:59"), (6000, "100:00")],
+    )
+    def test_format(self, seconds, expected):
+        """Seconds are floored and formatted as MM:SS."""
+        assert format_timestamp(seconds) == expected
+
+
+class TestSegmentsToTranscript:
+    """Tests for segments_to_transcript function."""
+
+    def test_converts_segments(self):
+        """Segments become timestamped entries; blank text is skipped."""
+        segments = [
+            {"start": 1.2, "speaker": "Alice", "text": " Hi! "},
+            {"start": 2.0, "speaker": "Bob", "text": "  "},
+            {"start": 75, "text": "Waterfall!"},
+        ]
+
+        assert segments_to_transcript(segments) == [
+            {"timestamp": "00:01", "speaker": "Alice", "text": "Hi!"},
+            {"timestamp": "01:15", "speaker": "Unknown", "text": "Waterfall!"},
+        ]
@@ -0,0 +1,137 @@
+# Tests for upload_cache.py
+
+import hashlib
+import time
+
+import pytest
+from google.genai import errors
+
+import upload_cache
+from upload_cache import UploadCache, hash_file, is_upload_cache_enabled
+
+
+@pytest.fixture
+def uploaded_file(mock_gemini_client):
+    """The mock client's uploaded file, with the fields the cache stores."""
+    mock_uploaded_file = mock_gemini_client.files.upload.return_value
+    mock_uploaded_file.uri = "https://example.com/files/uploaded_file_name"
+    mock_uploaded_file.expiration_time = None
+    return mock_uploaded_file
+
+
+@pytest.fixture
+def cache(temp_dir):
+    """An UploadCache backed by a temporary database."""
+    with UploadCache(temp_dir / "cache.sqlite3") as upload_cache_db:
+        yield upload_cache_db
+
+
+class TestHashFile:
+    """Tests for hash_file function."""
+
+    def test_hash_matches_hashlib(self, webm_stub_file):
+        """Streaming hash should match a one-shot SHA-256 of the bytes."""
+        expected = hashlib.sha256(webm_stub_file.read_bytes()).hexdigest()
+        assert hash_file(webm_stub_file) == expected
+
+    def test_hash_spans_multiple_chunks(self, temp_dir, monkeypatch):
+        """Files larger than one chunk should hash identically."""
+        monkeypatch.setattr(upload_cache, "HASH_CHUNK_SIZE", 4)
+        path = temp_dir / "data.bin"
+        path.write_bytes(b"0123456789")
+
+        assert hash_file(path) == hashlib.sha256(b"0123456789").hexdigest()
+
+    def test_hash_empty_file(self, temp_dir):
+        """Empty files should hash to the SHA-256 of no bytes."""
+        path = temp_dir / "empty.bin"
+        path.write_bytes(b"")
+
+        assert hash_file(path) == hashlib.sha256(b"").hexdigest()
+
+
+class TestIsUploadCacheEnabled:
+    """Tests for is_upload_cache_enabled function."""
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Cache should be off unless the env var is set."""
+        monkeypatch.delenv("GEMINI_FILE_CACHE", raising=False)
+        assert is_upload_cache_enabled() is False
+
+    def test_enabled_with_env_var(self, monkeypatch):
+        """GEMINI_FILE_CACHE=1 should enable the cache."""
+        monkeypatch.setenv("GEMINI_FILE_CACHE", "1")
+        assert is_upload_cache_enabled() is True
+
+
+class TestUploadCache:
+    """Tests for UploadCache class."""
+
+    def test_get_missing_returns_none(self, cache):
+        """Unknown hashes should miss."""
+        assert cache.get("deadbeef") is None
+
+    def test_put_then_get(self, cache, uploaded_file):
+        """Stored uploads should be returned by hash."""
+        cache.put("deadbeef", uploaded_file, "audio/webm")
+        cached = cache.get("deadbeef")
+
+        assert cached is not None
+        assert cached.file_name == "uploaded_file_name"
+        assert cached.uri == "https://example.com/files/uploaded_file_name"
+        assert cached.mime == "audio/webm"
+
+    def test_expired_entry_is_ignored(self, cache, uploaded_file, monkeypatch):
+        """Entries past their expiry should miss."""
+        cache.put("deadbeef", uploaded_file, "audio/webm")
+
+        monkeypatch.setattr(time, "time", lambda: 10**12)
+        assert cache.get("deadbeef") is None
+
+    def test_get_or_upload_miss_uploads(
+        self, cache, mock_gemini_client, uploaded_file, webm_stub_file
+    ):
+        """A cache miss should upload the file and record it."""
+        result = cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm")
+
+        assert result is uploaded_file
+        mock_gemini_client.files.upload.assert_called_once()
+        assert cache.get(hash_file(webm_stub_file)) is not None
+
+    def test_get_or_upload_miss_calls_upload(
+        self, cache, mocker, mock_gemini_client, uploaded_file, webm_stub_file
+    ):
+        """On a miss, a given upload function does the upload instead of the client."""
+        upload = mocker.Mock(return_value=uploaded_file)
+
+        result = cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm", upload)
+
+        assert result is uploaded_file
+        upload.assert_called_once_with()
+        mock_gemini_client.files.upload.assert_not_called()
+        assert cache.get(hash_file(webm_stub_file)) is not None
+
+    def test_get_or_upload_hit_skips_upload(
+        self, cache, mock_gemini_client, uploaded_file, webm_stub_file
+    ):
+        """A cache hit should fetch the existing file instead of uploading."""
+        cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm")
+        mock_gemini_client.files.upload.reset_mock()
+
+        result = cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm")
+
+        mock_gemini_client.files.upload.assert_not_called()
+        mock_gemini_client.files.get.assert_called_once_with(name="uploaded_file_name")
+        assert result is mock_gemini_client.files.get.return_value
+
+    def test_get_or_upload_reuploads_when_file_gone(
+        self, cache, mock_gemini_client, uploaded_file, webm_stub_file
+    ):
+        """If Gemini no longer has the cached file, upload it again."""
+        cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm")
+        mock_gemini_client.files.upload.reset_mock()
+        mock_gemini_client.files.get.side_effect = errors.ClientError(404, {})
+
+        cache.get_or_upload(mock_gemini_client, webm_stub_file, "audio/webm")
+
+        mock_gemini_client.files.upload.assert_called_once()
@@ -6,7 +6,114 @@ from pathlib import Path
 
 import pytest
 
-from utils import extract_zip, load_metadata, save_metadata
+import utils
+from utils import (
+    dumps_json,
+    dumps_json_bytes,
+    extract_zip,
+    load_metadata,
+    loads_json,
+    open_for_streaming,
+    prefetch_file,
+    save_metadata,
+)
+
+
+class TestJsonHelpers:
+    """Tests for loads_json and dumps_json, with and without orjson."""
+
+    @pytest.fixture(params=["orjson", "stdlib"])
+    def json_backend(self, request, monkeypatch):
+        """Run each test against orjson (if installed) and the stdlib fallback."""
+        if request.param == "stdlib":
+            monkeypatch.setattr(utils, "orjson", None)
+        elif utils.orjson is None:
+            pytest.skip("orjson not installed")
+        return request.param
+
+    def test_round_trip_preserves_unicode(self, json_backend):
+        """Non-ASCII text should survive unescaped."""
+        value = {"location": "El Yunque", "travelers": ["François", "Müller"], "count": 2}
+        text = dumps_json(value)
+
+        assert "François" in text
+        assert '\n  "location": "El Yunque"' in text
+        assert loads_json(text) == value
+
+    def test_loads_accepts_bytes(self, json_backend):
+        """Should parse bytes as well as str."""
+        assert loads_json(b'{"key": [1, 2]}') == {"key": [1, 2]}
+
+    def test_loads_invalid_raises_json_decode_error(self, json_backend):
+        """Invalid JSON should raise json.JSONDecodeError regardless of backend."""
+        with pytest.raises(json.JSONDecodeError):
+            loads_json("{ invalid json content }")
+
+    def test_dumps_bytes_is_utf8_of_dumps(self, json_backend):
+        """dumps_json_bytes gives the UTF-8 encoding of dumps_json."""
+        value = {"location": "El Yunque", "travelers": ["François"]}
+        assert dumps_json_bytes(value) == dumps_json(value).encode("utf-8")
+
+    def test_dumps_matches_stdlib_format(self, json_backend):
+        """Output should match json.dumps(indent=2, ensure_ascii=False)."""
+        value = {"a": [1, {"b": "ä"}], "c": None, "d": True}
+        assert dumps_json(value) == json.dumps(value, indent=2, ensure_ascii=False)
+
+
+class TestOpenForStreaming:
+    """Tests for open_for_streaming function."""
+
+    def test_reads_file_contents(self, temp_dir):
+        """Should return a readable binary file object."""
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"abc" * 1000)
+
+        with open_for_streaming(path) as f:
+            assert f.read(3) == b"abc"
+            assert len(f.read()) == 2997
+
+    def test_hints_sequential_access(self, temp_dir, mocker):
+        """Should advise the kernel of sequential access when supported."""
+        if not hasattr(utils.os, "posix_fadvise"):
+            pytest.skip("posix_fadvise not available on this platform")
+        fadvise = mocker.patch.object(utils.os, "posix_fadvise")
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"abc")
+
+        with open_for_streaming(path) as f:
+            fadvise.assert_called_once_with(f.fileno(), 0, 0, utils.os.POSIX_FADV_SEQUENTIAL)
+
+    def test_ignores_unsupported_hint(self, temp_dir, mocker):
+        """A filesystem rejecting the hint should not prevent reading."""
+        if not hasattr(utils.os, "posix_fadvise"):
+            pytest.skip("posix_fadvise not available on this platform")
+        mocker.patch.object(utils.os, "posix_fadvise", side_effect=OSError)
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"abc")
+
+        with open_for_streaming(path) as f:
+            assert f.read() == b"abc"
+
+
+class TestPrefetchFile:
+    """Tests for prefetch_file function."""
+
+    def test_requests_readahead(self, temp_dir, mocker):
+        """Should ask the kernel to read the whole file ahead."""
+        if not hasattr(utils.os, "posix_fadvise"):
+            pytest.skip("posix_fadvise not available on this platform")
+        fadvise = mocker.patch.object(utils.os, "posix_fadvise")
+        path = temp_dir / "clip.webm"
+        path.write_bytes(b"abc")
+
+        prefetch_file(path)
+
+        fadvise.assert_called_once()
+        assert fadvise.call_args[0][1:] == (0, 0, utils.os.POSIX_FADV_WILLNEED)
+
+    def test_missing_file_is_ignored(self, temp_dir):
+        """A file that can't be opened is silently skipped."""
+        prefetch_file(temp_dir / "missing.webm")
 
 
 class TestExtractZip:
@@ -70,6 +177,42 @@ class TestExtractZip:
         assert (Path(result) / "file1.txt").exists()
         assert (Path(result) / "file2.txt").exists()
 
+    def test_extract_skips_macos_metadata(self, temp_dir):
+        """__MACOSX/ and AppleDouble entries are not extracted and don't hide the export folder."""
+        zip_path = temp_dir / "finder.zip"
+        with zipfile.ZipFile(zip_path, "w") as zipf:
+            zipf.writestr("export/metadata.json", "{}")
+            zipf.writestr("export/.DS_Store", "junk")
+            zipf.writestr("__MACOSX/export/._metadata.json", "junk")
+
+        output_dir = temp_dir / "output"
+        result = extract_zip(zip_path, output_dir)
+
+        assert result == str(output_dir / "export")
+        assert not (output_dir / "__MACOSX").exists()
+        assert sorted(p.name for p in (output_dir / "export").iterdir()) == ["metadata.json"]
+
+    def test_extract_many_files_in_parallel(self, temp_dir, mocker):
+        """Archives with many files across folders are extracted intact on worker threads."""
+        mocker.patch("utils.os.cpu_count", return_value=4)
+        zip_path = temp_dir / "many.zip"
+        expected = {
+            f"export/audio/day_{day}/clip_{i:03d}.webm": f"clip {day}-{i}".encode()
+            for day in range(3)
+            for i in range(10)
+        }
+        expected["export/metadata.json"] = b"{}"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zipf:
+            for name, data in expected.items():
+                zipf.writestr(name, data)
+
+        output_dir = temp_dir / "output"
+        result = extract_zip(zip_path, output_dir)
+
+        assert result == str(output_dir / "export")
+        for name, data in expected.items():
+            assert (output_dir / name).read_bytes() == data
+
     def test_extract_nonexistent_zip_raises_error(self, temp_dir):
         """Test that FileNotFoundError is raised for non-existent ZIP file."""
         nonexistent_zip = temp_dir / "nonexistent.zip"
@@ -122,6 +265,26 @@ class TestLoadMetadata:
         with pytest.raises(json.JSONDecodeError):
             load_metadata(str(malformed_file))
 
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_load_with_and_without_orjson(self, temp_dir, monkeypatch, use_orjson):
+        """Metadata parses the same whether or not orjson is available."""
+        if not use_orjson:
+            monkeypatch.setattr(utils, "orjson", None)
+        elif utils.orjson is None:
+            pytest.skip("orjson not installed")
+        metadata_file = temp_dir / "metadata.json"
+        metadata_file.write_text('{"location": "El Yunque", "clips": [1, 2]}', encoding="utf-8")
+
+        assert load_metadata(metadata_file) == {"location": "El Yunque", "clips": [1, 2]}
+
+    def test_load_zero_byte_file_raises_error(self, temp_dir):
+        """An empty file is malformed JSON, not a crash in the memory mapping."""
+        empty_file = temp_dir / "zero.json"
+        empty_file.write_bytes(b"")
+
+        with pytest.raises(json.JSONDecodeError):
+            load_metadata(empty_file)
+
     def test_load_empty_json_object(self, temp_dir):
         """Test loading an empty but valid JSON object."""
         empty_file = temp_dir / "empty.json"
@@ -157,6 +320,18 @@ class TestSaveMetadata:
         assert output_path.parent.exists()
         assert output_path.exists()
 
+    def test_failed_save_keeps_previous_file(self, temp_dir, mocker):
+        """A write that fails part-way leaves the old file intact and no temp file behind."""
+        output_path = temp_dir / "output.json"
+        save_metadata({"clips": ["old"]}, output_path)
+        mocker.patch("utils.os.fsync", side_effect=OSError("disk full"))
+
+        with pytest.raises(OSError, match="disk full"):
+            save_metadata({"clips": ["new"]}, output_path)
+
+        assert json.loads(output_path.read_text()) == {"clips": ["old"]}
+        assert [p.name for p in temp_dir.iterdir()] == ["output.json"]
+
     def test_save_preserves_utf8_characters(self, temp_dir):
         """Test that UTF-8 characters are preserved correctly."""
         metadata = {
@@ -2,11 +2,31 @@
 # Travel Chronicle - OpenAI Transcription with Speaker Diarization
 
 import base64
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from openai import OpenAI
 
+# Constants
+MAX_ENCODE_WORKERS = 4
+
+# "00".."99", so timestamps under 100 minutes are built without int formatting
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+
+# OpenAI clients by API key, reused so connection pools survive across calls
+_CLIENT_CACHE: dict[str, OpenAI] = {}
+
+
+def _get_client(api_key: str) -> OpenAI:
+    """Get the shared OpenAI client for an API key, creating it on first use."""
+    client = _CLIENT_CACHE.get(api_key)
+    if client is None:
+        client = _CLIENT_CACHE[api_key] = OpenAI(api_key=api_key)
+    return client
+
 
 def encode_audio_as_data_url(path: Path) -> str:
     """
@@ -36,6 +56,42 @@ def encode_audio_as_data_url(path: Path) -> str:
     return f"data:{mime_type};base64,{data}"
 
 
+@lru_cache(maxsize=64)
+def _encode_audio_cached(path: str, mtime_ns: int, size: int) -> str:
+    """Encode a file as a data URL, memoized on path, mtime and size."""
+    return encode_audio_as_data_url(Path(path))
+
+
+def load_voice_reference_data_urls(paths: list[Path]) -> list[str]:
+    """
+    Encode voice reference files as data URLs, concurrently.
+
+    Every clip in a trip is transcribed with the same voice references, so
+    encodings are cached for the session and only redone if a file changes.
+
+    Args:
+        paths: Voice reference file paths
+
+    Returns:
+        Data URLs in the same order as paths
+    """
+    return _encode_voice_references([_cache_key(path, path.stat()) for path in paths])
+
+
+def _cache_key(path: Path, stat: os.stat_result) -> tuple[str, int, int]:
+    """Build the _encode_audio_cached arguments for a file from its stat result."""
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _encode_voice_references(cache_keys: list[tuple[str, int, int]]) -> list[str]:
+    """Encode files given their _cache_key()s, concurrently when there are several."""
+    if len(cache_keys) <= 1:
+        return [_encode_audio_cached(*key) for key in cache_keys]
+
+    with ThreadPoolExecutor(max_workers=min(MAX_ENCODE_WORKERS, len(cache_keys))) as pool:
+        return list(pool.map(lambda key: _encode_audio_cached(*key), cache_keys))
+
+
 def format_timestamp(seconds: float) -> str:
     """
     Format seconds as MM:SS timestamp.
@@ -46,12 +102,38 @@ def format_timestamp(seconds: float) -> str:
     Returns:
         Formatted string like "01:23"
     """
-    total_seconds = int(seconds)
-    minutes = total_seconds // 60
-    secs = total_seconds % 60
+    minutes, secs = divmod(int(seconds), 60)
+    if 0 <= minutes < 100:
+        return f"{_TWO_DIGITS[minutes]}:{_TWO_DIGITS[secs]}"
     return f"{minutes:02d}:{secs:02d}"
 
 
+def segments_to_transcript(segments: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Convert diarized response segments into transcript entries.
+
+    Args:
+        segments: "segments" list from a diarized_json transcription response
+
+    Returns:
+        List of {timestamp, speaker, text} entries, skipping empty segments
+    """
+    transcript = []
+    for segment in segments:
+        text = segment.get("text", "").strip()
+        if not text:
+            continue
+
+        transcript.append(
+            {
+                "timestamp": format_timestamp(segment.get("start", 0)),
+                "speaker": segment.get("speaker", "Unknown"),
+                "text": text,
+            }
+        )
+    return transcript
+
+
 def transcribe_with_diarization(
     clip_path: Path,
     voice_references: list[tuple[dict[str, Any], Path]],
@@ -71,18 +153,20 @@ def transcribe_with_diarization(
             - transcript: list of {timestamp, speaker, text} entries
             - _meta: metadata about the transcription
     """
-    client = OpenAI(api_key=api_key)
+    client = _get_client(api_key)
 
-    # Prepare known speaker names and references
+    # Prepare known speaker names and references. One stat per reference both
+    # skips missing files and keys the encoding cache
     known_speaker_names = []
-    known_speaker_references = []
-
+    cache_keys = []
     for traveler, ref_path in voice_references:
-        if ref_path.exists():
-            known_speaker_names.append(traveler["name"])
-            known_speaker_references.append(encode_audio_as_data_url(ref_path))
-
-    print(f"Transcribing with {len(known_speaker_names)} voice references: {known_speaker_names}")
+        try:
+            stat = ref_path.stat()
+        except FileNotFoundError:
+            continue
+        known_speaker_names.append(traveler["name"])
+        cache_keys.append(_cache_key(ref_path, stat))
+    known_speaker_references = _encode_voice_references(cache_keys)
 
     # Call OpenAI API
     with open(clip_path, "rb") as audio_file:
@@ -102,21 +186,7 @@ def transcribe_with_diarization(
     response_dict = response.model_dump() if hasattr(response, "model_dump") else dict(response)
 
     # Transform segments into our transcript format
-    transcript = []
-    segments = response_dict.get("segments", [])
-
-    for segment in segments:
-        text = segment.get("text", "").strip()
-        if not text:
-            continue
-
-        transcript.append(
-            {
-                "timestamp": format_timestamp(segment.get("start", 0)),
-                "speaker": segment.get("speaker", "Unknown"),
-                "text": text,
-            }
-        )
+    transcript = segments_to_transcript(response_dict.get("segments", []))
 
     return {
         "transcript": transcript,
@@ -144,9 +214,7 @@ def transcribe_without_diarization(
     Returns:
         dict with transcript (speakers labeled A, B, C, etc.)
     """
-    client = OpenAI(api_key=api_key)
-
-    print("Transcribing without voice references (speakers will be labeled A, B, C...)")
+    client = _get_client(api_key)
 
     with open(clip_path, "rb") as audio_file:
         response = client.audio.transcriptions.create(
@@ -161,19 +229,7 @@ def transcribe_without_diarization(
 
     response_dict = response.model_dump() if hasattr(response, "model_dump") else dict(response)
 
-    transcript = []
-    for segment in response_dict.get("segments", []):
-        text = segment.get("text", "").strip()
-        if not text:
-            continue
-
-        transcript.append(
-            {
-                "timestamp": format_timestamp(segment.get("start", 0)),
-                "speaker": segment.get("speaker", "Unknown"),
-                "text": text,
-            }
-        )
+    transcript = segments_to_transcript(response_dict.get("segments", []))
 
     return {
         "transcript": transcript,
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Travel Chronicle - Gemini Upload Cache
+#
+# Remembers which Gemini file each audio file was uploaded as, keyed by the
+# SHA-256 of the file bytes, so identical audio is not uploaded twice.
+#
+# Enabled with GEMINI_FILE_CACHE=1
+
+import hashlib
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from google.genai import errors
+
+from utils import open_for_streaming
+
+# Constants
+UPLOAD_CACHE_ENV_VAR = "GEMINI_FILE_CACHE"
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "travel-chronicle" / "gemini_files.sqlite3"
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+FILE_TTL_SECONDS = 48 * 60 * 60  # Gemini deletes uploaded files after 48 hours
+SQLITE_TIMEOUT_SECONDS = 30.0  # How long to wait for another thread's write lock
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS uploaded_files (
+    sha256 TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    uri TEXT,
+    mime TEXT,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class CachedUpload:
+    """A previously uploaded Gemini file."""
+
+    sha256: str
+    file_name: str
+    uri: Optional[str]
+    mime: Optional[str]
+    expires_at: float
+
+
+def is_upload_cache_enabled() -> bool:
+    """Return True if the upload cache is switched on via GEMINI_FILE_CACHE=1."""
+    return os.getenv(UPLOAD_CACHE_ENV_VAR) == "1"
+
+
+def hash_file(path: Path) -> str:
+    """
+    Compute the SHA-256 of a file, reading it in 1 MiB chunks.
+
+    Chunks are read into one reused buffer, so hashing a large file doesn't
+    allocate a new bytes object per chunk.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open_for_streaming(path) as f:
+        while True:
+            size = f.readinto(view)  # type: ignore[attr-defined]
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def _expiry_timestamp(uploaded_file: Any) -> float:
+    """Get the expiry time of an uploaded file as a UNIX timestamp."""
+    expiration_time = getattr(uploaded_file, "expiration_time", None)
+    if isinstance(expiration_time, datetime):
+        return expiration_time.timestamp()
+    return time.time() + FILE_TTL_SECONDS
+
+
+class UploadCache:
+    """SQLite-backed map of file content hash to uploaded Gemini file."""
+
+    def __init__(self, db_path: Optional[Path] = None) -> None:
+        db_path = db_path or DEFAULT_CACHE_PATH
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Clips are processed concurrently, each thread with its own connection;
+        # WAL mode lets readers proceed while another thread records an upload
+        self._conn = sqlite3.connect(str(db_path), timeout=SQLITE_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_CREATE_TABLE_SQL)
+        self._conn.commit()
+
+    def __enter__(self) -> "UploadCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def get(self, sha256: str) -> Optional[CachedUpload]:
+        """
+        Look up an unexpired upload by content hash.
+
+        Args:
+            sha256: Hex digest of the file bytes
+
+        Returns:
+            CachedUpload if found and not expired, None otherwise
+        """
+        row = self._conn.execute(
+            "SELECT sha256, file_name, uri, mime, expires_at FROM uploaded_files WHERE sha256 = ?",
+            (sha256,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        cached = CachedUpload(*row)
+        if cached.expires_at <= time.time():
+            return None
+        return cached
+
+    def put(self, sha256: str, uploaded_file: Any, mime: str) -> None:
+        """
+        Record an uploaded file under its content hash.
+
+        Args:
+            sha256: Hex digest of the file bytes
+            uploaded_file: File object returned by client.files.upload
+            mime: MIME type the file was uploaded with
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO uploaded_files VALUES (?, ?, ?, ?, ?)",
+            (
+                sha256,
+                uploaded_file.name,
+                uploaded_file.uri,
+                mime,
+                _expiry_timestamp(uploaded_file),
+            ),
+        )
+        self._conn.commit()
+
+    def get_or_upload(
+        self,
+        client: Any,
+        path: Path,
+        mime_type: str,
+        upload: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Return the Gemini file for these bytes, uploading only on a cache miss.
+
+        A cache hit is verified with client.files.get; if Gemini no longer has
+        the file, it is uploaded again and the cache entry replaced.
+
+        Args:
+            client: Gemini client
+            path: Path to the file to upload; its bytes are the cache key
+            mime_type: MIME type to upload the file with
+            upload: Does the upload on a cache miss and returns the Gemini
+                file, e.g. of a compressed copy or with retries (uploads path
+                directly if None)
+
+        Returns:
+            The uploaded (or previously uploaded) Gemini file
+        """
+        sha256 = hash_file(path)
+
+        cached = self.get(sha256)
+        if cached is not None:
+            try:
+                return client.files.get(name=cached.file_name)
+            except errors.ClientError:
+                # File expired or was deleted on the Gemini side - upload again
+                pass
+
+        if upload is not None:
+            uploaded_file = upload()
+        else:
+            with open_for_streaming(path) as f:
+                uploaded_file = client.files.upload(file=f, config={"mime_type": mime_type})
+        self.put(sha256, uploaded_file, mime_type)
+        return uploaded_file